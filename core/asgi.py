@@ -9,8 +9,19 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
+from core.estaticos import EstaticosASGI
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings.development')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+if settings.DEBUG:
+    # Direto das pastas de origem, sem collectstatic
+    application = ASGIStaticFilesHandler(django_application)
+else:
+    # Estáticos pelo WhiteNoise, antes do Django (veja core.estaticos)
+    application = EstaticosASGI(django_application)
@@ -0,0 +1,59 @@
+"""
+Arquivos estáticos servidos pelo WhiteNoise fora da pilha de middlewares.
+
+O WhiteNoise só funciona como middleware síncrono; na pilha ASGI ele obrigaria
+o Django a executar toda requisição numa thread, inclusive as views
+assíncronas que esperam eventos (SSE e long-poll). Por isso ele envolve a
+aplicação WSGI (``core.wsgi``) e, no ASGI (``core.asgi``), recebe só as
+requisições sob ``STATIC_URL``, que nunca passam pelo Django.
+
+Em ambos os casos ele serve ``STATIC_ROOT`` como gerado pelo collectstatic:
+as versões comprimidas (gzip/brotli) quando o cliente aceita e cache de um
+ano para os nomes com hash do manifesto.
+"""
+
+from asgiref.sync import ThreadSensitiveContext
+from asgiref.wsgi import WsgiToAsgi
+from django.conf import settings
+from whitenoise import WhiteNoise
+
+# Nomes gerados pelo ManifestStaticFilesStorage (``app.3f2a9c1b7d4e.css``)
+ARQUIVO_COM_HASH = r"\.[0-9a-f]{12}\.\w+$"
+
+
+def _nao_encontrado(environ, start_response):
+    start_response("404 Not Found", [("Content-Type", "text/plain")])
+    return [b"Not Found"]
+
+
+def whitenoise(application=_nao_encontrado) -> WhiteNoise:
+    """
+    WhiteNoise sobre ``STATIC_ROOT`` que repassa a ``application`` o que não
+    for arquivo estático
+    """
+    return WhiteNoise(
+        application,
+        root=settings.STATIC_ROOT,
+        prefix=settings.STATIC_URL,
+        autorefresh=settings.DEBUG,
+        immutable_file_test=ARQUIVO_COM_HASH,
+    )
+
+
+class EstaticosASGI:
+    """
+    Roteia as requisições sob ``STATIC_URL`` para o WhiteNoise e as demais
+    para a aplicação ASGI do Django
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.estaticos = WsgiToAsgi(whitenoise())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(settings.STATIC_URL):
+            # Uma thread por requisição, como o Django faz com as views
+            # síncronas, em vez da thread única compartilhada do asgiref
+            async with ThreadSensitiveContext():
+                return await self.estaticos(scope, receive, send)
+        return await self.application(scope, receive, send)
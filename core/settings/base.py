@@ -54,18 +54,18 @@ INSTALLED_APPS = [
     "django.contrib.contenttypes",
     "django.contrib.sessions",
     "django.contrib.messages",
-    "whitenoise.runserver_nostatic",
     "django.contrib.staticfiles",
     "rodas",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "rodas.middleware.OrcamentoConsultasMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "rodas.middleware.PerfilMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -82,6 +82,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "rodas.context_processors.notificacoes",
             ],
         },
     },
@@ -164,5 +165,40 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Custom User Model
 AUTH_USER_MODEL = "rodas.Usuario"
 
+# O PerfilBackend carrega o perfil junto com o usuário; o ModelBackend continua
+# na lista para validar sessões abertas antes da troca.
+AUTHENTICATION_BACKENDS = [
+    "rodas.backends.PerfilBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+
+# Instrumentação de consultas (rodas.middleware.OrcamentoConsultasMiddleware)
+SERVER_TIMING = DEBUG
+CONSULTAS_LIMITE_REPETICOES = 5
+
 # Google Maps API
 GOOGLE_MAPS_API_KEY = os.environ.get("GOOGLE_MAPS_API_KEY", "")
+
+# Geocodificação no servidor (rodas.geocodificacao). Sem chave do Google, usa
+# um arquivo JSON local que mapeia endereços para coordenadas.
+if GOOGLE_MAPS_API_KEY:
+    GEOCODIFICACAO_PROVEDOR = "rodas.geocodificacao.ProvedorGoogle"
+    GEOCODIFICACAO_OPCOES = {"chave_api": GOOGLE_MAPS_API_KEY}
+else:
+    GEOCODIFICACAO_PROVEDOR = "rodas.geocodificacao.ProvedorArquivo"
+    GEOCODIFICACAO_OPCOES = {
+        "caminho": os.environ.get(
+            "GEOCODIFICACAO_ARQUIVO",
+            BASE_DIR / "rodas" / "dados" / "enderecos_exemplo.json",
+        )
+    }
+GEOCODIFICACAO_TAMANHO_LRU = 1024
+
+# Redis usado diretamente pela aplicação (rodas.conexao_redis)
+REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/1")
+
+# Presença dos motoristas (rodas.presenca): sem batimento por PRESENCA_TTL
+# segundos o motorista deixa de ser considerado online. O painel envia um
+# batimento a cada PRESENCA_INTERVALO_BATIMENTO segundos.
+PRESENCA_TTL = 90
+PRESENCA_INTERVALO_BATIMENTO = 30
@@ -11,6 +11,8 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from core.estaticos import whitenoise
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings.development')
 
-application = get_wsgi_application()
+application = whitenoise(get_wsgi_application())
@@ -1,13 +1,22 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db.models import Max, Sum
 from .models import (
     Usuario,
     Paciente,
     Motorista,
     Corrida,
+    CorridaStatus,
     Avaliacao,
     Notificacao,
     Configuracao,
+    EnderecoGeocodificado,
+    PontoTrajeto,
+    CorridaEvento,
+    ResumoDiario,
+    MarcaAtualizacao,
 )
+from .resumos import NOME_MARCA
+from .transicoes import aplicar_transicao_em_lote
 
 
 @admin.register(Usuario)
@@ -84,6 +93,7 @@ class PacienteAdmin(admin.ModelAdmin):
     list_filter = ("necessita_cadeira_rodas", "imunossuprimido", "aceite_termos")
     search_fields = ("usuario__nome_completo", "responsavel_nome", "responsavel_cpf")
     readonly_fields = ("data_aceite_termos",)
+    list_select_related = ("usuario",)
 
     fieldsets = (
         ("Usuário", {"fields": ("usuario",)}),
@@ -117,10 +127,16 @@ class MotoristaAdmin(admin.ModelAdmin):
         "veiculo_completo",
         "status_aprovacao",
         "online",
+        "veiculo_adaptado",
         "total_corridas",
         "avaliacao_media",
     )
-    list_filter = ("status_aprovacao", "online", "aceite_termos_voluntariado")
+    list_filter = (
+        "status_aprovacao",
+        "online",
+        "veiculo_adaptado",
+        "aceite_termos_voluntariado",
+    )
     search_fields = (
         "usuario__nome_completo",
         "marca_veiculo",
@@ -131,8 +147,10 @@ class MotoristaAdmin(admin.ModelAdmin):
         "data_aceite_termos",
         "data_aprovacao",
         "avaliacao_media",
+        "total_avaliacoes",
         "total_corridas",
     )
+    list_select_related = ("usuario",)
 
     fieldsets = (
         ("Usuário", {"fields": ("usuario",)}),
@@ -145,6 +163,7 @@ class MotoristaAdmin(admin.ModelAdmin):
                     "cor_veiculo",
                     "ano_veiculo",
                     "placa_veiculo",
+                    "veiculo_adaptado",
                 )
             },
         ),
@@ -167,6 +186,7 @@ class MotoristaAdmin(admin.ModelAdmin):
                     "aceite_termos_voluntariado",
                     "data_aceite_termos",
                     "avaliacao_media",
+                    "total_avaliacoes",
                     "total_corridas",
                 )
             },
@@ -201,8 +221,29 @@ class CorridaAdmin(admin.ModelAdmin):
         "endereco_origem",
         "endereco_destino",
     )
-    readonly_fields = ("data_criacao", "data_atualizacao")
+    # Status e datas das transições só mudam pelas ações abaixo, que passam
+    # por rodas.transicoes e registram o evento no histórico
+    readonly_fields = (
+        "status",
+        "data_hora_aceite",
+        "data_hora_inicio",
+        "data_hora_chegada",
+        "data_hora_finalizacao",
+        "motivo_cancelamento",
+        "data_cancelamento",
+        "cancelada_por",
+        "data_criacao",
+        "data_atualizacao",
+    )
     date_hierarchy = "data_hora_agendada"
+    actions = (
+        "iniciar_corridas",
+        "registrar_chegada",
+        "concluir_corridas",
+        "cancelar_corridas",
+    )
+    list_select_related = ("paciente__usuario", "motorista__usuario")
+    autocomplete_fields = ("paciente", "motorista")
 
     fieldsets = (
         ("Participantes", {"fields": ("paciente", "motorista")}),
@@ -264,6 +305,49 @@ class CorridaAdmin(admin.ModelAdmin):
 
     get_motorista_nome.short_description = "Motorista"
 
+    def aplicar_transicao(self, request, queryset, destino, motivo=""):
+        alteradas = aplicar_transicao_em_lote(
+            list(queryset.values_list("pk", flat=True)),
+            destino,
+            autor_id=request.user.pk,
+            motivo=motivo,
+        )
+        ignoradas = queryset.count() - len(alteradas)
+        self.message_user(
+            request,
+            f"{len(alteradas)} corrida(s) atualizada(s) para "
+            f"{CorridaStatus(destino).label}.",
+            messages.SUCCESS,
+        )
+        if ignoradas:
+            self.message_user(
+                request,
+                f"{ignoradas} corrida(s) em status que não permite a mudança "
+                "foram ignoradas.",
+                messages.WARNING,
+            )
+
+    @admin.action(description="Iniciar corridas selecionadas")
+    def iniciar_corridas(self, request, queryset):
+        self.aplicar_transicao(request, queryset, CorridaStatus.EM_ANDAMENTO)
+
+    @admin.action(description="Registrar chegada do motorista")
+    def registrar_chegada(self, request, queryset):
+        self.aplicar_transicao(request, queryset, CorridaStatus.MOTORISTA_CHEGOU)
+
+    @admin.action(description="Concluir corridas selecionadas")
+    def concluir_corridas(self, request, queryset):
+        self.aplicar_transicao(request, queryset, CorridaStatus.CONCLUIDA)
+
+    @admin.action(description="Cancelar corridas selecionadas")
+    def cancelar_corridas(self, request, queryset):
+        self.aplicar_transicao(
+            request,
+            queryset,
+            CorridaStatus.CANCELADA,
+            motivo="Cancelada pela administração.",
+        )
+
 
 @admin.register(Avaliacao)
 class AvaliacaoAdmin(admin.ModelAdmin):
@@ -286,6 +370,8 @@ class AvaliacaoAdmin(admin.ModelAdmin):
         "comentario",
     )
     readonly_fields = ("data_avaliacao",)
+    list_select_related = ("corrida__paciente__usuario", "avaliador", "avaliado")
+    autocomplete_fields = ("corrida", "avaliador", "avaliado")
 
     def get_avaliador_nome(self, obj):
         return obj.avaliador.get_full_name() or obj.avaliador.username
@@ -308,6 +394,8 @@ class NotificacaoAdmin(admin.ModelAdmin):
     list_filter = ("tipo", "lida", "data_criacao")
     search_fields = ("titulo", "mensagem", "usuario__nome_completo")
     readonly_fields = ("data_criacao", "data_leitura")
+    list_select_related = ("usuario",)
+    autocomplete_fields = ("usuario", "corrida")
 
     def get_usuario_nome(self, obj):
         return obj.usuario.get_full_name() or obj.usuario.username
@@ -332,3 +420,147 @@ class ConfiguracaoAdmin(admin.ModelAdmin):
         return valor_str
 
     get_valor_resumo.short_description = "Valor"
+
+
+@admin.register(EnderecoGeocodificado)
+class EnderecoGeocodificadoAdmin(admin.ModelAdmin):
+    """
+    Admin para o cache de geocodificação. Corrigir as coordenadas aqui vale
+    para as próximas corridas depois que o cache do Django expirar.
+    """
+
+    list_display = (
+        "endereco_normalizado",
+        "latitude",
+        "longitude",
+        "provedor",
+        "data_criacao",
+    )
+    list_filter = ("provedor",)
+    search_fields = ("endereco_normalizado", "endereco_formatado")
+    readonly_fields = ("chave", "endereco_normalizado", "provedor", "data_criacao")
+
+
+@admin.register(PontoTrajeto)
+class PontoTrajetoAdmin(admin.ModelAdmin):
+    """
+    Admin somente leitura dos trajetos; a tabela cresce rápido, então a
+    listagem não conta o total de linhas.
+    """
+
+    list_display = ("corrida", "registrado_em", "latitude", "longitude")
+    list_select_related = ("corrida__paciente__usuario",)
+    raw_id_fields = ("corrida",)
+    search_fields = ("=corrida__id",)
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CorridaEvento)
+class CorridaEventoAdmin(admin.ModelAdmin):
+    """
+    Admin somente leitura do histórico de status das corridas; como nos
+    trajetos, a listagem não conta o total de linhas.
+    """
+
+    list_display = ("corrida", "status", "registrado_em", "motorista", "autor")
+    list_filter = ("status",)
+    list_select_related = (
+        "corrida__paciente__usuario",
+        "motorista__usuario",
+        "autor",
+    )
+    raw_id_fields = ("corrida", "motorista", "autor")
+    search_fields = ("=corrida__id",)
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+def _formatar_segundos(segundos):
+    if segundos is None:
+        return "-"
+    horas, resto = divmod(segundos, 3600)
+    return f"{horas}h{resto // 60:02d}" if horas else f"{resto // 60} min"
+
+
+@admin.register(ResumoDiario)
+class ResumoDiarioAdmin(admin.ModelAdmin):
+    """
+    Painel de análise das corridas. Lê apenas os resumos diários mantidos por
+    ``atualizar_resumos``, nunca a tabela de corridas.
+    """
+
+    list_display = (
+        "dia",
+        "cidade",
+        "total",
+        "pendentes",
+        "em_curso",
+        "concluidas",
+        "canceladas",
+        "motoristas_ativos",
+        "get_aceite_p50",
+        "get_aceite_p90",
+    )
+    list_filter = ("cidade",)
+    date_hierarchy = "dia"
+    list_per_page = 100
+
+    def get_aceite_p50(self, obj):
+        return _formatar_segundos(obj.aceite_p50_segundos)
+
+    get_aceite_p50.short_description = "Aceite (mediana)"
+    get_aceite_p50.admin_order_field = "aceite_p50_segundos"
+
+    def get_aceite_p90(self, obj):
+        return _formatar_segundos(obj.aceite_p90_segundos)
+
+    get_aceite_p90.short_description = "Aceite (p90)"
+    get_aceite_p90.admin_order_field = "aceite_p90_segundos"
+
+    def changelist_view(self, request, extra_context=None):
+        resposta = super().changelist_view(request, extra_context)
+        # Redirecionamentos (filtro inválido, ação executada) não têm contexto
+        contexto = getattr(resposta, "context_data", None)
+        if not contexto or "cl" not in contexto:
+            return resposta
+
+        totais = contexto["cl"].queryset.aggregate(
+            total=Sum("total"),
+            pendentes=Sum("pendentes"),
+            em_curso=Sum("em_curso"),
+            concluidas=Sum("concluidas"),
+            canceladas=Sum("canceladas"),
+            pico_motoristas=Max("motoristas_ativos"),
+        )
+        if totais["total"]:
+            totais["taxa_cancelamento"] = 100 * totais["canceladas"] / totais["total"]
+        contexto["totais"] = totais
+        contexto["marca"] = (
+            MarcaAtualizacao.objects.filter(nome=NOME_MARCA)
+            .values_list("marca", flat=True)
+            .first()
+        )
+        return resposta
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
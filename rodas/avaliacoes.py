@@ -0,0 +1,171 @@
+"""
+Avaliações pós-corrida e a nota média dos motoristas.
+
+``registrar_avaliacao`` grava a avaliação e, quando o paciente avalia o
+motorista, atualiza na mesma transação a soma, a quantidade e a média do
+motorista com um único UPDATE baseado em ``F()``: o banco aplica o incremento
+sobre os valores atuais da linha, sem ler o motorista antes e sem perder
+avaliações simultâneas. Nenhuma leitura precisa de ``AVG(nota)``.
+
+``recalcular_agregados`` refaz os agregados a partir das avaliações, em lotes
+de motoristas bloqueados durante o cálculo, para corrigir divergências
+(avaliações apagadas pelo admin ou gravadas por fora deste módulo).
+"""
+
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, QuerySet, Sum
+from django.db.models.functions import Cast, Round
+
+from .models import Avaliacao, Corrida, CorridaStatus, Motorista, TipoUsuario
+from .tarefas import enfileirar
+
+PACIENTE_AVALIA_MOTORISTA = "paciente_avalia_motorista"
+MOTORISTA_AVALIA_PACIENTE = "motorista_avalia_paciente"
+
+
+class AvaliacaoInvalida(ValueError):
+    pass
+
+
+@dataclass
+class ResultadoRecalculo:
+    motoristas: int = 0
+    divergentes: int = 0
+
+
+def _media(soma, total):
+    # Divisão real (e não inteira), arredondada a duas casas como a coluna
+    return Round(Cast(soma, FloatField()) / total, 2)
+
+
+def registrar_avaliacao(
+    corrida: Corrida, avaliador, nota: int, comentario: str = ""
+) -> Avaliacao:
+    """
+    Grava a avaliação da corrida feita pelo paciente ou pelo motorista dela e
+    atualiza a média do motorista avaliado
+    """
+    if corrida.status != CorridaStatus.CONCLUIDA:
+        raise AvaliacaoInvalida("Só é possível avaliar corridas concluídas.")
+    if nota not in range(1, 6):
+        raise AvaliacaoInvalida("A nota deve ser de 1 a 5.")
+
+    if avaliador.tipo_usuario == TipoUsuario.PACIENTE:
+        tipo = PACIENTE_AVALIA_MOTORISTA
+        avaliado_id = corrida.motorista.usuario_id
+    else:
+        tipo = MOTORISTA_AVALIA_PACIENTE
+        avaliado_id = corrida.paciente.usuario_id
+
+    estrelas = f"{nota} estrela{'s' if nota > 1 else ''}"
+    try:
+        with transaction.atomic():
+            avaliacao = Avaliacao.objects.create(
+                corrida=corrida,
+                avaliador=avaliador,
+                avaliado_id=avaliado_id,
+                tipo_avaliacao=tipo,
+                nota=nota,
+                comentario=comentario,
+            )
+            if tipo == PACIENTE_AVALIA_MOTORISTA:
+                # Do lado direito do SET, o banco usa os valores anteriores da
+                # linha
+                Motorista.objects.filter(pk=corrida.motorista_id).update(
+                    soma_avaliacoes=F("soma_avaliacoes") + nota,
+                    total_avaliacoes=F("total_avaliacoes") + 1,
+                    avaliacao_media=_media(
+                        F("soma_avaliacoes") + nota, F("total_avaliacoes") + 1
+                    ),
+                )
+            enfileirar(
+                "criar_notificacoes",
+                notificacoes=[
+                    {
+                        "usuario_id": avaliado_id,
+                        "tipo": "avaliacao_recebida",
+                        "titulo": "Você recebeu uma avaliação",
+                        "mensagem": f"Sua corrida foi avaliada com {estrelas}.",
+                        "corrida_id": corrida.pk,
+                    }
+                ],
+            )
+    except IntegrityError:
+        # unique_together (corrida, avaliador, tipo_avaliacao)
+        raise AvaliacaoInvalida("Esta corrida já foi avaliada.")
+    return avaliacao
+
+
+def recalcular_agregados(
+    motoristas: QuerySet | None = None,
+    tamanho_lote: int = 1000,
+    corrigir: bool = True,
+) -> ResultadoRecalculo:
+    """
+    Recalcula soma, quantidade e média das avaliações dos ``motoristas``
+    (todos, por padrão) em lotes ordenados por id, corrigindo apenas os que
+    divergem (ou só contando-os, sem ``corrigir``)
+    """
+    motoristas = (
+        Motorista.objects.all() if motoristas is None else motoristas
+    ).order_by("pk")
+    resultado = ResultadoRecalculo()
+    ultimo_id = 0
+    while True:
+        with transaction.atomic():
+            # Com as linhas do lote bloqueadas, uma avaliação simultânea ou já
+            # entrou na soma abaixo ou espera este commit para aplicar o seu
+            # incremento sobre o valor corrigido
+            lote = list(
+                motoristas.filter(pk__gt=ultimo_id)
+                .select_for_update(of=("self",))
+                .values_list(
+                    "pk",
+                    "usuario_id",
+                    "soma_avaliacoes",
+                    "total_avaliacoes",
+                    "avaliacao_media",
+                )[:tamanho_lote]
+            )
+            if not lote:
+                return resultado
+            ultimo_id = lote[-1][0]
+            resultado.motoristas += len(lote)
+
+            agregados = {
+                avaliado_id: (soma, total)
+                for avaliado_id, soma, total in Avaliacao.objects.filter(
+                    avaliado_id__in=[linha[1] for linha in lote],
+                    tipo_avaliacao=PACIENTE_AVALIA_MOTORISTA,
+                )
+                .order_by()
+                .values("avaliado_id")
+                .annotate(soma=Sum("nota"), total=Count("pk"))
+                .values_list("avaliado_id", "soma", "total")
+            }
+            divergentes = []
+            for pk, usuario_id, soma_atual, total_atual, media_atual in lote:
+                soma, total = agregados.get(usuario_id, (0, 0))
+                media = (
+                    (Decimal(soma) / total).quantize(Decimal("0.01"), ROUND_HALF_UP)
+                    if total
+                    else Decimal("0.00")
+                )
+                if (soma, total, media) != (soma_atual, total_atual, media_atual):
+                    divergentes.append(
+                        Motorista(
+                            pk=pk,
+                            soma_avaliacoes=soma,
+                            total_avaliacoes=total,
+                            avaliacao_media=media,
+                        )
+                    )
+            resultado.divergentes += len(divergentes)
+            if corrigir and divergentes:
+                Motorista.objects.bulk_update(
+                    divergentes,
+                    ["soma_avaliacoes", "total_avaliacoes", "avaliacao_media"],
+                )
@@ -0,0 +1,23 @@
+from django.contrib.auth.backends import ModelBackend
+
+from .models import Usuario
+
+
+class PerfilBackend(ModelBackend):
+    """
+    Autenticação padrão por e-mail e senha que, ao restaurar o usuário da
+    sessão, já traz o perfil de paciente ou de motorista no mesmo SELECT.
+
+    Assim ``usuario.perfil_paciente`` e ``usuario.perfil_motorista`` não geram
+    consultas extras nas views e templates; o perfil inexistente também fica
+    em cache e levanta ``DoesNotExist`` sem ir ao banco.
+    """
+
+    def get_user(self, user_id):
+        try:
+            usuario = Usuario._default_manager.select_related(
+                "perfil_paciente", "perfil_motorista"
+            ).get(pk=user_id)
+        except Usuario.DoesNotExist:
+            return None
+        return usuario if self.user_can_authenticate(usuario) else None
@@ -0,0 +1,44 @@
+"""
+Conexão com o Redis usado diretamente pela aplicação, fora do cache do Django.
+
+Estruturas como a presença dos motoristas precisam de comandos que a API de
+cache não oferece (conjuntos ordenados, pipelines). O cliente é criado uma vez
+por processo e mantém seu próprio pool de conexões. Os timeouts são curtos:
+com o Redis fora do ar as chamadas falham logo com ``redis.RedisError`` e cada
+módulo decide como degradar.
+"""
+
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+TIMEOUT_SEGUNDOS = 1.0
+
+
+@lru_cache(maxsize=1)
+def obter_redis() -> redis.Redis:
+    """
+    Cliente Redis do processo, apontado para ``settings.REDIS_URL``
+    """
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=TIMEOUT_SEGUNDOS,
+        socket_timeout=TIMEOUT_SEGUNDOS,
+        health_check_interval=30,
+    )
+
+
+def criar_redis_bloqueante(espera: float) -> redis.Redis:
+    """
+    Cliente com timeout de leitura maior que ``espera``, para comandos que
+    bloqueiam no servidor (``BLMOVE``)
+    """
+    return redis.Redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=TIMEOUT_SEGUNDOS,
+        socket_timeout=espera + TIMEOUT_SEGUNDOS,
+        health_check_interval=30,
+    )
@@ -0,0 +1,167 @@
+"""
+Leitura das configurações da tabela ``Configuracao`` sem ir ao banco a cada
+chamada.
+
+Cada processo mantém um instantâneo da tabela inteira em memória. A validade
+dele é controlada por um identificador de versão guardado no cache do Django
+(Redis em produção): salvar ou apagar uma ``Configuracao``, inclusive pelo
+admin, troca a versão (veja ``rodas.signals``). Cada processo confere a versão
+no máximo uma vez por ``INTERVALO_VERIFICACAO`` e recarrega a tabela quando
+ela muda. Assim as leituras custam um acesso a dicionário e as alterações
+chegam a todos os workers do gunicorn em até um segundo.
+
+Alterações feitas com ``QuerySet.update`` ou ``bulk_create`` não disparam
+sinais; nesses casos chame ``invalidar()`` depois.
+
+Exemplo::
+
+    from rodas.configuracoes import configuracoes
+
+    raio = configuracoes.obter("raio_busca_km", 10.0, float)
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CHAVE_VERSAO = "configuracoes:versao"
+INTERVALO_VERIFICACAO = 1.0
+
+_VERDADEIROS = {"1", "true", "sim", "s", "yes", "y", "on"}
+_FALSOS = {"0", "false", "nao", "não", "n", "no", "off", ""}
+
+
+def _booleano(valor: str) -> bool:
+    normalizado = valor.strip().lower()
+    if normalizado in _VERDADEIROS:
+        return True
+    if normalizado in _FALSOS:
+        return False
+    raise ValueError(valor)
+
+
+CONVERSORES = {
+    str: str,
+    int: lambda valor: int(valor.strip()),
+    float: lambda valor: float(valor.strip()),
+    Decimal: lambda valor: Decimal(valor.strip()),
+    bool: _booleano,
+    dict: json.loads,
+    list: json.loads,
+}
+
+_AUSENTE = object()
+_INVALIDO = object()
+
+
+class Configuracoes:
+    """
+    Instantâneo da tabela ``Configuracao`` com conversão de tipos
+    """
+
+    def __init__(self, intervalo_verificacao: float = INTERVALO_VERIFICACAO):
+        self.intervalo_verificacao = intervalo_verificacao
+        self._valores: dict[str, str] = {}
+        self._convertidos: dict[tuple[str, type], object] = {}
+        self._versao = None
+        self._carregado = False
+        self._proxima_verificacao = 0.0
+        self._trava = threading.Lock()
+
+    def obter(self, chave: str, padrao=None, tipo: type = str):
+        """
+        Valor da configuração convertido para ``tipo`` (``str``, ``int``,
+        ``float``, ``Decimal``, ``bool``, ``dict`` ou ``list``, estes dois em
+        JSON). Retorna ``padrao`` se a chave não existir ou o valor for inválido.
+        """
+        self._atualizar_se_preciso()
+        convertido = self._convertidos.get((chave, tipo), _AUSENTE)
+        if convertido is _INVALIDO:
+            return padrao
+        if convertido is not _AUSENTE:
+            return convertido
+
+        valor = self._valores.get(chave)
+        if valor is None:
+            return padrao
+        try:
+            convertido = CONVERSORES[tipo](valor)
+        except (ValueError, TypeError, InvalidOperation):
+            logger.warning(
+                "Configuração %r=%r não é um %s válido", chave, valor, tipo.__name__
+            )
+            self._convertidos[(chave, tipo)] = _INVALIDO
+            return padrao
+        self._convertidos[(chave, tipo)] = convertido
+        return convertido
+
+    def todas(self) -> dict[str, str]:
+        """
+        Cópia de todos os valores, como texto
+        """
+        self._atualizar_se_preciso()
+        return dict(self._valores)
+
+    def _atualizar_se_preciso(self) -> None:
+        agora = time.monotonic()
+        if self._carregado and agora < self._proxima_verificacao:
+            return
+        with self._trava:
+            if self._carregado and agora < self._proxima_verificacao:
+                return
+            # A versão é lida antes da tabela: uma alteração feita durante a
+            # carga muda a versão e força uma nova carga na verificação seguinte
+            versao = self._versao_compartilhada()
+            if not self._carregado or versao is None or versao != self._versao:
+                self._carregar()
+                self._versao = versao
+            self._proxima_verificacao = agora + self.intervalo_verificacao
+
+    def _versao_compartilhada(self) -> str | None:
+        try:
+            versao = cache.get(CHAVE_VERSAO)
+            if versao is None:
+                # Primeira leitura desde que o cache foi limpo
+                cache.add(CHAVE_VERSAO, uuid.uuid4().hex, timeout=None)
+                versao = cache.get(CHAVE_VERSAO)
+            return versao
+        except Exception:
+            # Sem cache, a tabela é relida a cada verificação
+            logger.exception("Falha ao ler a versão das configurações no cache")
+            return None
+
+    def _carregar(self) -> None:
+        from .models import Configuracao
+
+        self._valores = dict(Configuracao.objects.values_list("chave", "valor"))
+        self._convertidos = {}
+        self._carregado = True
+
+    def descartar(self) -> None:
+        """
+        Esquece o instantâneo deste processo; a próxima leitura recarrega
+        """
+        with self._trava:
+            self._carregado = False
+
+
+configuracoes = Configuracoes()
+
+
+def invalidar() -> None:
+    """
+    Troca a versão compartilhada, fazendo todos os processos recarregarem as
+    configurações, e descarta o instantâneo do processo atual.
+
+    A versão é um valor aleatório, e não um contador, para que nunca volte a
+    um número já visto por algum processo se a chave sumir do cache.
+    """
+    cache.set(CHAVE_VERSAO, uuid.uuid4().hex, timeout=None)
+    configuracoes.descartar()
@@ -0,0 +1,21 @@
+"""
+Processadores de contexto do app ``rodas``
+"""
+
+from django.utils.functional import SimpleLazyObject
+
+from .notificacoes import contar_nao_lidas
+
+
+def notificacoes(request):
+    """
+    Expõe ``notificacoes_nao_lidas`` para o selo do menu. O valor vem do
+    contador no Redis e só é lido se o template usá-lo.
+    """
+
+    def contar():
+        if not request.user.is_authenticated:
+            return 0
+        return contar_nao_lidas(request.user.pk)
+
+    return {"notificacoes_nao_lidas": SimpleLazyObject(contar)}
@@ -0,0 +1,244 @@
+"""
+Despacho em lote: atribui corridas pendentes a motoristas online.
+
+O problema é tratado como uma atribuição de custo mínimo. A matriz de custos
+(corridas x motoristas) combina a distância do motorista até a origem, a
+urgência do horário agendado e a compatibilidade com cadeira de rodas; pares
+inviáveis recebem ``CUSTO_INVIAVEL`` e são descartados após a resolução pelo
+algoritmo húngaro.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .distancias import coordenadas_array, matriz_distancias_km
+from . import presenca
+from .models import Corrida, Motorista
+from .tarefas import enfileirar
+from .transicoes import STATUS_OCUPADO, aceitar_corrida
+
+CUSTO_INVIAVEL = 1e9
+
+
+@dataclass(frozen=True)
+class ParametrosDespacho:
+    """
+    Pesos e limites usados na montagem da matriz de custos
+    """
+
+    peso_km: float = 1.0
+    peso_hora: float = 2.0
+    raio_maximo_km: float = 30.0
+    horizonte: timedelta = timedelta(hours=3)
+
+
+@dataclass
+class Atribuicao:
+    corrida_id: int
+    motorista_id: int
+    distancia_km: float
+    custo: float
+
+
+@dataclass
+class ResultadoDespacho:
+    atribuicoes: list[Atribuicao] = field(default_factory=list)
+    corridas_consideradas: int = 0
+    motoristas_considerados: int = 0
+    gravadas: int = 0
+
+
+def montar_custos(
+    origens_corridas: np.ndarray,
+    horas_ate_agendamento: np.ndarray,
+    precisa_cadeira: np.ndarray,
+    posicoes_motoristas: np.ndarray,
+    veiculo_adaptado: np.ndarray,
+    parametros: ParametrosDespacho,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Monta a matriz de custos corridas x motoristas.
+
+    Retorna a matriz de custos e a de distâncias (em km), ambas com uma linha
+    por corrida e uma coluna por motorista.
+    """
+    distancias = matriz_distancias_km(origens_corridas, posicoes_motoristas)
+    custos = (
+        parametros.peso_km * distancias
+        + parametros.peso_hora * np.clip(horas_ate_agendamento, 0, None)[:, None]
+    )
+    inviavel = (distancias > parametros.raio_maximo_km) | (
+        precisa_cadeira[:, None] & ~veiculo_adaptado[None, :]
+    )
+    custos[inviavel] = CUSTO_INVIAVEL
+    return custos, distancias
+
+
+def resolver_atribuicao(custos: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Atribuição de custo mínimo (algoritmo húngaro com potenciais).
+
+    Aceita matrizes retangulares; devolve os índices de linha e de coluna dos
+    pares escolhidos, com ``min(n, m)`` pares. O laço interno de relaxação é
+    vetorizado sobre as colunas, o que deixa o custo em O(n²) operações NumPy.
+    """
+    custos = np.asarray(custos, dtype=np.float64)
+    transposta = custos.shape[0] > custos.shape[1]
+    if transposta:
+        custos = custos.T
+    n, m = custos.shape
+    if n == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    linha_da_coluna = np.zeros(m + 1, dtype=np.intp)
+    caminho = np.zeros(m + 1, dtype=np.intp)
+
+    for i in range(1, n + 1):
+        linha_da_coluna[0] = i
+        j0 = 0
+        minimo = np.full(m + 1, np.inf)
+        usada = np.zeros(m + 1, dtype=bool)
+        while True:
+            usada[j0] = True
+            i0 = linha_da_coluna[j0]
+            reduzido = custos[i0 - 1] - u[i0] - v[1:]
+            livre = ~usada[1:]
+            melhora = livre & (reduzido < minimo[1:])
+            minimo[1:][melhora] = reduzido[melhora]
+            caminho[1:][melhora] = j0
+
+            candidatos = np.where(livre, minimo[1:], np.inf)
+            j1 = int(np.argmin(candidatos)) + 1
+            delta = candidatos[j1 - 1]
+
+            u[linha_da_coluna[usada]] += delta
+            v[usada] -= delta
+            minimo[~usada] -= delta
+            j0 = j1
+            if linha_da_coluna[j0] == 0:
+                break
+
+        while j0:
+            j1 = caminho[j0]
+            linha_da_coluna[j0] = linha_da_coluna[j1]
+            j0 = j1
+
+    colunas = np.nonzero(linha_da_coluna[1:])[0]
+    linhas = linha_da_coluna[1:][colunas] - 1
+    ordem = np.argsort(linhas)
+    linhas, colunas = linhas[ordem], colunas[ordem]
+    if transposta:
+        linhas, colunas = colunas, linhas
+        ordem = np.argsort(linhas)
+        linhas, colunas = linhas[ordem], colunas[ordem]
+    return linhas, colunas
+
+
+def despachar(
+    dry_run: bool = False,
+    parametros: ParametrosDespacho | None = None,
+    agora: datetime | None = None,
+) -> ResultadoDespacho:
+    """
+    Executa uma rodada de despacho.
+
+    Considera corridas pendentes sem motorista, com origem conhecida e agendadas
+    dentro do horizonte, e motoristas aprovados, online, com posição conhecida e
+    sem corrida em curso. Com ``dry_run`` as atribuições são apenas calculadas.
+    """
+    parametros = parametros or ParametrosDespacho()
+    agora = agora or timezone.now()
+
+    corridas = list(
+        Corrida.objects.pendentes()
+        .filter(
+            latitude_origem__isnull=False,
+            longitude_origem__isnull=False,
+            data_hora_agendada__lte=agora + parametros.horizonte,
+        )
+        .order_by("data_hora_agendada")
+        .values_list(
+            "pk",
+            "latitude_origem",
+            "longitude_origem",
+            "data_hora_agendada",
+            "necessita_cadeira_rodas",
+        )
+    )
+    # Presença lida do Redis; o campo Motorista.online pode estar defasado
+    online = presenca.motoristas_online()
+    motoristas = list(
+        Motorista.objects.filter(
+            pk__in=online,
+            status_aprovacao="aprovado",
+            latitude_atual__isnull=False,
+            longitude_atual__isnull=False,
+        )
+        .exclude(corridas__status__in=STATUS_OCUPADO)
+        .values_list(
+            "pk", "latitude_atual", "longitude_atual", "veiculo_adaptado", "usuario_id"
+        )
+    )
+
+    resultado = ResultadoDespacho(
+        corridas_consideradas=len(corridas), motoristas_considerados=len(motoristas)
+    )
+    if not corridas or not motoristas:
+        return resultado
+
+    origens = coordenadas_array([c[1:3] for c in corridas])
+    horas = np.array(
+        [(c[3] - agora).total_seconds() / 3600 for c in corridas], dtype=np.float64
+    )
+    precisa_cadeira = np.array([c[4] for c in corridas], dtype=bool)
+    posicoes = coordenadas_array([m[1:3] for m in motoristas])
+    adaptado = np.array([m[3] for m in motoristas], dtype=bool)
+
+    custos, distancias = montar_custos(
+        origens, horas, precisa_cadeira, posicoes, adaptado, parametros
+    )
+    linhas, colunas = resolver_atribuicao(custos)
+    viaveis = custos[linhas, colunas] < CUSTO_INVIAVEL
+    for linha, coluna in zip(linhas[viaveis], colunas[viaveis]):
+        resultado.atribuicoes.append(
+            Atribuicao(
+                corrida_id=corridas[linha][0],
+                motorista_id=motoristas[coluna][0],
+                distancia_km=round(float(distancias[linha, coluna]), 2),
+                custo=float(custos[linha, coluna]),
+            )
+        )
+
+    if dry_run or not resultado.atribuicoes:
+        return resultado
+
+    usuario_motorista = {m[0]: m[4] for m in motoristas}
+    notificacoes = []
+    with transaction.atomic():
+        for atribuicao in resultado.atribuicoes:
+            if not aceitar_corrida(
+                atribuicao.corrida_id, atribuicao.motorista_id, agora=agora
+            ):
+                continue
+            resultado.gravadas += 1
+            notificacoes.append(
+                {
+                    "usuario_id": usuario_motorista[atribuicao.motorista_id],
+                    "tipo": "nova_corrida",
+                    "titulo": "Nova corrida designada",
+                    "mensagem": (
+                        "Você foi designado para uma corrida a "
+                        f"{atribuicao.distancia_km:.1f} km de distância."
+                    ),
+                    "corrida_id": atribuicao.corrida_id,
+                }
+            )
+        if notificacoes:
+            enfileirar("criar_notificacoes", notificacoes=notificacoes)
+    return resultado
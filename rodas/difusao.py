@@ -0,0 +1,115 @@
+"""
+Aviso de nova corrida aos motoristas elegíveis.
+
+Quando um paciente solicita uma corrida, ``anunciar_corrida`` escolhe os
+motoristas que poderiam atendê-la (online, aprovados, sem corrida em curso,
+com veículo adaptado se o paciente precisa de cadeira de rodas e a até
+``raio_km`` da origem), enfileira as notificações ``nova_corrida`` como uma
+única tarefa, gravada pelo worker com um ``bulk_create``, e publica o aviso no
+canal em tempo real de cada um.
+
+O custo na requisição não depende de quantos motoristas são avisados: uma
+consulta para os candidatos, uma leitura das posições no Redis, um cálculo
+vetorizado de distâncias e, depois do commit, um ``RPUSH`` e um pipeline de
+``PUBLISH``.
+"""
+
+import logging
+
+import numpy as np
+import redis
+
+from . import presenca, trajetos
+from .distancias import coordenadas_array, matriz_distancias_km
+from .eventos import canal_usuario, publicar
+from .models import Corrida, Motorista
+from .tarefas import enfileirar
+from .transicoes import STATUS_OCUPADO
+
+logger = logging.getLogger(__name__)
+
+
+def motoristas_elegiveis(
+    corrida: Corrida, raio_km: float
+) -> list[tuple[int, int, float]]:
+    """
+    Motoristas que podem atender a corrida, como ``(motorista_id,
+    usuario_id, distancia_km)``, do mais próximo ao mais distante
+    """
+    if corrida.latitude_origem is None or corrida.longitude_origem is None:
+        return []
+
+    motoristas = Motorista.objects.filter(
+        pk__in=presenca.motoristas_online(), status_aprovacao="aprovado"
+    ).exclude(corridas__status__in=STATUS_OCUPADO)
+    if corrida.necessita_cadeira_rodas:
+        motoristas = motoristas.filter(veiculo_adaptado=True)
+    linhas = list(
+        motoristas.values_list("pk", "usuario_id", "latitude_atual", "longitude_atual")
+    )
+    if not linhas:
+        return []
+
+    # A posição recebida pelo Redis é mais recente que a gravada no banco
+    try:
+        recentes = trajetos.posicoes_atuais([pk for pk, *_ in linhas])
+    except redis.RedisError:
+        logger.exception("Falha ao ler as posições dos motoristas no Redis")
+        recentes = {}
+    posicoes = coordenadas_array(
+        [
+            recentes[pk][:2] if pk in recentes else (latitude, longitude)
+            for pk, _, latitude, longitude in linhas
+        ]
+    )
+
+    distancias = matriz_distancias_km(
+        coordenadas_array([(corrida.latitude_origem, corrida.longitude_origem)]),
+        posicoes,
+        usar_cache=False,
+    )[0]
+    # Motoristas sem posição conhecida ficam com distância nan e de fora
+    proximos = np.flatnonzero(distancias <= raio_km)
+    proximos = proximos[np.argsort(distancias[proximos], kind="stable")]
+    return [
+        (linhas[i][0], linhas[i][1], round(float(distancias[i]), 2)) for i in proximos
+    ]
+
+
+def anunciar_corrida(corrida: Corrida, raio_km: float) -> int:
+    """
+    Avisa os motoristas elegíveis sobre a nova corrida; retorna quantos
+    """
+    elegiveis = motoristas_elegiveis(corrida, raio_km)
+    if not elegiveis:
+        return 0
+
+    enfileirar(
+        "criar_notificacoes",
+        notificacoes=[
+            {
+                "usuario_id": usuario_id,
+                "tipo": "nova_corrida",
+                "titulo": "Nova corrida disponível",
+                "mensagem": (
+                    f"Há uma nova corrida a {distancia:.1f} km de você, "
+                    f"em {corrida.endereco_origem}."
+                ),
+                "corrida_id": corrida.pk,
+            }
+            for _, usuario_id, distancia in elegiveis
+        ],
+    )
+    publicar(
+        (
+            canal_usuario(usuario_id),
+            {
+                "tipo": "nova_corrida",
+                "corrida": corrida.pk,
+                "distancia_km": distancia,
+                "necessita_cadeira_rodas": corrida.necessita_cadeira_rodas,
+            },
+        )
+        for _, usuario_id, distancia in elegiveis
+    )
+    return len(elegiveis)
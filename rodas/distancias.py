@@ -0,0 +1,212 @@
+"""
+Matrizes de distância e de tempo estimado (ETA) entre conjuntos de pontos.
+
+Despacho, ordenação de corridas próximas e previsões de chegada precisam de
+distâncias entre todos os pares de um conjunto de posições (motoristas) e
+outro (origens ou destinos de corridas). Aqui elas são calculadas de uma vez
+sobre arrays NumPy ``(n, 2)`` de latitude/longitude em graus, sem laços em
+Python por linha.
+
+A distância base é a haversine (linha reta). Para aproximar o trajeto pelas
+ruas ela pode ser multiplicada por um fator viário, e o ETA divide essa
+distância por uma velocidade média urbana.
+
+Resultados recentes ficam num cache pequeno, limitado em bytes e indexado
+pelo conteúdo dos arrays: rodadas seguidas de despacho com as mesmas posições
+não recalculam a matriz. Os arrays devolvidos pelo cache são somente leitura.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .geo import RAIO_TERRA_KM
+
+# Razão típica entre o trajeto pelas ruas e a linha reta em áreas urbanas
+FATOR_VIARIO = 1.3
+VELOCIDADE_MEDIA_KMH = 25.0
+
+
+def coordenadas_array(linhas) -> np.ndarray:
+    """
+    Converte uma sequência de pares ``(latitude, longitude)``, inclusive os
+    ``Decimal`` lidos do banco, num array ``(n, 2)`` de float64.
+
+    Coordenadas ausentes (``None``) viram ``nan`` e propagam ``nan`` nas
+    distâncias.
+    """
+    return np.array(linhas, dtype=np.float64).reshape(-1, 2)
+
+
+def coordenadas_de(queryset, campo_latitude: str, campo_longitude: str):
+    """
+    Lê ids e coordenadas de um queryset numa única consulta.
+
+    Retorna o array de ids e o array ``(n, 2)`` de coordenadas.
+    """
+    linhas = np.array(
+        queryset.values_list("pk", campo_latitude, campo_longitude),
+        dtype=np.float64,
+    ).reshape(-1, 3)
+    return linhas[:, 0].astype(np.int64), linhas[:, 1:]
+
+
+def _haversine(origens: np.ndarray, destinos: np.ndarray) -> np.ndarray:
+    """
+    Distâncias haversine (km) entre cada origem (linhas) e cada destino
+    (colunas), reaproveitando dois buffers ``(n, m)`` com operações in-place
+    """
+    lat_o = np.radians(origens[:, 0])[:, None]
+    lat_d = np.radians(destinos[:, 0])[None, :]
+    lng_o = np.radians(origens[:, 1])[:, None]
+    lng_d = np.radians(destinos[:, 1])[None, :]
+
+    h = np.subtract(lat_d, lat_o)
+    h *= 0.5
+    np.sin(h, out=h)
+    np.square(h, out=h)
+
+    termo = np.subtract(lng_d, lng_o)
+    termo *= 0.5
+    np.sin(termo, out=termo)
+    np.square(termo, out=termo)
+    termo *= np.cos(lat_o)
+    termo *= np.cos(lat_d)
+
+    h += termo
+    np.minimum(h, 1.0, out=h)
+    np.sqrt(h, out=h)
+    np.arcsin(h, out=h)
+    h *= 2 * RAIO_TERRA_KM
+    return h
+
+
+class CacheMatrizes:
+    """
+    LRU de matrizes calculadas, limitado pelo total de bytes armazenados
+    """
+
+    def __init__(self, maximo_bytes: int = 64 * 1024 * 1024):
+        self.maximo_bytes = maximo_bytes
+        self._itens: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def chave(*partes) -> str:
+        resumo = hashlib.sha1()
+        for parte in partes:
+            if isinstance(parte, np.ndarray):
+                resumo.update(str(parte.shape).encode())
+                resumo.update(np.ascontiguousarray(parte).tobytes())
+            else:
+                resumo.update(repr(parte).encode())
+        return resumo.hexdigest()
+
+    def obter(self, chave: str) -> np.ndarray | None:
+        with self._trava:
+            matriz = self._itens.get(chave)
+            if matriz is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return matriz
+
+    def guardar(self, chave: str, matriz: np.ndarray) -> np.ndarray:
+        matriz.setflags(write=False)
+        if matriz.nbytes > self.maximo_bytes:
+            return matriz
+        with self._trava:
+            anterior = self._itens.pop(chave, None)
+            if anterior is not None:
+                self._bytes -= anterior.nbytes
+            self._itens[chave] = matriz
+            self._bytes += matriz.nbytes
+            while self._bytes > self.maximo_bytes:
+                _, removida = self._itens.popitem(last=False)
+                self._bytes -= removida.nbytes
+        return matriz
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
+            self.acertos = self.falhas = 0
+
+
+cache_matrizes = CacheMatrizes()
+
+
+def matriz_distancias_km(
+    origens: np.ndarray,
+    destinos: np.ndarray,
+    fator_viario: float = 1.0,
+    usar_cache: bool = True,
+) -> np.ndarray:
+    """
+    Distâncias entre cada origem (linhas) e cada destino (colunas), em km.
+
+    Ambos os argumentos são arrays ``(n, 2)`` de latitude/longitude em graus.
+    Com ``fator_viario`` maior que 1 a distância haversine é corrigida para
+    aproximar o trajeto pelas ruas.
+    """
+    origens = np.asarray(origens, dtype=np.float64).reshape(-1, 2)
+    destinos = np.asarray(destinos, dtype=np.float64).reshape(-1, 2)
+    if not usar_cache:
+        return _com_fator(_haversine(origens, destinos), fator_viario)
+
+    chave = CacheMatrizes.chave("km", origens, destinos, fator_viario)
+    matriz = cache_matrizes.obter(chave)
+    if matriz is None:
+        matriz = cache_matrizes.guardar(
+            chave, _com_fator(_haversine(origens, destinos), fator_viario)
+        )
+    return matriz
+
+
+def matriz_eta_minutos(
+    origens: np.ndarray,
+    destinos: np.ndarray,
+    fator_viario: float = FATOR_VIARIO,
+    velocidade_kmh: float = VELOCIDADE_MEDIA_KMH,
+    usar_cache: bool = True,
+) -> np.ndarray:
+    """
+    Tempo estimado de deslocamento (minutos) de cada origem a cada destino,
+    pela distância viária aproximada a uma velocidade média constante
+    """
+    distancias = matriz_distancias_km(
+        origens, destinos, fator_viario=fator_viario, usar_cache=usar_cache
+    )
+    return distancias * (60.0 / velocidade_kmh)
+
+
+def distancias_pareadas_km(
+    origens: np.ndarray, destinos: np.ndarray, fator_viario: float = 1.0
+) -> np.ndarray:
+    """
+    Distância de cada origem ao destino da mesma posição (``n`` pares, não
+    ``n x n``), por exemplo da origem ao destino de cada corrida
+    """
+    origens = np.radians(np.asarray(origens, dtype=np.float64).reshape(-1, 2))
+    destinos = np.radians(np.asarray(destinos, dtype=np.float64).reshape(-1, 2))
+    d_lat = destinos[:, 0] - origens[:, 0]
+    d_lng = destinos[:, 1] - origens[:, 1]
+    h = (
+        np.sin(d_lat / 2) ** 2
+        + np.cos(origens[:, 0]) * np.cos(destinos[:, 0]) * np.sin(d_lng / 2) ** 2
+    )
+    return _com_fator(
+        2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.minimum(h, 1.0))), fator_viario
+    )
+
+
+def _com_fator(distancias: np.ndarray, fator_viario: float) -> np.ndarray:
+    if fator_viario != 1.0:
+        distancias *= fator_viario
+    return distancias
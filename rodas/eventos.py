@@ -0,0 +1,192 @@
+"""
+Eventos em tempo real das corridas, entregues ao navegador por Server-Sent
+Events (SSE).
+
+Publicação: ``publicar`` agenda, para depois do commit, um ``PUBLISH`` no Redis
+para cada canal (um por corrida e um por usuário). Como o pub/sub do Redis
+entrega a mensagem a todos os assinantes, o evento chega a qualquer worker
+que tenha clientes conectados, seja qual for o processo que fez a alteração
+(views, despacho, admin).
+
+Consumo: cada processo ASGI mantém uma única conexão de pub/sub
+(``Distribuidor``) e repassa as mensagens às filas dos clientes conectados
+nele. ``fluxo_sse`` é o gerador assíncrono entregue ao
+``StreamingHttpResponse``: enquanto o cliente espera, não há consultas ao
+banco nem threads ocupadas. Clientes lentos demais perdem eventos em vez de
+acumular memória; como o navegador reconecta sozinho e a primeira mensagem de
+cada fluxo traz o estado atual, nada fica inconsistente por muito tempo.
+``assinatura`` expõe a mesma fila para quem só precisa esperar o próximo
+evento, como o long-poll da API de corridas.
+
+O fluxo infinito só funciona servido por ASGI (``core.asgi`` com uvicorn); sob
+WSGI o Django tentaria consumir o gerador inteiro antes de responder.
+"""
+
+import asyncio
+import json
+import logging
+import weakref
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+
+import redis
+import redis.asyncio
+from django.conf import settings
+from django.db import transaction
+
+from .conexao_redis import TIMEOUT_SEGUNDOS, obter_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = "eventos"
+# Comentário enviado quando não há eventos, para manter a conexão aberta em
+# proxies que encerram conexões ociosas
+INTERVALO_MANTER_VIVO = 15
+# Tempo, em milissegundos, que o navegador espera antes de reconectar
+ESPERA_RECONEXAO_MS = 3000
+TAMANHO_FILA_CLIENTE = 100
+
+
+def canal_corrida(corrida_id: int) -> str:
+    return f"{PREFIXO}:corrida:{corrida_id}"
+
+
+def canal_usuario(usuario_id: int) -> str:
+    return f"{PREFIXO}:usuario:{usuario_id}"
+
+
+def publicar(mensagens: Iterable[tuple[str, dict]]) -> None:
+    """
+    Publica cada ``(canal, dados)`` depois que a transação atual for
+    confirmada. Falhas do Redis são registradas e não afetam quem publicou.
+    """
+    mensagens = [(canal, json.dumps(dados)) for canal, dados in mensagens]
+    if not mensagens:
+        return
+
+    def enviar():
+        try:
+            with obter_redis().pipeline(transaction=False) as pipe:
+                for canal, dados in mensagens:
+                    pipe.publish(canal, dados)
+                pipe.execute()
+        except redis.RedisError:
+            logger.exception("Falha ao publicar eventos no Redis")
+
+    transaction.on_commit(enviar)
+
+
+def formatar_sse(dados: str) -> str:
+    return f"data: {dados}\n\n"
+
+
+class Distribuidor:
+    """
+    Conexão de pub/sub compartilhada pelos clientes SSE de um event loop
+    """
+
+    def __init__(self):
+        self._redis = redis.asyncio.Redis.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=TIMEOUT_SEGUNDOS,
+        )
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        self._filas: defaultdict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._trava = asyncio.Lock()
+        self._leitura: asyncio.Task | None = None
+
+    async def assinar(self, canais: list[str]) -> asyncio.Queue:
+        fila = asyncio.Queue(maxsize=TAMANHO_FILA_CLIENTE)
+        async with self._trava:
+            novos = [canal for canal in canais if not self._filas[canal]]
+            if novos:
+                await self._pubsub.subscribe(*novos)
+            for canal in canais:
+                self._filas[canal].add(fila)
+            if self._leitura is None or self._leitura.done():
+                self._leitura = asyncio.create_task(self._ler())
+        return fila
+
+    async def cancelar(self, canais: list[str], fila: asyncio.Queue) -> None:
+        async with self._trava:
+            vazios = []
+            for canal in canais:
+                self._filas[canal].discard(fila)
+                if not self._filas[canal]:
+                    del self._filas[canal]
+                    vazios.append(canal)
+            if vazios:
+                try:
+                    await self._pubsub.unsubscribe(*vazios)
+                except redis.RedisError:
+                    logger.exception("Falha ao cancelar assinatura no Redis")
+
+    async def _ler(self) -> None:
+        while True:
+            try:
+                mensagem = await self._pubsub.get_message(timeout=1.0)
+            except redis.RedisError:
+                # O cliente reconecta e refaz as assinaturas na próxima leitura
+                logger.exception("Falha ao ler eventos do Redis")
+                await asyncio.sleep(1)
+                continue
+            if mensagem is None:
+                continue
+            for fila in list(self._filas.get(mensagem["channel"], ())):
+                try:
+                    fila.put_nowait(mensagem["data"])
+                except asyncio.QueueFull:
+                    pass
+
+
+_distribuidores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def obter_distribuidor() -> Distribuidor:
+    """
+    Distribuidor do event loop atual (um por processo sob uvicorn)
+    """
+    loop = asyncio.get_running_loop()
+    distribuidor = _distribuidores.get(loop)
+    if distribuidor is None:
+        distribuidor = _distribuidores[loop] = Distribuidor()
+    return distribuidor
+
+
+@asynccontextmanager
+async def assinatura(canais: list[str]) -> AsyncIterator[asyncio.Queue | None]:
+    """
+    Fila que recebe, enquanto o bloco durar, as mensagens publicadas em
+    ``canais``. Sem canais, não assina nada e entrega ``None``.
+    """
+    if not canais:
+        yield None
+        return
+    distribuidor = obter_distribuidor()
+    fila = await distribuidor.assinar(canais)
+    try:
+        yield fila
+    finally:
+        await distribuidor.cancelar(canais, fila)
+
+
+async def fluxo_sse(
+    canais: list[str], inicial: dict | None = None
+) -> AsyncIterator[str]:
+    """
+    Gerador de um fluxo SSE com os eventos publicados em ``canais``,
+    precedidos de ``inicial`` (o estado atual), se houver
+    """
+    async with assinatura(canais) as fila:
+        yield f"retry: {ESPERA_RECONEXAO_MS}\n\n"
+        if inicial is not None:
+            yield formatar_sse(json.dumps(inicial))
+        while True:
+            try:
+                dados = await asyncio.wait_for(fila.get(), INTERVALO_MANTER_VIVO)
+            except TimeoutError:
+                yield ": manter-vivo\n\n"
+                continue
+            yield formatar_sse(dados)
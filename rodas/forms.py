@@ -1,7 +1,10 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.contrib.auth.forms import PasswordResetForm
 from django.contrib.auth.password_validation import validate_password
+from django.template import loader
 from .models import Usuario
+from .tarefas import enfileirar
 
 
 class PacienteRegisterForm(forms.Form):
@@ -69,6 +72,9 @@ class MotoristaRegisterForm(forms.Form):
     placa_veiculo = forms.CharField(
         max_length=8, label="Placa do Veículo", required=False
     )
+    veiculo_adaptado = forms.BooleanField(
+        required=False, label="Veículo Adaptado para Cadeira de Rodas"
+    )
 
     cnh_numero = forms.CharField(max_length=20, label="Número da CNH", required=False)
     cnh_validade = forms.DateField(
@@ -119,3 +125,34 @@ class SolicitaCorridaform(forms.Form):
     observacoes = forms.CharField(
         widget=forms.Textarea, required=False, label="Observações", max_length=500
     )
+
+
+class RedefinicaoSenhaForm(PasswordResetForm):
+    """
+    Formulário de redefinição de senha que enfileira o e-mail em vez de
+    enviá-lo durante a requisição
+    """
+
+    def send_mail(
+        self,
+        subject_template_name,
+        email_template_name,
+        context,
+        from_email,
+        to_email,
+        html_email_template_name=None,
+    ):
+        assunto = "".join(
+            loader.render_to_string(subject_template_name, context).splitlines()
+        )
+        corpo_html = None
+        if html_email_template_name is not None:
+            corpo_html = loader.render_to_string(html_email_template_name, context)
+        enfileirar(
+            "enviar_email",
+            assunto=assunto,
+            corpo=loader.render_to_string(email_template_name, context),
+            remetente=from_email,
+            destinatarios=[to_email],
+            corpo_html=corpo_html,
+        )
@@ -0,0 +1,111 @@
+"""
+Utilitários geográficos: geohash e distância entre coordenadas.
+
+O geohash divide o globo em células retangulares identificadas por uma
+string base32; pontos próximos compartilham o mesmo prefixo, o que permite
+buscar vizinhos com um ``LIKE 'prefixo%'`` sobre uma coluna indexada.
+"""
+
+import math
+from decimal import Decimal
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISAO_PADRAO = 9
+RAIO_TERRA_KM = 6371.0088
+KM_POR_GRAU = 111.32
+
+Numero = float | Decimal
+
+
+def codificar_geohash(
+    latitude: Numero, longitude: Numero, precisao: int = PRECISAO_PADRAO
+) -> str:
+    """
+    Codifica uma coordenada em geohash com a precisão informada
+    """
+    lat_min, lat_max = -90.0, 90.0
+    lng_min, lng_max = -180.0, 180.0
+    latitude, longitude = float(latitude), float(longitude)
+
+    geohash = []
+    bit, caractere, par = 0, 0, True
+    while len(geohash) < precisao:
+        if par:
+            meio = (lng_min + lng_max) / 2
+            if longitude >= meio:
+                caractere = (caractere << 1) | 1
+                lng_min = meio
+            else:
+                caractere <<= 1
+                lng_max = meio
+        else:
+            meio = (lat_min + lat_max) / 2
+            if latitude >= meio:
+                caractere = (caractere << 1) | 1
+                lat_min = meio
+            else:
+                caractere <<= 1
+                lat_max = meio
+        par = not par
+        bit += 1
+        if bit == 5:
+            geohash.append(BASE32[caractere])
+            bit, caractere = 0, 0
+    return "".join(geohash)
+
+
+def dimensoes_celula(precisao: int) -> tuple[float, float]:
+    """
+    Retorna a altura e a largura (em graus) de uma célula de geohash
+    """
+    bits = 5 * precisao
+    bits_lng = (bits + 1) // 2
+    bits_lat = bits // 2
+    return 180.0 / (1 << bits_lat), 360.0 / (1 << bits_lng)
+
+
+def precisao_para_raio(latitude: Numero, raio_km: float) -> int:
+    """
+    Escolhe a maior precisão cujas células cobrem o raio informado.
+
+    Com células pelo menos tão grandes quanto o raio, a célula do ponto mais
+    as oito vizinhas sempre contêm o círculo de busca inteiro.
+    """
+    cos_lat = max(math.cos(math.radians(float(latitude))), 0.01)
+    for precisao in range(PRECISAO_PADRAO, 0, -1):
+        altura, largura = dimensoes_celula(precisao)
+        if min(altura * KM_POR_GRAU, largura * KM_POR_GRAU * cos_lat) >= raio_km:
+            return precisao
+    return 1
+
+
+def celulas_vizinhas(latitude: Numero, longitude: Numero, precisao: int) -> list[str]:
+    """
+    Retorna a célula do ponto e as oito células ao redor (sem repetições)
+    """
+    latitude, longitude = float(latitude), float(longitude)
+    altura, largura = dimensoes_celula(precisao)
+    celulas = []
+    for d_lat in (-altura, 0.0, altura):
+        lat = min(max(latitude + d_lat, -90.0), 90.0)
+        for d_lng in (-largura, 0.0, largura):
+            lng = (longitude + d_lng + 180.0) % 360.0 - 180.0
+            celula = codificar_geohash(lat, lng, precisao)
+            if celula not in celulas:
+                celulas.append(celula)
+    return celulas
+
+
+def distancia_km(
+    latitude_a: Numero, longitude_a: Numero, latitude_b: Numero, longitude_b: Numero
+) -> float:
+    """
+    Distância em linha reta (haversine) entre dois pontos, em quilômetros
+    """
+    lat_a, lng_a = math.radians(float(latitude_a)), math.radians(float(longitude_a))
+    lat_b, lng_b = math.radians(float(latitude_b)), math.radians(float(longitude_b))
+    h = (
+        math.sin((lat_b - lat_a) / 2) ** 2
+        + math.cos(lat_a) * math.cos(lat_b) * math.sin((lng_b - lng_a) / 2) ** 2
+    )
+    return 2 * RAIO_TERRA_KM * math.asin(math.sqrt(min(h, 1.0)))
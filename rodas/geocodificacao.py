@@ -0,0 +1,295 @@
+"""
+Geocodificação de endereços no servidor.
+
+Os endereços são normalizados (minúsculas, sem acentos, abreviações comuns
+expandidas) e procurados em camadas, da mais barata para a mais cara:
+
+1. LRU em memória do processo;
+2. cache do Django (Redis em produção), compartilhado entre processos;
+3. tabela ``EnderecoGeocodificado``, que sobrevive a reinícios do cache;
+4. o provedor configurado (Google ou um arquivo JSON local).
+
+Um acerto numa camada preenche as anteriores. Destinos repetidos, como os
+mesmos hospitais, deixam de gerar chamadas de rede depois da primeira vez.
+Endereços não encontrados ficam no cache por pouco tempo, para não repetir a
+consulta ao provedor a cada requisição, mas não vão para o banco.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+import unicodedata
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+PREFIXO_CACHE = "geocodificacao"
+NAO_ENCONTRADO = "-"
+
+_ABREVIACOES = {
+    "av": "avenida",
+    "r": "rua",
+    "al": "alameda",
+    "pc": "praca",
+    "pca": "praca",
+    "est": "estrada",
+    "rod": "rodovia",
+    "trav": "travessa",
+    "hosp": "hospital",
+    "dr": "doutor",
+    "dra": "doutora",
+    "prof": "professor",
+    "n": "",
+    "no": "",
+}
+_SEPARADORES = re.compile(r"[^\w]+")
+
+
+def normalizar_endereco(endereco: str) -> str:
+    """
+    Forma canônica do endereço, usada como chave de cache
+    """
+    texto = unicodedata.normalize("NFKD", endereco.casefold())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    palavras = (_ABREVIACOES.get(p, p) for p in _SEPARADORES.split(texto))
+    return " ".join(p for p in palavras if p)
+
+
+def chave_endereco(normalizado: str) -> str:
+    return hashlib.sha1(normalizado.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class Coordenadas:
+    latitude: Decimal
+    longitude: Decimal
+    endereco_formatado: str = ""
+
+    @classmethod
+    def de_numeros(cls, latitude, longitude, endereco_formatado: str = ""):
+        """
+        Cria coordenadas com a mesma precisão das colunas do banco
+        """
+        return cls(
+            Decimal(str(latitude)).quantize(Decimal("1e-8")),
+            Decimal(str(longitude)).quantize(Decimal("1e-8")),
+            endereco_formatado,
+        )
+
+
+class ProvedorGeocodificacao:
+    """
+    Interface dos provedores: recebe o endereço original e o normalizado e
+    retorna as coordenadas, ou ``None`` se o endereço não for encontrado
+    """
+
+    nome = ""
+
+    def geocodificar(self, endereco: str, normalizado: str) -> Coordenadas | None:
+        raise NotImplementedError
+
+
+class ProvedorArquivo(ProvedorGeocodificacao):
+    """
+    Provedor local para desenvolvimento e testes: um JSON que mapeia
+    endereços para ``[latitude, longitude]``. As chaves são normalizadas na
+    leitura, então podem ser escritas como o usuário as digitaria.
+    """
+
+    nome = "arquivo"
+
+    def __init__(self, caminho: str | Path | None = None):
+        self.enderecos = {}
+        if caminho and Path(caminho).exists():
+            dados = json.loads(Path(caminho).read_text(encoding="utf-8"))
+            self.enderecos = {
+                normalizar_endereco(endereco): coordenadas
+                for endereco, coordenadas in dados.items()
+            }
+
+    def geocodificar(self, endereco: str, normalizado: str) -> Coordenadas | None:
+        coordenadas = self.enderecos.get(normalizado)
+        if coordenadas is None:
+            return None
+        return Coordenadas.de_numeros(*coordenadas[:2], endereco)
+
+
+class ProvedorGoogle(ProvedorGeocodificacao):
+    """
+    Geocoding API do Google Maps, restrita ao Brasil
+    """
+
+    nome = "google"
+    URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+    def __init__(self, chave_api: str | None = None, timeout: float = 3.0):
+        self.chave_api = chave_api or settings.GOOGLE_MAPS_API_KEY
+        self.timeout = timeout
+
+    def geocodificar(self, endereco: str, normalizado: str) -> Coordenadas | None:
+        parametros = urllib.parse.urlencode(
+            {
+                "address": endereco,
+                "region": "br",
+                "components": "country:BR",
+                "language": "pt-BR",
+                "key": self.chave_api,
+            }
+        )
+        try:
+            with urllib.request.urlopen(
+                f"{self.URL}?{parametros}", timeout=self.timeout
+            ) as resposta:
+                dados = json.load(resposta)
+        except (OSError, ValueError) as erro:
+            logger.warning("Falha ao geocodificar %r: %s", endereco, erro)
+            return None
+
+        if dados.get("status") != "OK" or not dados.get("results"):
+            if dados.get("status") not in ("OK", "ZERO_RESULTS"):
+                logger.warning(
+                    "Geocoding API respondeu %s para %r", dados.get("status"), endereco
+                )
+            return None
+        resultado = dados["results"][0]
+        local = resultado["geometry"]["location"]
+        return Coordenadas.de_numeros(
+            local["lat"], local["lng"], resultado.get("formatted_address", "")
+        )
+
+
+class Geocodificador:
+    """
+    Resolve endereços passando pelas camadas de cache antes do provedor
+    """
+
+    def __init__(
+        self,
+        provedor: ProvedorGeocodificacao,
+        tamanho_lru: int = 1024,
+        timeout_cache: int = 30 * 24 * 3600,
+        timeout_nao_encontrado: int = 3600,
+    ):
+        self.provedor = provedor
+        self.tamanho_lru = tamanho_lru
+        self.timeout_cache = timeout_cache
+        self.timeout_nao_encontrado = timeout_nao_encontrado
+        self._lru: OrderedDict[str, Coordenadas] = OrderedDict()
+        self._trava = threading.Lock()
+
+    def geocodificar(self, endereco: str) -> Coordenadas | None:
+        normalizado = normalizar_endereco(endereco)
+        if not normalizado:
+            return None
+        chave = chave_endereco(normalizado)
+
+        coordenadas = self._lru_obter(chave)
+        if coordenadas is not None:
+            return coordenadas
+
+        chave_cache = f"{PREFIXO_CACHE}:{chave}"
+        em_cache = cache.get(chave_cache)
+        if em_cache == NAO_ENCONTRADO:
+            return None
+        if em_cache is not None:
+            coordenadas = Coordenadas(*em_cache)
+            self._lru_guardar(chave, coordenadas)
+            return coordenadas
+
+        coordenadas = self._do_banco(chave)
+        if coordenadas is None:
+            coordenadas = self.provedor.geocodificar(endereco, normalizado)
+            if coordenadas is None:
+                cache.set(chave_cache, NAO_ENCONTRADO, self.timeout_nao_encontrado)
+                return None
+            self._gravar_no_banco(chave, normalizado, coordenadas)
+
+        cache.set(
+            chave_cache,
+            (
+                coordenadas.latitude,
+                coordenadas.longitude,
+                coordenadas.endereco_formatado,
+            ),
+            self.timeout_cache,
+        )
+        self._lru_guardar(chave, coordenadas)
+        return coordenadas
+
+    def _lru_obter(self, chave: str) -> Coordenadas | None:
+        with self._trava:
+            coordenadas = self._lru.get(chave)
+            if coordenadas is not None:
+                self._lru.move_to_end(chave)
+            return coordenadas
+
+    def _lru_guardar(self, chave: str, coordenadas: Coordenadas) -> None:
+        with self._trava:
+            self._lru[chave] = coordenadas
+            self._lru.move_to_end(chave)
+            while len(self._lru) > self.tamanho_lru:
+                self._lru.popitem(last=False)
+
+    def _do_banco(self, chave: str) -> Coordenadas | None:
+        from .models import EnderecoGeocodificado
+
+        linha = (
+            EnderecoGeocodificado.objects.filter(chave=chave)
+            .values_list("latitude", "longitude", "endereco_formatado")
+            .first()
+        )
+        return Coordenadas(*linha) if linha else None
+
+    def _gravar_no_banco(
+        self, chave: str, normalizado: str, coordenadas: Coordenadas
+    ) -> None:
+        from .models import EnderecoGeocodificado
+
+        # ignore_conflicts: outra requisição pode ter gravado o mesmo endereço
+        EnderecoGeocodificado.objects.bulk_create(
+            [
+                EnderecoGeocodificado(
+                    chave=chave,
+                    endereco_normalizado=normalizado,
+                    endereco_formatado=coordenadas.endereco_formatado,
+                    latitude=coordenadas.latitude,
+                    longitude=coordenadas.longitude,
+                    provedor=self.provedor.nome,
+                )
+            ],
+            ignore_conflicts=True,
+        )
+
+    def limpar_lru(self) -> None:
+        with self._trava:
+            self._lru.clear()
+
+
+@lru_cache(maxsize=1)
+def obter_geocodificador() -> Geocodificador:
+    """
+    Geocodificador do processo, montado a partir das configurações
+    """
+    provedor = import_string(settings.GEOCODIFICACAO_PROVEDOR)(
+        **settings.GEOCODIFICACAO_OPCOES
+    )
+    return Geocodificador(provedor, tamanho_lru=settings.GEOCODIFICACAO_TAMANHO_LRU)
+
+
+def geocodificar(endereco: str) -> Coordenadas | None:
+    """
+    Atalho para ``obter_geocodificador().geocodificar(endereco)``
+    """
+    return obter_geocodificador().geocodificar(endereco)
@@ -0,0 +1,92 @@
+"""
+Instrumentação de consultas SQL por requisição.
+
+``RegistroConsultas`` é instalado com ``connection.execute_wrapper`` e anota
+quantidade, tempo e o "formato" de cada consulta (o SQL com literais e listas
+de parâmetros normalizados). Formatos repetidos muitas vezes na mesma
+requisição são o sintoma clássico de N+1.
+
+Views declaram o número máximo de consultas esperado com o decorador
+``orcamento_consultas``; o middleware e os auxiliares de teste em
+``rodas.testing`` comparam o registrado com esse orçamento.
+"""
+
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+# Formato repetido a partir deste número de vezes é tratado como N+1
+LIMITE_REPETICOES_PADRAO = 5
+
+_LITERAL_TEXTO = re.compile(r"'(?:[^']|'')*'")
+_LITERAL_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LISTA_PARAMETROS = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_ESPACOS = re.compile(r"\s+")
+
+
+def formato_sql(sql: str) -> str:
+    """
+    Normaliza o SQL para que consultas iguais com valores diferentes coincidam
+    """
+    sql = _LITERAL_TEXTO.sub("?", sql)
+    sql = _LITERAL_NUMERO.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _LISTA_PARAMETROS.sub("(...)", sql)
+    return _ESPACOS.sub(" ", sql).strip()
+
+
+@dataclass
+class RegistroConsultas:
+    """
+    Coletor de consultas para ``connection.execute_wrapper``
+    """
+
+    consultas: list[tuple[str, float]] = field(default_factory=list)
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((sql, time.perf_counter() - inicio))
+
+    @property
+    def total(self) -> int:
+        return len(self.consultas)
+
+    @property
+    def tempo_ms(self) -> float:
+        return sum(duracao for _, duracao in self.consultas) * 1000
+
+    def repetidas(
+        self, limite: int = LIMITE_REPETICOES_PADRAO
+    ) -> list[tuple[str, int]]:
+        """
+        Formatos de SQL executados ``limite`` vezes ou mais, do mais frequente
+        para o menos frequente
+        """
+        contagem = Counter(formato_sql(sql) for sql, _ in self.consultas)
+        return [(sql, n) for sql, n in contagem.most_common() if n >= limite]
+
+
+def orcamento_consultas(maximo: int):
+    """
+    Declara quantas consultas a view pode executar por requisição.
+
+    O valor fica no atributo ``orcamento_consultas`` da função e é preservado
+    por decoradores que usam ``functools.wraps`` (como ``login_required``).
+    """
+
+    def decorador(view):
+        view.orcamento_consultas = maximo
+        return view
+
+    return decorador
+
+
+def orcamento_da_view(view) -> int | None:
+    """
+    Retorna o orçamento declarado para a view, se houver
+    """
+    return getattr(view, "orcamento_consultas", None)
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rodas.resumos import atualizar_resumos
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza os resumos diários das corridas usados pelo painel de análise "
+        "do admin, recalculando apenas os dias alterados desde a última execução."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--completo",
+            action="store_true",
+            help="Recalcula todos os dias, em vez de só os alterados.",
+        )
+        parser.add_argument(
+            "--dias-por-lote",
+            type=int,
+            default=31,
+            help="Dias recalculados por transação.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=0,
+            help="Repete a atualização a cada N segundos (0 executa uma única vez).",
+        )
+
+    def handle(self, *args, **options):
+        completo = options["completo"]
+        while True:
+            inicio = time.perf_counter()
+            resultado = atualizar_resumos(
+                completo=completo, dias_por_lote=options["dias_por_lote"]
+            )
+            duracao = (time.perf_counter() - inicio) * 1000
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{resultado.dias} dias recalculados ({resultado.linhas} "
+                    f"resumos) em {duracao:.1f} ms"
+                )
+            )
+            if options["intervalo"] <= 0:
+                break
+            # Só a primeira rodada é completa; as seguintes partem da marca
+            completo = False
+            time.sleep(options["intervalo"])
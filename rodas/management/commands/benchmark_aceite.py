@@ -0,0 +1,138 @@
+import threading
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from rodas.models import Corrida, CorridaStatus, Motorista, Paciente, Usuario
+from rodas.transicoes import aceitar_corrida
+
+
+def aceitar_legado(corrida_id: int, motorista_id: int) -> bool:
+    """
+    Reproduz o fluxo antigo: lê a corrida, verifica em Python e salva tudo
+    """
+    corrida = Corrida.objects.get(pk=corrida_id)
+    if not corrida.pode_ser_aceita:
+        return False
+    corrida.motorista_id = motorista_id
+    corrida.status = CorridaStatus.ACEITA
+    corrida.data_hora_aceite = timezone.now()
+    corrida.save()
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Dispara N threads aceitando a mesma corrida ao mesmo tempo e verifica "
+        "que exatamente uma vence. Use contra o PostgreSQL; no SQLite as escritas "
+        "concorrentes podem falhar com 'database is locked'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--rodadas", type=int, default=50)
+        parser.add_argument(
+            "--modo",
+            choices=["atomico", "legado"],
+            default="atomico",
+            help="'legado' usa leitura + save() para comparação.",
+        )
+
+    def handle(self, *args, **options):
+        n_threads, rodadas = options["threads"], options["rodadas"]
+        aceitar = aceitar_corrida if options["modo"] == "atomico" else aceitar_legado
+
+        sufixo = uuid.uuid4().hex[:8]
+        usuarios = []
+        try:
+            paciente, motoristas = self.criar_participantes(sufixo, n_threads, usuarios)
+            vencedores_por_rodada, erros, tentativas = [], 0, 0
+            duracao_total = 0.0
+
+            for _ in range(rodadas):
+                corrida = Corrida.objects.create(
+                    paciente=paciente,
+                    endereco_origem="Benchmark",
+                    endereco_destino="Benchmark",
+                    data_hora_agendada=timezone.now(),
+                )
+                barreira = threading.Barrier(n_threads)
+                resultados = [None] * n_threads
+
+                def disputar(indice, corrida_id=corrida.pk):
+                    try:
+                        barreira.wait()
+                        resultados[indice] = aceitar(corrida_id, motoristas[indice].pk)
+                    except DatabaseError:
+                        resultados[indice] = "erro"
+                    finally:
+                        connection.close()
+
+                threads = [
+                    threading.Thread(target=disputar, args=(i,))
+                    for i in range(n_threads)
+                ]
+                inicio = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                duracao_total += time.perf_counter() - inicio
+
+                tentativas += n_threads
+                erros += resultados.count("erro")
+                vencedores_por_rodada.append(resultados.count(True))
+
+            corretas = vencedores_por_rodada.count(1)
+            self.stdout.write(
+                f"Modo {options['modo']}: {rodadas} rodadas x {n_threads} threads"
+            )
+            self.stdout.write(
+                f"Vazão: {tentativas / duracao_total:.0f} tentativas/s "
+                f"({duracao_total / rodadas * 1000:.1f} ms por rodada)"
+            )
+            self.stdout.write(f"Erros de banco: {erros}")
+            mensagem = f"Rodadas com exatamente um vencedor: {corretas}/{rodadas}"
+            if corretas == rodadas:
+                self.stdout.write(self.style.SUCCESS(mensagem))
+            else:
+                multiplos = sum(1 for v in vencedores_por_rodada if v > 1)
+                self.stdout.write(
+                    self.style.ERROR(f"{mensagem} ({multiplos} com mais de um)")
+                )
+        finally:
+            Usuario.objects.filter(pk__in=[u.pk for u in usuarios]).delete()
+
+    def criar_participantes(self, sufixo, n_motoristas, usuarios):
+        def criar_usuario(indice, tipo):
+            usuario = Usuario.objects.create_user(
+                email=f"benchmark-{sufixo}-{indice}@example.com",
+                password=None,
+                nome_completo=f"Benchmark {indice}",
+                cpf=f"{sufixo}-{indice}",
+                tipo_usuario=tipo,
+            )
+            usuarios.append(usuario)
+            return usuario
+
+        paciente = Paciente.objects.create(
+            usuario=criar_usuario("p", "paciente"),
+            responsavel_nome="Benchmark",
+            responsavel_cpf="000.000.000-00",
+            responsavel_telefone="(00) 0000-0000",
+        )
+        motoristas = [
+            Motorista.objects.create(
+                usuario=criar_usuario(i, "motorista"),
+                marca_veiculo="Benchmark",
+                modelo_veiculo="Benchmark",
+                cor_veiculo="Benchmark",
+                status_aprovacao="aprovado",
+                online=True,
+            )
+            for i in range(n_motoristas)
+        ]
+        return paciente, motoristas
@@ -0,0 +1,310 @@
+import json
+import random
+import subprocess
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from rodas.models import Corrida, Motorista, Usuario
+
+# Centro de São Paulo, usado como posição dos motoristas
+LATITUDE_BASE, LONGITUDE_BASE = -23.55, -46.63
+
+
+def percentil(valores: list[float], p: float) -> float:
+    """
+    Percentil por posição mais próxima (``valores`` já ordenados)
+    """
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, max(0, round(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+def commit_atual() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class UsuarioVirtual:
+    """
+    Um cliente HTTP que registra a latência de cada requisição por rota
+    """
+
+    def __init__(self, host: str, medicoes: dict, trava: threading.Lock):
+        self.client = Client(HTTP_HOST=host, raise_request_exception=False)
+        self.medicoes = medicoes
+        self.trava = trava
+
+    def requisitar(self, metodo: str, url: str, dados=None, **extra):
+        inicio = time.perf_counter()
+        resposta = getattr(self.client, metodo)(url, dados, **extra)
+        duracao = time.perf_counter() - inicio
+        chave = f"{metodo.upper()} {resolve(url.split('?')[0]).url_name}"
+        with self.trava:
+            self.medicoes[chave].append((duracao, resposta.status_code >= 500))
+        return resposta
+
+    def postar_json(self, url: str, dados: dict):
+        return self.requisitar(
+            "post", url, json.dumps(dados), content_type="application/json"
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga de ponta a ponta do ciclo de vida das corridas: registro, "
+        "login, solicitação, painel dos motoristas, aceite e transições de status, "
+        "sempre pelas URLs reais. Mostra p50/p95/p99 e requisições por segundo de "
+        "cada rota. Use contra o PostgreSQL; no SQLite as escritas concorrentes "
+        "podem falhar com 'database is locked'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pacientes", type=int, default=10)
+        parser.add_argument("--motoristas", type=int, default=5)
+        parser.add_argument(
+            "--iteracoes",
+            type=int,
+            default=10,
+            help="Ciclos executados por cada usuário virtual.",
+        )
+        parser.add_argument("--semente", type=int, default=42)
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--saida", help="Grava o resultado em JSON neste arquivo.")
+        parser.add_argument(
+            "--comparar",
+            help="JSON de uma execução anterior para comparar o p95 de cada rota.",
+        )
+
+    def handle(self, *args, **options):
+        if options["host"] not in settings.ALLOWED_HOSTS and "*" not in (
+            settings.ALLOWED_HOSTS
+        ):
+            raise CommandError(f"{options['host']} não está em ALLOWED_HOSTS.")
+
+        self.prefixo = f"carga-{uuid.uuid4().hex[:8]}"
+        self.senha = f"Carga!{uuid.uuid4().hex}"
+        self.iteracoes = options["iteracoes"]
+        self.semente = options["semente"]
+        self.host = options["host"]
+        self.medicoes = defaultdict(list)
+        self.trava = threading.Lock()
+
+        tarefas = [(self.paciente, i) for i in range(options["pacientes"])]
+        tarefas += [(self.motorista, i) for i in range(options["motoristas"])]
+        threads = [
+            threading.Thread(target=self.executar, args=tarefa) for tarefa in tarefas
+        ]
+
+        try:
+            inicio = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            duracao = time.perf_counter() - inicio
+        finally:
+            Usuario.objects.filter(email__startswith=self.prefixo).delete()
+
+        resultado = self.resumir(duracao, options)
+        self.imprimir(resultado)
+        if options["comparar"]:
+            self.comparar(resultado, json.loads(Path(options["comparar"]).read_text()))
+        if options["saida"]:
+            Path(options["saida"]).write_text(
+                json.dumps(resultado, indent=2, ensure_ascii=False)
+            )
+            self.stdout.write(f"Resultado gravado em {options['saida']}")
+
+    def executar(self, cenario, indice):
+        try:
+            cenario(UsuarioVirtual(self.host, self.medicoes, self.trava), indice)
+        except Exception as erro:
+            self.stderr.write(f"{cenario.__name__} {indice}: {erro!r}")
+        finally:
+            connection.close()
+
+    def credenciais(self, tipo, indice):
+        return {
+            "nome_completo": f"Carga {tipo.title()} {indice}",
+            "email": f"{self.prefixo}-{tipo}-{indice}@example.com",
+            "cpf": f"{self.prefixo[-8:]}{tipo[0]}{indice}",
+            "password1": self.senha,
+            "password2": self.senha,
+        }
+
+    def paciente(self, usuario: UsuarioVirtual, indice: int):
+        aleatorio = random.Random(self.semente * 1000 + indice)
+        dados = self.credenciais("paciente", indice)
+        usuario.requisitar(
+            "post",
+            reverse("rodas:register"),
+            {
+                **dados,
+                "responsavel_nome": "Responsável Carga",
+                "responsavel_email": "responsavel@example.com",
+                "responsavel_telefone": "(11) 99999-9999",
+                "responsavel_cpf": "000.000.000-00",
+                "aceite_termos": "on",
+            },
+        )
+        usuario.requisitar(
+            "post",
+            reverse("rodas:login"),
+            {"email": dados["email"], "password": self.senha},
+        )
+
+        for _ in range(self.iteracoes):
+            agendamento = timezone.localtime() + timedelta(
+                minutes=aleatorio.randint(30, 240)
+            )
+            usuario.requisitar(
+                "post",
+                reverse("rodas:solicita_corrida"),
+                {
+                    "endereco_origem": f"Rua Carga {aleatorio.randint(1, 999)}",
+                    "endereco_destino": "Hospital das Clínicas",
+                    "data_agendamento": agendamento.date().isoformat(),
+                    "hora_agendamento": agendamento.strftime("%H:%M"),
+                    "necessita_cadeira_rodas": aleatorio.random() < 0.1 or "",
+                },
+                HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+            )
+            usuario.requisitar("get", reverse("rodas:dashboard"))
+            usuario.requisitar("get", reverse("rodas:corridas_paciente"))
+
+    def motorista(self, usuario: UsuarioVirtual, indice: int):
+        aleatorio = random.Random(self.semente * 1000 + 500 + indice)
+        dados = self.credenciais("motorista", indice)
+        usuario.requisitar(
+            "post",
+            reverse("rodas:register_motorista"),
+            {
+                **dados,
+                "telefone": "(11) 98888-8888",
+                "marca_veiculo": "Carga",
+                "modelo_veiculo": "Carga",
+                "cor_veiculo": "Branco",
+                "veiculo_adaptado": "on" if indice % 3 == 0 else "",
+                "aceite_termos_voluntariado": "on",
+            },
+        )
+        # A aprovação é feita pela administração, fora do fluxo medido
+        Motorista.objects.filter(usuario__email=dados["email"]).update(
+            status_aprovacao="aprovado"
+        )
+        usuario.requisitar(
+            "post",
+            reverse("rodas:login"),
+            {"email": dados["email"], "password": self.senha},
+        )
+        usuario.requisitar("post", reverse("rodas:toggle_motorista_status"))
+
+        latitude = LATITUDE_BASE + aleatorio.uniform(-0.05, 0.05)
+        longitude = LONGITUDE_BASE + aleatorio.uniform(-0.05, 0.05)
+        for _ in range(self.iteracoes):
+            usuario.requisitar("get", reverse("rodas:dashboard"))
+            usuario.requisitar(
+                "get",
+                f"{reverse('rodas:corridas_proximas')}?lat={latitude}&lng={longitude}",
+            )
+
+            # Escolhe uma corrida pendente deste teste, como se viesse do painel
+            pendentes = list(
+                Corrida.objects.pendentes()
+                .filter(paciente__usuario__email__startswith=self.prefixo)
+                .values_list("pk", flat=True)[:10]
+            )
+            if not pendentes:
+                continue
+            corrida_id = aleatorio.choice(pendentes)
+            resposta = usuario.requisitar(
+                "post", reverse("rodas:aceitar_corrida", args=[corrida_id])
+            )
+            if not resposta.json().get("success"):
+                continue
+            for status in ("em_andamento", "motorista_chegou", "concluida"):
+                usuario.postar_json(
+                    reverse("rodas:atualizar_status_corrida", args=[corrida_id]),
+                    {"status": status},
+                )
+
+    def resumir(self, duracao: float, options) -> dict:
+        rotas = {}
+        todas = []
+        for chave, medicoes in sorted(self.medicoes.items()):
+            tempos = sorted(tempo for tempo, _ in medicoes)
+            todas.extend(tempos)
+            rotas[chave] = self.estatisticas(tempos, duracao)
+            rotas[chave]["erros"] = sum(1 for _, erro in medicoes if erro)
+        todas.sort()
+        return {
+            "commit": commit_atual(),
+            "data": timezone.now().isoformat(),
+            "banco": connection.vendor,
+            "parametros": {
+                chave: options[chave]
+                for chave in ("pacientes", "motoristas", "iteracoes", "semente")
+            },
+            "duracao_s": round(duracao, 3),
+            "total": self.estatisticas(todas, duracao),
+            "rotas": rotas,
+        }
+
+    def estatisticas(self, tempos: list[float], duracao: float) -> dict:
+        return {
+            "requisicoes": len(tempos),
+            "rps": round(len(tempos) / duracao, 2) if duracao else 0.0,
+            "p50_ms": round(percentil(tempos, 50) * 1000, 2),
+            "p95_ms": round(percentil(tempos, 95) * 1000, 2),
+            "p99_ms": round(percentil(tempos, 99) * 1000, 2),
+        }
+
+    def imprimir(self, resultado: dict):
+        self.stdout.write(
+            f"Commit {resultado['commit'] or '?'} · {resultado['banco']} · "
+            f"{resultado['duracao_s']:.1f} s"
+        )
+        cabecalho = f"{'rota':<38}{'req':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'erros':>7}"
+        self.stdout.write(cabecalho)
+        linhas = list(resultado["rotas"].items()) + [("TOTAL", resultado["total"])]
+        for rota, dados in linhas:
+            self.stdout.write(
+                f"{rota:<38}{dados['requisicoes']:>6}{dados['rps']:>8.1f}"
+                f"{dados['p50_ms']:>9.1f}{dados['p95_ms']:>9.1f}{dados['p99_ms']:>9.1f}"
+                f"{dados.get('erros', ''):>7}"
+            )
+
+    def comparar(self, atual: dict, anterior: dict):
+        self.stdout.write(f"\nComparação de p95 com o commit {anterior.get('commit')}:")
+        for rota, dados in atual["rotas"].items():
+            antes = anterior.get("rotas", {}).get(rota)
+            if not antes or not antes["p95_ms"]:
+                continue
+            variacao = (dados["p95_ms"] - antes["p95_ms"]) / antes["p95_ms"] * 100
+            estilo = self.style.ERROR if variacao > 10 else self.style.SUCCESS
+            self.stdout.write(
+                estilo(
+                    f"{rota:<38}{antes['p95_ms']:>9.1f} -> {dados['p95_ms']:>9.1f} ms "
+                    f"({variacao:+.0f}%)"
+                )
+            )
@@ -0,0 +1,68 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from rodas.despacho import (
+    CUSTO_INVIAVEL,
+    ParametrosDespacho,
+    montar_custos,
+    resolver_atribuicao,
+)
+
+
+class Command(BaseCommand):
+    help = "Mede a montagem da matriz de custos e a resolução da atribuição."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanhos",
+            type=int,
+            nargs="+",
+            default=[100, 500, 1000],
+            help="Dimensões das matrizes quadradas (corridas x motoristas).",
+        )
+        parser.add_argument("--repeticoes", type=int, default=3)
+        parser.add_argument("--semente", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["semente"])
+        parametros = ParametrosDespacho()
+
+        for tamanho in options["tamanhos"]:
+            tempos_montagem, tempos_resolucao = [], []
+            for _ in range(options["repeticoes"]):
+                # Corridas e motoristas espalhados por ~40 km ao redor de São Paulo
+                origens = np.column_stack(
+                    (
+                        rng.normal(-23.55, 0.12, tamanho),
+                        rng.normal(-46.63, 0.12, tamanho),
+                    )
+                )
+                posicoes = np.column_stack(
+                    (
+                        rng.normal(-23.55, 0.12, tamanho),
+                        rng.normal(-46.63, 0.12, tamanho),
+                    )
+                )
+                horas = rng.uniform(-0.5, 3, tamanho)
+                precisa_cadeira = rng.random(tamanho) < 0.1
+                adaptado = rng.random(tamanho) < 0.3
+
+                inicio = time.perf_counter()
+                custos, _ = montar_custos(
+                    origens, horas, precisa_cadeira, posicoes, adaptado, parametros
+                )
+                tempos_montagem.append(time.perf_counter() - inicio)
+
+                inicio = time.perf_counter()
+                linhas, colunas = resolver_atribuicao(custos)
+                tempos_resolucao.append(time.perf_counter() - inicio)
+
+            viaveis = int((custos[linhas, colunas] < CUSTO_INVIAVEL).sum())
+            self.stdout.write(
+                f"{tamanho}x{tamanho}: montagem {min(tempos_montagem) * 1000:.1f} ms, "
+                f"resolução {min(tempos_resolucao) * 1000:.1f} ms "
+                f"(melhor de {options['repeticoes']}), "
+                f"{viaveis} atribuições viáveis"
+            )
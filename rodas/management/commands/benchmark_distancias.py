@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from rodas.distancias import cache_matrizes, matriz_distancias_km
+from rodas.geo import distancia_km
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara a matriz de distâncias vetorizada com um laço Python par a par "
+        "(rodas.geo.distancia_km), sem e com o cache de matrizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corridas", type=int, default=10_000)
+        parser.add_argument("--motoristas", type=int, default=1_000)
+        parser.add_argument("--repeticoes", type=int, default=3)
+        parser.add_argument(
+            "--amostra",
+            type=int,
+            help="Executa o laço ingênuo só nas primeiras N corridas e "
+            "extrapola o tempo para o total.",
+        )
+        parser.add_argument("--semente", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["semente"])
+        n, m = options["corridas"], options["motoristas"]
+        # Pontos espalhados por ~40 km ao redor de São Paulo
+        origens = np.column_stack(
+            (rng.normal(-23.55, 0.12, n), rng.normal(-46.63, 0.12, n))
+        )
+        posicoes = np.column_stack(
+            (rng.normal(-23.55, 0.12, m), rng.normal(-46.63, 0.12, m))
+        )
+        self.stdout.write(f"{n} corridas x {m} motoristas ({n * m:,} pares)")
+
+        amostra = min(options["amostra"] or n, n)
+        inicio = time.perf_counter()
+        ingenua = [
+            [distancia_km(lat_o, lng_o, lat_m, lng_m) for lat_m, lng_m in posicoes]
+            for lat_o, lng_o in origens[:amostra].tolist()
+        ]
+        tempo_ingenuo = (time.perf_counter() - inicio) * n / amostra
+
+        tempos = []
+        for _ in range(options["repeticoes"]):
+            inicio = time.perf_counter()
+            matriz = matriz_distancias_km(origens, posicoes, usar_cache=False)
+            tempos.append(time.perf_counter() - inicio)
+        tempo_vetorizado = min(tempos)
+
+        cache_matrizes.limpar()
+        matriz_distancias_km(origens, posicoes)
+        inicio = time.perf_counter()
+        matriz_distancias_km(origens, posicoes)
+        tempo_cache = time.perf_counter() - inicio
+        em_cache = cache_matrizes.acertos > 0
+
+        erro = float(np.abs(matriz[:amostra] - np.array(ingenua)).max())
+        sufixo = f" (extrapolado de {amostra} corridas)" if amostra < n else ""
+        self.stdout.write(f"laço Python:   {tempo_ingenuo * 1000:10.1f} ms{sufixo}")
+        self.stdout.write(
+            f"vetorizado:    {tempo_vetorizado * 1000:10.1f} ms "
+            f"({tempo_ingenuo / tempo_vetorizado:.0f}x, melhor de "
+            f"{options['repeticoes']})"
+        )
+        tamanho = (
+            f"{matriz.nbytes / 1024 / 1024:.0f} MB por matriz, limite do cache "
+            f"{cache_matrizes.maximo_bytes / 1024 / 1024:.0f} MB"
+        )
+        if em_cache:
+            self.stdout.write(
+                f"cache:         {tempo_cache * 1000:10.1f} ms ({tamanho})"
+            )
+        else:
+            self.stdout.write(f"cache:         não cabe ({tamanho})")
+        self.stdout.write(
+            self.style.SUCCESS(f"diferença máxima entre os métodos: {erro:.2e} km")
+        )
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rodas.despacho import ParametrosDespacho, despachar
+
+
+class Command(BaseCommand):
+    help = "Atribui corridas pendentes a motoristas online em lote."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas calcula as atribuições, sem gravá-las.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=0,
+            help="Repete o despacho a cada N segundos (0 executa uma única vez).",
+        )
+        parser.add_argument("--raio-maximo", type=float, default=30.0)
+        parser.add_argument("--peso-km", type=float, default=1.0)
+        parser.add_argument("--peso-hora", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        parametros = ParametrosDespacho(
+            peso_km=options["peso_km"],
+            peso_hora=options["peso_hora"],
+            raio_maximo_km=options["raio_maximo"],
+        )
+        while True:
+            self.rodada(parametros, options["dry_run"])
+            if options["intervalo"] <= 0:
+                break
+            time.sleep(options["intervalo"])
+
+    def rodada(self, parametros, dry_run):
+        inicio = time.perf_counter()
+        resultado = despachar(dry_run=dry_run, parametros=parametros)
+        duracao = (time.perf_counter() - inicio) * 1000
+
+        for atribuicao in resultado.atribuicoes:
+            self.stdout.write(
+                f"Corrida #{atribuicao.corrida_id} -> motorista "
+                f"#{atribuicao.motorista_id} ({atribuicao.distancia_km:.2f} km)"
+            )
+        resumo = (
+            f"{resultado.corridas_consideradas} corridas x "
+            f"{resultado.motoristas_considerados} motoristas: "
+            f"{len(resultado.atribuicoes)} atribuições"
+        )
+        if dry_run:
+            resumo += " (dry-run, nada gravado)"
+        else:
+            resumo += f", {resultado.gravadas} gravadas"
+        self.stdout.write(self.style.SUCCESS(f"{resumo} em {duracao:.1f} ms"))
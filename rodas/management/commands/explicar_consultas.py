@@ -0,0 +1,131 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Q
+
+from rodas.geo import celulas_vizinhas, precisao_para_raio
+from rodas.models import Corrida, CorridaStatus, Motorista, Notificacao, Paciente
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa EXPLAIN ANALYZE nas consultas dos dashboards e listagens. "
+        "Rode sobre um banco populado (veja popular_dados) para ver quais usam "
+        "índices."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analisar-tabelas",
+            action="store_true",
+            help="Atualiza as estatísticas do planejador (ANALYZE) antes.",
+        )
+        parser.add_argument(
+            "--resumo",
+            action="store_true",
+            help="Mostra só o tipo de acesso de cada consulta, sem o plano completo.",
+        )
+
+    def handle(self, *args, **options):
+        postgres = connection.vendor == "postgresql"
+        if options["analisar_tabelas"]:
+            if not postgres:
+                raise CommandError("--analisar-tabelas requer PostgreSQL.")
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "ANALYZE rodas_corrida, rodas_notificacao, rodas_motorista"
+                )
+
+        paciente = Paciente.objects.annotate(n=Count("corridas")).order_by("-n").first()
+        motorista = (
+            Motorista.objects.annotate(n=Count("corridas")).order_by("-n").first()
+        )
+        if paciente is None or motorista is None:
+            raise CommandError(
+                "O banco precisa ter ao menos um paciente e um motorista com corridas."
+            )
+
+        for nome, queryset in self.consultas(paciente, motorista):
+            plano = queryset.explain(analyze=True) if postgres else queryset.explain()
+            acesso = self.tipo_de_acesso(plano)
+            estilo = self.style.WARNING if "seq scan" in acesso else self.style.SUCCESS
+            self.stdout.write(estilo(f"== {nome}: {acesso}"))
+            if not options["resumo"]:
+                self.stdout.write(plano)
+                self.stdout.write("")
+
+    def consultas(self, paciente, motorista):
+        amostra = (
+            Corrida.objects.filter(latitude_origem__isnull=False)
+            .values("latitude_origem", "longitude_origem")
+            .first()
+        )
+        consultas = [
+            (
+                "Fila de despacho (dashboard do motorista)",
+                Corrida.objects.pendentes().order_by("data_hora_agendada")[:10],
+            ),
+            (
+                "Corridas recentes do paciente",
+                Corrida.objects.filter(paciente=paciente).order_by(
+                    "-data_hora_agendada"
+                )[:10],
+            ),
+            (
+                "Lista do paciente filtrada por status",
+                Corrida.objects.filter(
+                    paciente=paciente, status=CorridaStatus.CONCLUIDA
+                ).order_by("-data_hora_agendada")[:10],
+            ),
+            (
+                "Histórico do motorista",
+                Corrida.objects.filter(motorista=motorista).order_by(
+                    "-data_hora_agendada"
+                )[:10],
+            ),
+            (
+                "Notificações não lidas",
+                Notificacao.objects.filter(
+                    usuario_id=paciente.usuario_id, lida=False
+                ).order_by("-data_criacao")[:20],
+            ),
+        ]
+        if amostra:
+            latitude = amostra["latitude_origem"]
+            longitude = amostra["longitude_origem"]
+            prefixos = Q()
+            for celula in celulas_vizinhas(
+                latitude, longitude, precisao_para_raio(latitude, 10.0)
+            ):
+                prefixos |= Q(geohash_origem__startswith=celula)
+            consultas.append(
+                (
+                    "Candidatas por proximidade (geohash)",
+                    Corrida.objects.pendentes()
+                    .filter(prefixos)
+                    .order_by()
+                    .values_list("pk", "latitude_origem", "longitude_origem"),
+                )
+            )
+        return consultas
+
+    def tipo_de_acesso(self, plano: str) -> str:
+        """
+        Resume o plano em "seq scan em X" e/ou "índices: ..." (PostgreSQL e SQLite)
+        """
+        partes = []
+        sequenciais = re.findall(r"Seq Scan on (\w+)|\bSCAN (\w+)\b(?!\s+USING)", plano)
+        tabelas = sorted({t for grupo in sequenciais for t in grupo if t})
+        if tabelas:
+            partes.append(f"seq scan em {', '.join(tabelas)}")
+        usados = re.findall(
+            r"Index (?:Only )?Scan(?: Backward)? using (\w+)"
+            r"|Bitmap Index Scan on (\w+)"
+            r"|USING (?:COVERING )?INDEX (\w+)",
+            plano,
+        )
+        indices = sorted({i for grupo in usados for i in grupo if i})
+        if indices:
+            partes.append(f"índices: {', '.join(indices)}")
+        return "; ".join(partes) or "sem acesso a tabelas"
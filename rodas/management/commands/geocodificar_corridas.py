@@ -0,0 +1,102 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from rodas.geocodificacao import obter_geocodificador
+from rodas.models import Corrida
+from rodas.versoes import invalidar_corridas
+
+
+class Command(BaseCommand):
+    help = (
+        "Preenche as coordenadas de origem e destino das corridas que ainda não "
+        "as têm, usando o geocodificador configurado e seus caches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanho-lote",
+            type=int,
+            default=500,
+            help="Corridas lidas e atualizadas por vez.",
+        )
+        parser.add_argument(
+            "--apenas-pendentes",
+            action="store_true",
+            help="Considera só as corridas que ainda aguardam motorista.",
+        )
+
+    def handle(self, *args, **options):
+        geocodificador = obter_geocodificador()
+        sem_coordenadas = Corrida.objects.filter(
+            Q(latitude_origem__isnull=True) | Q(latitude_destino__isnull=True)
+        )
+        if options["apenas_pendentes"]:
+            sem_coordenadas = sem_coordenadas.pendentes()
+
+        inicio = time.perf_counter()
+        ultimo_id, atualizadas, sem_resultado = 0, 0, 0
+        while True:
+            lote = list(
+                sem_coordenadas.filter(pk__gt=ultimo_id)
+                .order_by("pk")
+                .only(
+                    "pk",
+                    "endereco_origem",
+                    "latitude_origem",
+                    "longitude_origem",
+                    "geohash_origem",
+                    "endereco_destino",
+                    "latitude_destino",
+                    "longitude_destino",
+                )[: options["tamanho_lote"]]
+            )
+            if not lote:
+                break
+            ultimo_id = lote[-1].pk
+
+            alteradas = []
+            for corrida in lote:
+                alterada = False
+                if corrida.latitude_origem is None:
+                    origem = geocodificador.geocodificar(corrida.endereco_origem)
+                    if origem is not None:
+                        corrida.latitude_origem = origem.latitude
+                        corrida.longitude_origem = origem.longitude
+                        corrida.geohash_origem = corrida.calcular_geohash_origem()
+                        alterada = True
+                if corrida.latitude_destino is None:
+                    destino = geocodificador.geocodificar(corrida.endereco_destino)
+                    if destino is not None:
+                        corrida.latitude_destino = destino.latitude
+                        corrida.longitude_destino = destino.longitude
+                        alterada = True
+                if alterada:
+                    alteradas.append(corrida)
+                if corrida.latitude_origem is None or corrida.latitude_destino is None:
+                    sem_resultado += 1
+
+            Corrida.objects.bulk_update(
+                alteradas,
+                [
+                    "latitude_origem",
+                    "longitude_origem",
+                    "geohash_origem",
+                    "latitude_destino",
+                    "longitude_destino",
+                ],
+            )
+            atualizadas += len(alteradas)
+
+        if atualizadas:
+            # Novas coordenadas mudam as listas de corridas próximas
+            invalidar_corridas()
+
+        duracao = time.perf_counter() - inicio
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{atualizadas} corridas atualizadas em {duracao:.1f} s; "
+                f"{sem_resultado} ainda sem coordenadas completas."
+            )
+        )
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rodas.trajetos import gravar_pendentes
+
+
+class Command(BaseCommand):
+    help = (
+        "Grava em lote os trajetos das corridas e a última posição dos "
+        "motoristas acumulados no Redis. Execute um único processo por vez."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--maximo-lotes",
+            type=int,
+            default=1000,
+            help="Lotes recebidos lidos do buffer por rodada.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=0,
+            help="Repete a gravação a cada N segundos (0 esvazia o buffer e sai).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.perf_counter()
+            resultado = gravar_pendentes(maximo_lotes=options["maximo_lotes"])
+            duracao = (time.perf_counter() - inicio) * 1000
+            if resultado.lotes:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{resultado.lotes} lotes: {resultado.pontos} pontos "
+                        f"gravados, {resultado.descartados} descartados, "
+                        f"{resultado.motoristas} posições atualizadas em "
+                        f"{duracao:.1f} ms"
+                    )
+                )
+            if resultado.lotes_descartados:
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"{resultado.lotes_descartados} lotes rejeitados pelo "
+                        "banco movidos para trajetos:descartados"
+                    )
+                )
+            if resultado.lotes == options["maximo_lotes"]:
+                # Ainda há lotes no buffer
+                continue
+            if options["intervalo"] <= 0:
+                break
+            time.sleep(options["intervalo"])
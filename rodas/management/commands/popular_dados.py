@@ -0,0 +1,793 @@
+import io
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from rodas.avaliacoes import recalcular_agregados
+from rodas.geo import BASE32, PRECISAO_PADRAO
+from rodas.models import (
+    Avaliacao,
+    Corrida,
+    CorridaEvento,
+    CorridaStatus,
+    Motorista,
+    Notificacao,
+    Paciente,
+    TipoUsuario,
+    Usuario,
+)
+from rodas.resumos import atualizar_resumos
+from rodas.versoes import invalidar_corridas
+
+SENHA_PADRAO = "popular-dados"
+LATITUDE_BASE, LONGITUDE_BASE = -23.55, -46.63
+HOSPITAIS = (
+    ("Hospital das Clínicas", -23.5572, -46.6691),
+    ("Hospital São Paulo", -23.5986, -46.6452),
+    ("Santa Casa de São Paulo", -23.5431, -46.6503),
+    ("Hospital do Câncer", -23.5748, -46.6361),
+    ("Hospital Regional Sul", -23.6873, -46.7108),
+    ("Hospital de Itaquera", -23.5402, -46.4565),
+)
+BAIRROS = (
+    "Centro",
+    "Mooca",
+    "Penha",
+    "Santana",
+    "Lapa",
+    "Pinheiros",
+    "Ipiranga",
+    "Itaquera",
+    "Capão Redondo",
+    "Butantã",
+    "Tatuapé",
+    "Jabaquara",
+)
+MOTIVOS_CANCELAMENTO = (
+    "Paciente internado",
+    "Consulta remarcada",
+    "Sem acompanhante disponível",
+    "Motorista indisponível",
+)
+# Horário de início das corridas: picos de manhã e no começo da tarde
+PESOS_HORA = np.array(
+    [0, 0, 0, 0, 0, 1, 4, 9, 10, 9, 7, 5, 4, 8, 9, 7, 5, 3, 2, 1, 1, 0, 0, 0],
+    dtype=np.float64,
+)
+PESOS_HORA /= PESOS_HORA.sum()
+
+# Contexto compartilhado pelos lotes (preenchido uma vez por processo)
+_contexto: dict = {}
+
+
+def geohash_vetorizado(
+    latitudes: np.ndarray, longitudes: np.ndarray, precisao: int = PRECISAO_PADRAO
+) -> list[str]:
+    """
+    Mesmo resultado de ``rodas.geo.codificar_geohash``, calculado em bloco.
+
+    Quantiza cada coordenada no número de bits da precisão e intercala os
+    bits (longitude primeiro), como faz a bissecção do geohash.
+    """
+    bits = 5 * precisao
+    bits_lng, bits_lat = (bits + 1) // 2, bits // 2
+    q_lat = np.clip(
+        np.floor((latitudes + 90.0) / 180.0 * (1 << bits_lat)), 0, (1 << bits_lat) - 1
+    ).astype(np.int64)
+    q_lng = np.clip(
+        np.floor((longitudes + 180.0) / 360.0 * (1 << bits_lng)),
+        0,
+        (1 << bits_lng) - 1,
+    ).astype(np.int64)
+
+    codigo = np.zeros(len(latitudes), dtype=np.int64)
+    for posicao in range(bits):
+        if posicao % 2 == 0:
+            bit = (q_lng >> (bits_lng - 1 - posicao // 2)) & 1
+        else:
+            bit = (q_lat >> (bits_lat - 1 - posicao // 2)) & 1
+        codigo = (codigo << 1) | bit
+
+    alfabeto = np.array(list(BASE32))
+    caracteres = [
+        alfabeto[(codigo >> (5 * (precisao - 1 - k))) & 31] for k in range(precisao)
+    ]
+    return ["".join(c) for c in zip(*caracteres)]
+
+
+def datas_texto(segundos: np.ndarray, validas: np.ndarray | None = None) -> list:
+    """
+    Converte segundos desde a época (UTC) no texto aceito pelo banco
+    """
+    textos = np.datetime_as_string(segundos.astype("datetime64[s]"), unit="s")
+    textos = np.char.replace(textos, "T", " ").tolist()
+    if validas is None:
+        return textos
+    return [t if v else None for t, v in zip(textos, validas.tolist())]
+
+
+def escrever(tabela: str, colunas: list[str], valores: list[list]) -> None:
+    """
+    Grava linhas (em formato colunar) com COPY no PostgreSQL ou com
+    ``executemany`` nos demais bancos
+    """
+    if not valores or not valores[0]:
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            buffer = io.StringIO()
+            for linha in zip(*valores):
+                buffer.write("\t".join(_texto_copy(v) for v in linha))
+                buffer.write("\n")
+            buffer.seek(0)
+            sql = f"COPY {tabela} ({', '.join(colunas)}) FROM STDIN"
+            if hasattr(cursor.cursor, "copy_expert"):
+                cursor.cursor.copy_expert(sql, buffer)
+            else:
+                with cursor.cursor.copy(sql) as copia:
+                    copia.write(buffer.getvalue())
+        else:
+            marcadores = ", ".join(["%s"] * len(colunas))
+            cursor.executemany(
+                f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({marcadores})",
+                list(zip(*valores)),
+            )
+
+
+def _texto_copy(valor) -> str:
+    if valor is None:
+        return "\\N"
+    if valor is True:
+        return "t"
+    if valor is False:
+        return "f"
+    if isinstance(valor, str):
+        return (
+            valor.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+    return str(valor)
+
+
+def colunas(modelo, campos: list[str]) -> tuple[str, list[str]]:
+    meta = modelo._meta
+    return meta.db_table, [meta.get_field(campo).column for campo in campos]
+
+
+def _inicializar_processo(contexto: dict) -> None:
+    # Com "spawn" o processo filho começa sem o Django configurado
+    import django
+
+    django.setup()
+    connections.close_all()
+    _contexto.update(contexto)
+
+
+def gerar_lote(indice: int) -> tuple[int, int, int]:
+    """
+    Gera e grava um lote de corridas com os eventos, avaliações e notificações.
+
+    O gerador é semeado com ``(semente, indice)``: o conteúdo de cada lote
+    não depende da ordem nem do número de processos.
+    """
+    ctx = _contexto
+    inicio_lote = indice * ctx["tamanho_lote"]
+    n = min(ctx["tamanho_lote"], ctx["corridas"] - inicio_lote)
+    rng = np.random.default_rng([ctx["semente"], indice])
+    referencia = ctx["referencia"]
+    ids = ctx["primeiro_id"] + inicio_lote + np.arange(n, dtype=np.int64)
+
+    # Pacientes frequentes concentram a maior parte das corridas
+    pacientes = ctx["pacientes"]
+    idx_paciente = np.minimum(
+        (len(pacientes) * rng.random(n) ** 3).astype(np.int64), len(pacientes) - 1
+    )
+    paciente_id = pacientes[idx_paciente, 0]
+    paciente_uid = pacientes[idx_paciente, 1]
+    cadeira = pacientes[idx_paciente, 2].astype(bool) | (rng.random(n) < 0.03)
+
+    # Origem: aglomerados em torno de bairros; destino: um dos hospitais
+    centros, pesos = ctx["centros"], ctx["pesos_centros"]
+    aglomerado = rng.choice(len(centros), size=n, p=pesos)
+    lat_origem = np.round(centros[aglomerado, 0] + rng.normal(0, 0.015, n), 8)
+    lng_origem = np.round(centros[aglomerado, 1] + rng.normal(0, 0.015, n), 8)
+    hospital = rng.integers(0, len(HOSPITAIS), n)
+    coords_hospitais = np.array([(h[1], h[2]) for h in HOSPITAIS])
+    lat_destino = np.round(coords_hospitais[hospital, 0] + rng.normal(0, 0.0005, n), 8)
+    lng_destino = np.round(coords_hospitais[hospital, 1] + rng.normal(0, 0.0005, n), 8)
+
+    # Agendamento: 8% futuras, 2% acontecendo agora e o resto no histórico,
+    # mais denso nos meses recentes
+    sorteio = rng.random(n)
+    futura = sorteio < 0.08
+    agora = (sorteio >= 0.08) & (sorteio < 0.10)
+    passada = sorteio >= 0.10
+    dia = np.where(
+        futura,
+        rng.integers(0, 8, n),
+        -np.floor(ctx["dias"] * (1 - np.sqrt(rng.random(n)))).astype(np.int64) - 1,
+    )
+    hora = rng.choice(24, size=n, p=PESOS_HORA)
+    minuto = rng.integers(0, 12, n) * 5
+    meia_noite = ctx["meia_noite"]
+    agendada = meia_noite + dia * 86400 + hora * 3600 + minuto * 60
+    agendada = np.where(agora, referencia + rng.integers(-7200, 1800, n), agendada)
+    agendada = np.where(futura, np.maximum(agendada, referencia + 1800), agendada)
+
+    status = np.empty(n, dtype=object)
+    status[futura] = np.where(
+        rng.random(futura.sum()) < 0.7, CorridaStatus.PENDENTE, CorridaStatus.ACEITA
+    )
+    status[agora] = rng.choice(
+        [
+            CorridaStatus.ACEITA,
+            CorridaStatus.EM_ANDAMENTO,
+            CorridaStatus.MOTORISTA_CHEGOU,
+        ],
+        size=agora.sum(),
+    )
+    status[passada] = np.where(
+        rng.random(passada.sum()) < 0.85,
+        CorridaStatus.CONCLUIDA,
+        CorridaStatus.CANCELADA,
+    )
+    cancelada = status == CorridaStatus.CANCELADA
+    pendente = status == CorridaStatus.PENDENTE
+
+    # Motorista: adaptado quando o paciente usa cadeira de rodas
+    com_motorista = ~pendente & ~(cancelada & (rng.random(n) < 0.6))
+    motoristas, adaptados = ctx["motoristas"], ctx["motoristas_adaptados"]
+    idx_motorista = rng.integers(0, len(motoristas), n)
+    idx_adaptado = adaptados[rng.integers(0, len(adaptados), n)]
+    idx_motorista = np.where(cadeira, idx_adaptado, idx_motorista)
+    motorista_id = np.where(com_motorista, motoristas[idx_motorista, 0], 0)
+    motorista_uid = motoristas[idx_motorista, 1]
+
+    # Linha do tempo de cada corrida
+    criacao = np.minimum(
+        agendada - rng.integers(3600, 5 * 86400, n),
+        referencia - rng.integers(60, 3600, n),
+    )
+    aceite = np.minimum(criacao + rng.integers(300, 12 * 3600, n), agendada)
+    aceite = np.minimum(aceite, referencia)
+    tem_aceite = com_motorista
+    iniciou = np.isin(
+        status,
+        [
+            CorridaStatus.EM_ANDAMENTO,
+            CorridaStatus.MOTORISTA_CHEGOU,
+            CorridaStatus.CONCLUIDA,
+        ],
+    )
+    chegou = np.isin(status, [CorridaStatus.MOTORISTA_CHEGOU, CorridaStatus.CONCLUIDA])
+    concluida = status == CorridaStatus.CONCLUIDA
+    inicio = np.minimum(agendada - rng.integers(0, 1800, n), referencia)
+    aceite = np.minimum(aceite, inicio - 60)
+    chegada = np.minimum(inicio + rng.integers(300, 2400, n), referencia)
+    finalizacao = chegada + rng.integers(600, 3600, n)
+    cancelamento = np.minimum(criacao + rng.integers(600, 3 * 86400, n), agendada)
+    atualizacao = np.select(
+        [concluida, chegou, iniciou, cancelada, tem_aceite],
+        [finalizacao, chegada, inicio, cancelamento, aceite],
+        default=criacao,
+    )
+
+    bairros = rng.integers(0, len(BAIRROS), n)
+    numeros = rng.integers(1, 3000, n)
+    motivos = rng.integers(0, len(MOTIVOS_CANCELAMENTO), n)
+    observacoes = rng.random(n) < 0.1
+    tabela, nomes = colunas(
+        Corrida,
+        [
+            "id",
+            "paciente",
+            "motorista",
+            "endereco_origem",
+            "latitude_origem",
+            "longitude_origem",
+            "geohash_origem",
+            "endereco_destino",
+            "latitude_destino",
+            "longitude_destino",
+            "data_hora_agendada",
+            "data_hora_aceite",
+            "data_hora_inicio",
+            "data_hora_chegada",
+            "data_hora_finalizacao",
+            "numero_passageiros",
+            "tem_acompanhante",
+            "necessita_cadeira_rodas",
+            "observacoes",
+            "status",
+            "data_criacao",
+            "data_atualizacao",
+            "motivo_cancelamento",
+            "data_cancelamento",
+            "cancelada_por",
+        ],
+    )
+    passageiros = 1 + (rng.random(n) < 0.2)
+    acompanhante = rng.random(n) < 0.35
+    valores = [
+        ids.tolist(),
+        paciente_id.tolist(),
+        [int(m) or None for m in motorista_id.tolist()],
+        [f"Rua Sintética {num}, {BAIRROS[b]}" for num, b in zip(numeros, bairros)],
+        lat_origem.tolist(),
+        lng_origem.tolist(),
+        geohash_vetorizado(lat_origem, lng_origem),
+        [HOSPITAIS[h][0] for h in hospital],
+        lat_destino.tolist(),
+        lng_destino.tolist(),
+        datas_texto(agendada),
+        datas_texto(aceite, tem_aceite),
+        datas_texto(inicio, iniciou),
+        datas_texto(chegada, chegou),
+        datas_texto(finalizacao, concluida),
+        passageiros.tolist(),
+        acompanhante.tolist(),
+        cadeira.tolist(),
+        ["Paciente com mobilidade reduzida" if o else "" for o in observacoes],
+        [str(s) for s in status],
+        datas_texto(criacao),
+        datas_texto(atualizacao),
+        [MOTIVOS_CANCELAMENTO[m] if c else None for m, c in zip(motivos, cancelada)],
+        datas_texto(cancelamento, cancelada),
+        [int(u) if c else None for u, c in zip(paciente_uid, cancelada)],
+    ]
+
+    # Avaliações: 60% dos pacientes e 30% dos motoristas avaliam corridas concluídas
+    nota = rng.choice(5, size=n, p=[0.02, 0.03, 0.10, 0.25, 0.60]) + 1
+    nota_paciente = rng.choice(5, size=n, p=[0.01, 0.02, 0.07, 0.20, 0.70]) + 1
+    avalia_motorista = concluida & (rng.random(n) < 0.6)
+    avalia_paciente = concluida & (rng.random(n) < 0.3)
+    data_avaliacao = finalizacao + rng.integers(60, 2 * 86400, n)
+    data_avaliacao = np.minimum(data_avaliacao, referencia)
+    tabela_av, nomes_av = colunas(
+        Avaliacao,
+        [
+            "corrida",
+            "avaliador",
+            "avaliado",
+            "tipo_avaliacao",
+            "nota",
+            "comentario",
+            "data_avaliacao",
+        ],
+    )
+    valores_av = [[] for _ in nomes_av]
+    for mascara, avaliador, avaliado, tipo, notas in (
+        (
+            avalia_motorista,
+            paciente_uid,
+            motorista_uid,
+            "paciente_avalia_motorista",
+            nota,
+        ),
+        (
+            avalia_paciente,
+            motorista_uid,
+            paciente_uid,
+            "motorista_avalia_paciente",
+            nota_paciente,
+        ),
+    ):
+        quantos = int(mascara.sum())
+        for coluna, dados in zip(
+            valores_av,
+            (
+                ids[mascara].tolist(),
+                avaliador[mascara].tolist(),
+                avaliado[mascara].tolist(),
+                [tipo] * quantos,
+                notas[mascara].tolist(),
+                [""] * quantos,
+                datas_texto(data_avaliacao[mascara]),
+            ),
+        ):
+            coluna.extend(dados)
+
+    # Notificações: aceite e conclusão para o paciente, cancelamento para o
+    # motorista; as antigas já foram lidas
+    tabela_nt, nomes_nt = colunas(
+        Notificacao,
+        [
+            "usuario",
+            "tipo",
+            "titulo",
+            "mensagem",
+            "corrida",
+            "lida",
+            "data_criacao",
+            "data_leitura",
+        ],
+    )
+    valores_nt = [[] for _ in nomes_nt]
+    for mascara, usuario, quando, tipo, titulo in (
+        (tem_aceite, paciente_uid, aceite, "corrida_aceita", "Corrida aceita!"),
+        (
+            concluida,
+            paciente_uid,
+            finalizacao,
+            "corrida_finalizada",
+            "Sua corrida foi concluída!",
+        ),
+        (
+            cancelada & com_motorista,
+            motorista_uid,
+            cancelamento,
+            "corrida_cancelada",
+            "Corrida cancelada",
+        ),
+    ):
+        quantos = int(mascara.sum())
+        lida = (quando[mascara] < referencia - 2 * 86400) | (rng.random(quantos) < 0.2)
+        leitura = np.minimum(
+            quando[mascara] + rng.integers(60, 86400, quantos), referencia
+        )
+        for coluna, dados in zip(
+            valores_nt,
+            (
+                usuario[mascara].tolist(),
+                [tipo] * quantos,
+                [titulo] * quantos,
+                ["Notificação gerada pelo popular_dados."] * quantos,
+                ids[mascara].tolist(),
+                lida.tolist(),
+                datas_texto(quando[mascara]),
+                datas_texto(leitura, lida),
+            ),
+        ):
+            coluna.extend(dados)
+
+    # Eventos do ciclo de vida: um por data preenchida da corrida
+    tabela_ev, nomes_ev = colunas(
+        CorridaEvento, ["corrida", "status", "registrado_em", "motorista", "autor"]
+    )
+    valores_ev = [[] for _ in nomes_ev]
+    motoristas_ev = [int(m) or None for m in motorista_id.tolist()]
+    for mascara, quando, status_ev in (
+        (np.ones(n, dtype=bool), criacao, CorridaStatus.PENDENTE),
+        (tem_aceite, aceite, CorridaStatus.ACEITA),
+        (iniciou, inicio, CorridaStatus.EM_ANDAMENTO),
+        (chegou, chegada, CorridaStatus.MOTORISTA_CHEGOU),
+        (concluida, finalizacao, CorridaStatus.CONCLUIDA),
+        (cancelada, cancelamento, CorridaStatus.CANCELADA),
+    ):
+        selecionadas = np.flatnonzero(mascara)
+        quantos = len(selecionadas)
+        for coluna, dados in zip(
+            valores_ev,
+            (
+                ids[selecionadas].tolist(),
+                [str(status_ev)] * quantos,
+                datas_texto(quando[selecionadas]),
+                [None] * quantos
+                if status_ev == CorridaStatus.PENDENTE
+                else [motoristas_ev[i] for i in selecionadas.tolist()],
+                paciente_uid[selecionadas].tolist()
+                if status_ev == CorridaStatus.CANCELADA
+                else [None] * quantos,
+            ),
+        ):
+            coluna.extend(dados)
+
+    with transaction.atomic():
+        escrever(tabela, nomes, valores)
+        escrever(tabela_av, nomes_av, valores_av)
+        escrever(tabela_nt, nomes_nt, valores_nt)
+        escrever(tabela_ev, nomes_ev, valores_ev)
+    return n, len(valores_av[0]), len(valores_nt[0])
+
+
+class Command(BaseCommand):
+    help = (
+        "Popula o banco com usuários, pacientes, motoristas, corridas, avaliações "
+        "e notificações sintéticos para benchmarks. O resultado é determinístico "
+        "para a mesma semente e data de referência."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pacientes", type=int, default=10_000)
+        parser.add_argument("--motoristas", type=int, default=1_000)
+        parser.add_argument("--corridas", type=int, default=100_000)
+        parser.add_argument(
+            "--dias", type=int, default=365, help="Tamanho do histórico em dias."
+        )
+        parser.add_argument("--semente", type=int, default=42)
+        parser.add_argument(
+            "--referencia",
+            type=datetime.fromisoformat,
+            help="Instante tratado como 'agora' (ISO 8601). Padrão: a hora atual "
+            "truncada; fixe-o para gerar exatamente os mesmos dados.",
+        )
+        parser.add_argument(
+            "--tamanho-lote",
+            type=int,
+            default=20_000,
+            help="Corridas geradas e gravadas por transação.",
+        )
+        parser.add_argument(
+            "--processos",
+            type=int,
+            default=None,
+            help="Processos geradores (padrão: número de CPUs no PostgreSQL, "
+            "1 nos demais bancos).",
+        )
+        parser.add_argument(
+            "--limpar",
+            action="store_true",
+            help="Remove antes os dados gerados com a mesma semente.",
+        )
+
+    def handle(self, *args, **options):
+        if options["pacientes"] < 1 or options["motoristas"] < 1:
+            raise CommandError("São necessários ao menos um paciente e um motorista.")
+
+        semente = options["semente"]
+        self.prefixo = f"seed{semente}-"
+        referencia = options["referencia"] or timezone.now().replace(
+            minute=0, second=0, microsecond=0
+        )
+        if timezone.is_naive(referencia):
+            referencia = timezone.make_aware(referencia)
+        processos = options["processos"] or (
+            multiprocessing.cpu_count() if connection.vendor == "postgresql" else 1
+        )
+
+        if options["limpar"]:
+            self.limpar()
+        elif Usuario.objects.filter(email__startswith=self.prefixo).exists():
+            raise CommandError(
+                f"Já existem dados da semente {semente}; use --limpar para recriá-los."
+            )
+
+        inicio = time.perf_counter()
+        rng = np.random.default_rng([semente, 2**32 - 1])
+        pacientes, motoristas = self.criar_perfis(
+            rng, options["pacientes"], options["motoristas"], referencia
+        )
+        self.stdout.write(
+            f"{len(pacientes)} pacientes e {len(motoristas)} motoristas criados "
+            f"em {time.perf_counter() - inicio:.1f} s"
+        )
+
+        referencia_s = int(referencia.timestamp())
+        centros = np.column_stack(
+            (
+                rng.normal(LATITUDE_BASE, 0.12, len(BAIRROS)),
+                rng.normal(LONGITUDE_BASE, 0.14, len(BAIRROS)),
+            )
+        )
+        adaptados = np.nonzero(motoristas[:, 2])[0]
+        contexto = {
+            "semente": semente,
+            "corridas": options["corridas"],
+            "tamanho_lote": options["tamanho_lote"],
+            "dias": options["dias"],
+            "referencia": referencia_s,
+            "meia_noite": referencia_s - referencia_s % 86400,
+            "primeiro_id": (
+                Corrida.objects.order_by("-pk").values_list("pk", flat=True).first()
+                or 0
+            )
+            + 1,
+            "pacientes": pacientes,
+            "motoristas": motoristas,
+            "motoristas_adaptados": adaptados
+            if len(adaptados)
+            else np.arange(len(motoristas)),
+            "centros": centros,
+            "pesos_centros": rng.dirichlet(np.full(len(BAIRROS), 2.0)),
+        }
+
+        inicio = time.perf_counter()
+        lotes = range(math.ceil(options["corridas"] / options["tamanho_lote"]))
+        totais = np.zeros(3, dtype=np.int64)
+        if processos > 1:
+            connections.close_all()
+            contexto_mp = multiprocessing.get_context(
+                "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+            )
+            with ProcessPoolExecutor(
+                max_workers=processos,
+                mp_context=contexto_mp,
+                initializer=_inicializar_processo,
+                initargs=(contexto,),
+            ) as executor:
+                for feitos, contagem in enumerate(executor.map(gerar_lote, lotes), 1):
+                    totais += contagem
+                    self.progresso(feitos, len(lotes), totais[0], inicio)
+        else:
+            _contexto.update(contexto)
+            for feitos, indice in enumerate(lotes, 1):
+                totais += gerar_lote(indice)
+                self.progresso(feitos, len(lotes), totais[0], inicio)
+        duracao = time.perf_counter() - inicio
+
+        self.finalizar()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{totais[0]} corridas, {totais[1]} avaliações e {totais[2]} "
+                f"notificações em {duracao:.1f} s "
+                f"({totais[0] / max(duracao, 1e-9):,.0f} corridas/s, "
+                f"{processos} processo(s))"
+            )
+        )
+        self.stdout.write(
+            f"Usuários: {self.prefixo}p<n>@example.com e {self.prefixo}m<n>@example.com, "
+            f"senha '{SENHA_PADRAO}'"
+        )
+
+    def progresso(self, feitos, total, corridas, inicio):
+        if feitos == total or feitos % 10 == 0:
+            decorrido = time.perf_counter() - inicio
+            self.stdout.write(
+                f"  lote {feitos}/{total}: {corridas} corridas "
+                f"({corridas / max(decorrido, 1e-9):,.0f}/s)"
+            )
+
+    def criar_perfis(self, rng, n_pacientes, n_motoristas, referencia):
+        """
+        Cria usuários e perfis com ``bulk_create`` e retorna, para pacientes,
+        um array ``(id, usuario_id, cadeira)`` e, para motoristas,
+        ``(id, usuario_id, adaptado)``
+        """
+        senha = make_password(SENHA_PADRAO)
+        tamanho = 5_000
+
+        def criar_usuarios(tipo, letra, quantidade):
+            usuarios = [
+                Usuario(
+                    email=f"{self.prefixo}{letra}{i}@example.com",
+                    nome_completo=f"{tipo.label} Sintético {i}",
+                    cpf=f"{self.prefixo[4:]}{letra}{i}"[:14],
+                    tipo_usuario=tipo,
+                    telefone="(11) 90000-0000",
+                    password=senha,
+                )
+                for i in range(quantidade)
+            ]
+            return Usuario.objects.bulk_create(usuarios, batch_size=tamanho)
+
+        with transaction.atomic():
+            usuarios = criar_usuarios(TipoUsuario.PACIENTE, "p", n_pacientes)
+            cadeira = rng.random(n_pacientes) < 0.12
+            pacientes = Paciente.objects.bulk_create(
+                [
+                    Paciente(
+                        usuario=usuario,
+                        responsavel_nome=f"Responsável {i}",
+                        responsavel_cpf="000.000.000-00",
+                        responsavel_telefone="(11) 90000-0000",
+                        necessita_cadeira_rodas=bool(cadeira[i]),
+                        imunossuprimido=bool(rng.random() < 0.08),
+                        aceite_termos=True,
+                        data_aceite_termos=referencia,
+                    )
+                    for i, usuario in enumerate(usuarios)
+                ],
+                batch_size=tamanho,
+            )
+
+            usuarios = criar_usuarios(TipoUsuario.MOTORISTA, "m", n_motoristas)
+            adaptado = rng.random(n_motoristas) < 0.25
+            online = rng.random(n_motoristas) < 0.3
+            latitudes = np.round(rng.normal(LATITUDE_BASE, 0.1, n_motoristas), 8)
+            longitudes = np.round(rng.normal(LONGITUDE_BASE, 0.12, n_motoristas), 8)
+            motoristas = Motorista.objects.bulk_create(
+                [
+                    Motorista(
+                        usuario=usuario,
+                        marca_veiculo="Fiat",
+                        modelo_veiculo="Doblò" if adaptado[i] else "Uno",
+                        cor_veiculo="Branco",
+                        veiculo_adaptado=bool(adaptado[i]),
+                        status_aprovacao="aprovado",
+                        aceite_termos_voluntariado=True,
+                        data_aprovacao=referencia,
+                        online=bool(online[i]),
+                        latitude_atual=float(latitudes[i]) if online[i] else None,
+                        longitude_atual=float(longitudes[i]) if online[i] else None,
+                        data_localizacao=referencia if online[i] else None,
+                    )
+                    for i, usuario in enumerate(usuarios)
+                ],
+                batch_size=tamanho,
+            )
+
+        return (
+            np.array(
+                [(p.pk, p.usuario_id, c) for p, c in zip(pacientes, cadeira)],
+                dtype=np.int64,
+            ),
+            np.array(
+                [(m.pk, m.usuario_id, a) for m, a in zip(motoristas, adaptado)],
+                dtype=np.int64,
+            ),
+        )
+
+    def finalizar(self):
+        """
+        Ajusta a sequência de ids, recalcula os agregados dos motoristas e os
+        resumos diários e atualiza as estatísticas do planejador
+        """
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"(SELECT MAX(id) FROM {Corrida._meta.db_table}))",
+                    [Corrida._meta.db_table],
+                )
+
+        motoristas = Motorista.objects.filter(usuario__email__startswith=self.prefixo)
+        concluidas = (
+            Corrida.objects.filter(
+                motorista=OuterRef("pk"), status=CorridaStatus.CONCLUIDA
+            )
+            .order_by()
+            .values("motorista")
+            .annotate(n=Count("pk"))
+            .values("n")
+        )
+        motoristas.update(total_corridas=Coalesce(Subquery(concluidas), Value(0)))
+        recalcular_agregados(motoristas)
+
+        # As corridas foram gravadas sem passar pelos sinais e com eventos
+        # anteriores à marca dos resumos diários
+        invalidar_corridas()
+        atualizar_resumos(completo=True)
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                for modelo in (
+                    Usuario,
+                    Paciente,
+                    Motorista,
+                    Corrida,
+                    CorridaEvento,
+                    Avaliacao,
+                    Notificacao,
+                ):
+                    cursor.execute(f"ANALYZE {modelo._meta.db_table}")
+
+    def limpar(self):
+        """
+        Remove os dados da semente com DELETEs em SQL, na ordem das chaves
+        estrangeiras, sem carregar as linhas na memória
+        """
+        usuarios = Usuario.objects.filter(email__startswith=self.prefixo)
+        corridas = Corrida.objects.filter(
+            Q(paciente__usuario__in=usuarios) | Q(motorista__usuario__in=usuarios)
+        )
+        with transaction.atomic():
+            for queryset in (
+                CorridaEvento.objects.filter(corrida__in=corridas),
+                Notificacao.objects.filter(
+                    Q(usuario__in=usuarios) | Q(corrida__in=corridas)
+                ),
+                Avaliacao.objects.filter(
+                    Q(avaliador__in=usuarios) | Q(corrida__in=corridas)
+                ),
+                corridas,
+                Paciente.objects.filter(usuario__in=usuarios),
+                Motorista.objects.filter(usuario__in=usuarios),
+            ):
+                queryset._raw_delete(queryset.db)
+            apagados, _ = usuarios.delete()
+            invalidar_corridas()
+        self.stdout.write(
+            f"Dados anteriores da semente removidos ({apagados} usuários e relacionados)."
+        )
@@ -0,0 +1,103 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from rodas.tarefas import Worker, metricas
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa as tarefas em segundo plano (e-mails e notificações) "
+        "enfileiradas no Redis."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--nome",
+            default=None,
+            help=(
+                "Nome estável deste worker (padrão: nome da máquina). Cada "
+                "processo em execução precisa de um nome diferente."
+            ),
+        )
+        parser.add_argument(
+            "--tamanho-lote",
+            type=int,
+            default=100,
+            help="Tarefas retiradas da fila por vez.",
+        )
+        parser.add_argument(
+            "--espera",
+            type=float,
+            default=5.0,
+            help="Segundos de espera por novas tarefas antes de uma nova rodada.",
+        )
+        parser.add_argument(
+            "--uma-vez",
+            action="store_true",
+            help="Esvazia a fila e sai, em vez de continuar esperando.",
+        )
+        parser.add_argument(
+            "--metricas",
+            action="store_true",
+            help="Apenas mostra as métricas acumuladas de cada tarefa e sai.",
+        )
+
+    def handle(self, *args, **options):
+        if options["metricas"]:
+            self.mostrar_metricas()
+            return
+
+        worker = Worker(nome=options["nome"], espera=options["espera"])
+        recuperadas = worker.recuperar()
+        if recuperadas:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{recuperadas} tarefas interrompidas devolvidas à fila"
+                )
+            )
+
+        while True:
+            worker.liberar_agendadas()
+            brutas = worker.retirar(options["tamanho_lote"])
+            if not brutas:
+                if options["uma_vez"]:
+                    break
+                continue
+
+            close_old_connections()
+            inicio = time.perf_counter()
+            resultado = worker.processar(brutas)
+            duracao = (time.perf_counter() - inicio) * 1000
+            detalhes = ", ".join(
+                f"{nome}: {quantidade}"
+                for nome, quantidade in resultado.por_tarefa.items()
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{resultado.tarefas} tarefas ({detalhes}) em {duracao:.1f} ms; "
+                    f"{resultado.falhas} reagendadas, "
+                    f"{resultado.descartadas} descartadas"
+                )
+            )
+
+    def mostrar_metricas(self):
+        dados = metricas()
+        filas = dados.pop("filas")
+        self.stdout.write(
+            f"Na fila: {filas['na_fila']}, aguardando nova tentativa: "
+            f"{filas['agendadas']}, descartadas: {filas['descartadas']}"
+        )
+        for nome, valores in dados.items():
+            executadas = valores.get("executadas", 0)
+            lotes = valores.get("lotes", 0)
+            duracao = valores.get("duracao_total_ms", 0) / lotes if lotes else 0
+            espera = valores.get("espera_total_ms", 0) / executadas if executadas else 0
+            self.stdout.write(
+                f"{nome}: {executadas:.0f} executadas, "
+                f"{valores.get('falhas', 0):.0f} falhas, "
+                f"{valores.get('descartadas', 0):.0f} descartadas, "
+                f"{lotes:.0f} lotes ({duracao:.1f} ms por lote), "
+                f"espera média na fila de {espera:.1f} ms"
+            )
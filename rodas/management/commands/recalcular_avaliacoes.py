@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rodas.avaliacoes import recalcular_agregados
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula a partir das avaliações a soma, a quantidade e a média das "
+        "notas de cada motorista, em lotes, e corrige as divergências."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanho-lote",
+            type=int,
+            default=1000,
+            help="Motoristas conferidos por lote.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Apenas conta os motoristas com agregados divergentes.",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resultado = recalcular_agregados(
+            tamanho_lote=options["tamanho_lote"], corrigir=not options["dry_run"]
+        )
+        duracao = (time.perf_counter() - inicio) * 1000
+        acao = "encontrados" if options["dry_run"] else "corrigidos"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{resultado.motoristas} motoristas conferidos, "
+                f"{resultado.divergentes} divergentes {acao} em {duracao:.1f} ms"
+            )
+        )
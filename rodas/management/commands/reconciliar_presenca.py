@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from rodas.presenca import reconciliar
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove da presença no Redis os motoristas sem batimento recente e "
+        "sincroniza o campo Motorista.online em lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanho-lote",
+            type=int,
+            default=1000,
+            help="Motoristas atualizados por UPDATE.",
+        )
+        parser.add_argument(
+            "--intervalo",
+            type=float,
+            default=0,
+            help="Repete a reconciliação a cada N segundos (0 executa uma única vez).",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.perf_counter()
+            online, offline = reconciliar(tamanho_lote=options["tamanho_lote"])
+            duracao = (time.perf_counter() - inicio) * 1000
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{online} motoristas marcados online e {offline} offline "
+                    f"em {duracao:.1f} ms"
+                )
+            )
+            if options["intervalo"] <= 0:
+                break
+            time.sleep(options["intervalo"])
@@ -0,0 +1,135 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.utils.functional import SimpleLazyObject
+
+from .instrumentacao import (
+    LIMITE_REPETICOES_PADRAO,
+    RegistroConsultas,
+    orcamento_da_view,
+)
+from .models import Motorista, Paciente, TipoUsuario
+
+logger = logging.getLogger("rodas.consultas")
+
+
+def obter_perfil(usuario) -> Paciente | Motorista | None:
+    """
+    Retorna o perfil (paciente ou motorista) do usuário, ou ``None``
+    """
+    if not usuario.is_authenticated:
+        return None
+    try:
+        if usuario.tipo_usuario == TipoUsuario.PACIENTE:
+            return usuario.perfil_paciente
+        if usuario.tipo_usuario == TipoUsuario.MOTORISTA:
+            return usuario.perfil_motorista
+    except (Paciente.DoesNotExist, Motorista.DoesNotExist):
+        pass
+    return None
+
+
+def _instalar_coletor(registro: RegistroConsultas) -> None:
+    connection.execute_wrappers.append(registro)
+
+
+def _remover_coletor(registro: RegistroConsultas) -> None:
+    connection.execute_wrappers.remove(registro)
+
+
+class PerfilMiddleware:
+    """
+    Expõe ``request.perfil`` com o perfil do usuário logado.
+
+    Deve vir depois do ``AuthenticationMiddleware``. O perfil é resolvido de
+    forma preguiçosa e, com o ``PerfilBackend``, sem consulta adicional.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.perfil = SimpleLazyObject(lambda: obter_perfil(request.user))
+        # Sob ASGI, devolve a corrotina da próxima camada sem esperá-la aqui
+        return self.get_response(request)
+
+
+class OrcamentoConsultasMiddleware:
+    """
+    Registra as consultas de cada requisição e avisa sobre excessos.
+
+    Registra no logger ``rodas.consultas`` as views que passam do orçamento
+    declarado com ``orcamento_consultas`` e as requisições com SQL repetido
+    (``CONSULTAS_LIMITE_REPETICOES`` vezes ou mais). Com ``SERVER_TIMING``
+    (padrão: ``DEBUG``), envia o cabeçalho ``Server-Timing`` com o tempo de
+    banco e o total da requisição, visível nas ferramentas do navegador.
+
+    Funciona também sob ASGI, sem prender uma thread durante views
+    assíncronas (SSE, long-poll): o coletor é instalado na conexão da thread
+    em que o Django executa o código síncrono da requisição.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, "SERVER_TIMING", settings.DEBUG)
+        self.limite_repeticoes = getattr(
+            settings, "CONSULTAS_LIMITE_REPETICOES", LIMITE_REPETICOES_PADRAO
+        )
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        registro = RegistroConsultas()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(registro):
+            response = self.get_response(request)
+        return self.relatar(request, response, registro, inicio)
+
+    async def __acall__(self, request):
+        registro = RegistroConsultas()
+        inicio = time.perf_counter()
+        # A conexão é por thread: o coletor vai para a conexão da thread em que
+        # rodam as chamadas sync_to_async da requisição
+        await sync_to_async(_instalar_coletor)(registro)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remover_coletor)(registro)
+        return self.relatar(request, response, registro, inicio)
+
+    def relatar(self, request, response, registro, inicio):
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        match = request.resolver_match
+        rota = match.view_name if match else request.path
+        orcamento = orcamento_da_view(match.func) if match else None
+        if orcamento is not None and registro.total > orcamento:
+            logger.warning(
+                "%s executou %d consultas (orçamento: %d, %.1f ms no banco)",
+                rota,
+                registro.total,
+                orcamento,
+                registro.tempo_ms,
+            )
+        for sql, vezes in registro.repetidas(self.limite_repeticoes):
+            logger.warning("%s repetiu %d vezes a consulta: %.300s", rota, vezes, sql)
+
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={registro.tempo_ms:.1f};desc="{registro.total} consultas", '
+                f"total;dur={duracao_ms:.1f}"
+            )
+        return response
@@ -0,0 +1,33 @@
+"""
+Operações compartilhadas pelas migrações do app.
+"""
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class AddIndexConcurrentlyPostgreSQL(AddIndexConcurrently):
+    """
+    Cria o índice com CREATE INDEX CONCURRENTLY no PostgreSQL, sem bloquear
+    as escritas na tabela durante a construção; nos demais bancos, como o
+    AddIndex comum.
+
+    A migração que a usa precisa de ``atomic = False``: CREATE INDEX
+    CONCURRENTLY não roda dentro de uma transação.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+from rodas.geo import PRECISAO_PADRAO, codificar_geohash
+
+
+def preencher_geohash_origem(apps, schema_editor):
+    Corrida = apps.get_model('rodas', 'Corrida')
+    corridas = Corrida.objects.filter(
+        latitude_origem__isnull=False, longitude_origem__isnull=False
+    ).only('pk', 'latitude_origem', 'longitude_origem')
+    lote = []
+    for corrida in corridas.iterator(chunk_size=2000):
+        corrida.geohash_origem = codificar_geohash(
+            corrida.latitude_origem, corrida.longitude_origem, PRECISAO_PADRAO
+        )
+        lote.append(corrida)
+        if len(lote) >= 2000:
+            Corrida.objects.bulk_update(lote, ['geohash_origem'])
+            lote = []
+    if lote:
+        Corrida.objects.bulk_update(lote, ['geohash_origem'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodas', '0002_alter_corrida_motivo_cancelamento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corrida',
+            name='geohash_origem',
+            field=models.CharField(blank=True, editable=False, max_length=12, verbose_name='Geohash da Origem'),
+        ),
+        migrations.AddField(
+            model_name='motorista',
+            name='data_localizacao',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Data da Última Localização'),
+        ),
+        migrations.AddField(
+            model_name='motorista',
+            name='latitude_atual',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=10, null=True, verbose_name='Latitude Atual'),
+        ),
+        migrations.AddField(
+            model_name='motorista',
+            name='longitude_atual',
+            field=models.DecimalField(blank=True, decimal_places=8, max_digits=11, null=True, verbose_name='Longitude Atual'),
+        ),
+        migrations.RunPython(preencher_geohash_origem, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodas', '0003_corrida_geohash_motorista_localizacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motorista',
+            name='veiculo_adaptado',
+            field=models.BooleanField(default=False, help_text='Veículo comporta passageiro em cadeira de rodas', verbose_name='Veículo Adaptado'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 17:51
+
+from django.db import migrations, models
+
+from rodas.migracoes import AddIndexConcurrentlyPostgreSQL
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não roda dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('rodas', '0004_motorista_veiculo_adaptado'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyPostgreSQL(
+            model_name='corrida',
+            index=models.Index(fields=['status', 'data_hora_agendada'], name='corrida_status_agendada_idx'),
+        ),
+        AddIndexConcurrentlyPostgreSQL(
+            model_name='corrida',
+            index=models.Index(fields=['paciente', '-data_hora_agendada'], name='corrida_paciente_agendada_idx'),
+        ),
+        AddIndexConcurrentlyPostgreSQL(
+            model_name='corrida',
+            index=models.Index(fields=['motorista', '-data_hora_agendada'], name='corrida_motorista_agendada_idx'),
+        ),
+        AddIndexConcurrentlyPostgreSQL(
+            model_name='corrida',
+            index=models.Index(condition=models.Q(('motorista__isnull', True), ('status', 'pendente')), fields=['data_hora_agendada'], name='corrida_fila_despacho_idx'),
+        ),
+        AddIndexConcurrentlyPostgreSQL(
+            model_name='corrida',
+            index=models.Index(condition=models.Q(('motorista__isnull', True), ('status', 'pendente')), fields=['geohash_origem'], name='corrida_pendente_geohash_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        AddIndexConcurrentlyPostgreSQL(
+            model_name='notificacao',
+            index=models.Index(fields=['usuario', 'lida', '-data_criacao'], name='notificacao_usuario_lida_idx'),
+        ),
+    ]
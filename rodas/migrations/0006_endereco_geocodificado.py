@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodas', '0005_indices_consultas_frequentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnderecoGeocodificado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(help_text='SHA-1 do endereço normalizado', max_length=40, unique=True, verbose_name='Chave')),
+                ('endereco_normalizado', models.TextField(verbose_name='Endereço Normalizado')),
+                ('endereco_formatado', models.TextField(blank=True, verbose_name='Endereço Formatado')),
+                ('latitude', models.DecimalField(decimal_places=8, max_digits=10, verbose_name='Latitude')),
+                ('longitude', models.DecimalField(decimal_places=8, max_digits=11, verbose_name='Longitude')),
+                ('provedor', models.CharField(max_length=30, verbose_name='Provedor')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+            ],
+            options={
+                'verbose_name': 'Endereço Geocodificado',
+                'verbose_name_plural': 'Endereços Geocodificados',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodas', '0006_endereco_geocodificado'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PontoTrajeto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('registrado_em', models.DateTimeField(verbose_name='Registrado em')),
+                ('latitude', models.FloatField(verbose_name='Latitude')),
+                ('longitude', models.FloatField(verbose_name='Longitude')),
+                ('corrida', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='trajeto', to='rodas.corrida', verbose_name='Corrida')),
+            ],
+            options={
+                'verbose_name': 'Ponto de Trajeto',
+                'verbose_name_plural': 'Pontos de Trajeto',
+                'indexes': [models.Index(fields=['corrida', 'registrado_em'], name='ponto_trajeto_corrida_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+from rodas.migracoes import AddIndexConcurrentlyPostgreSQL
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não roda dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('rodas', '0007_ponto_trajeto'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyPostgreSQL(
+            model_name='corrida',
+            index=models.Index(fields=['id'], include=('data_atualizacao', 'paciente', 'motorista'), name='corrida_versao_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+from rodas.migracoes import AddIndexConcurrentlyPostgreSQL
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não roda dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('rodas', '0008_indice_versao_corrida'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyPostgreSQL(
+            model_name='notificacao',
+            index=models.Index(fields=['usuario', '-data_criacao', '-id'], name='notificacao_usuario_data_idx'),
+        ),
+    ]
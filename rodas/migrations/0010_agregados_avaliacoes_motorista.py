@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def preencher_agregados(apps, schema_editor):
+    Avaliacao = apps.get_model('rodas', 'Avaliacao')
+    Motorista = apps.get_model('rodas', 'Motorista')
+    recebidas = (
+        Avaliacao.objects.filter(
+            avaliado=OuterRef('usuario'), tipo_avaliacao='paciente_avalia_motorista'
+        )
+        .order_by()
+        .values('avaliado')
+    )
+    Motorista.objects.update(
+        soma_avaliacoes=Coalesce(
+            Subquery(recebidas.annotate(soma=Sum('nota')).values('soma')), Value(0)
+        ),
+        total_avaliacoes=Coalesce(
+            Subquery(recebidas.annotate(total=Count('pk')).values('total')), Value(0)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodas', '0009_indice_caixa_notificacoes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='motorista',
+            name='soma_avaliacoes',
+            field=models.PositiveIntegerField(default=0, verbose_name='Soma das Notas'),
+        ),
+        migrations.AddField(
+            model_name='motorista',
+            name='total_avaliacoes',
+            field=models.PositiveIntegerField(default=0, verbose_name='Total de Avaliações'),
+        ),
+        migrations.RunPython(preencher_agregados, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Status registrado e coluna de data correspondente em Corrida
+DATAS_POR_STATUS = [
+    ('pendente', 'data_criacao'),
+    ('aceita', 'data_hora_aceite'),
+    ('em_andamento', 'data_hora_inicio'),
+    ('motorista_chegou', 'data_hora_chegada'),
+    ('concluida', 'data_hora_finalizacao'),
+    ('cancelada', 'data_cancelamento'),
+]
+
+
+def preencher_eventos(apps, schema_editor):
+    """
+    Gera os eventos das corridas existentes a partir das colunas de data, num
+    único INSERT ... SELECT em ordem de tempo
+    """
+    Corrida = apps.get_model('rodas', 'Corrida')
+    CorridaEvento = apps.get_model('rodas', 'CorridaEvento')
+    quote = schema_editor.quote_name
+    selects = []
+    parametros = []
+    for status, campo in DATAS_POR_STATUS:
+        motorista = 'NULL' if status == 'pendente' else quote('motorista_id')
+        autor = quote('cancelada_por_id') if status == 'cancelada' else 'NULL'
+        selects.append(
+            f'SELECT {quote("id")}, %s, {quote(campo)}, {motorista}, {autor} '
+            f'FROM {quote(Corrida._meta.db_table)} WHERE {quote(campo)} IS NOT NULL'
+        )
+        parametros.append(status)
+    colunas = ', '.join(
+        quote(coluna)
+        for coluna in ('corrida_id', 'status', 'registrado_em', 'motorista_id', 'autor_id')
+    )
+    schema_editor.execute(
+        f'INSERT INTO {quote(CorridaEvento._meta.db_table)} ({colunas}) '
+        f'SELECT * FROM ({" UNION ALL ".join(selects)}) AS eventos ORDER BY 3',
+        parametros,
+    )
+
+
+def criar_indice_brin(apps, schema_editor):
+    # BRIN só existe no PostgreSQL; nos demais bancos a tabela fica sem
+    # índice de tempo
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX corrida_evento_registrado_brin '
+        'ON rodas_corridaevento USING brin (registrado_em)'
+    )
+
+
+def remover_indice_brin(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS corrida_evento_registrado_brin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodas', '0010_agregados_avaliacoes_motorista'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorridaEvento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('aceita', 'Aceita'), ('em_andamento', 'Em Andamento'), ('motorista_chegou', 'Motorista Chegou'), ('concluida', 'Concluída'), ('cancelada', 'Cancelada')], max_length=20, verbose_name='Status')),
+                ('registrado_em', models.DateTimeField(verbose_name='Registrado em')),
+                ('autor', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Autor')),
+                ('corrida', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos', to='rodas.corrida', verbose_name='Corrida')),
+                ('motorista', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='rodas.motorista', verbose_name='Motorista')),
+            ],
+            options={
+                'verbose_name': 'Evento de Corrida',
+                'verbose_name_plural': 'Eventos de Corrida',
+            },
+        ),
+        migrations.RunPython(preencher_eventos, migrations.RunPython.noop),
+        migrations.RunPython(criar_indice_brin, remover_indice_brin),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rodas', '0011_corrida_evento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaAtualizacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=50, unique=True, verbose_name='Nome')),
+                ('marca', models.DateTimeField(verbose_name='Processado até')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Marca de Atualização',
+                'verbose_name_plural': 'Marcas de Atualização',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(verbose_name='Dia')),
+                ('cidade', models.CharField(blank=True, max_length=100, verbose_name='Cidade')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Corridas')),
+                ('pendentes', models.PositiveIntegerField(default=0, verbose_name='Pendentes')),
+                ('em_curso', models.PositiveIntegerField(default=0, verbose_name='Em curso')),
+                ('concluidas', models.PositiveIntegerField(default=0, verbose_name='Concluídas')),
+                ('canceladas', models.PositiveIntegerField(default=0, verbose_name='Canceladas')),
+                ('motoristas_ativos', models.PositiveIntegerField(default=0, verbose_name='Motoristas ativos')),
+                ('aceite_p50_segundos', models.PositiveIntegerField(blank=True, null=True, verbose_name='Tempo até o aceite (mediana, s)')),
+                ('aceite_p90_segundos', models.PositiveIntegerField(blank=True, null=True, verbose_name='Tempo até o aceite (p90, s)')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+            ],
+            options={
+                'verbose_name': 'Resumo Diário',
+                'verbose_name_plural': 'Resumos Diários',
+                'ordering': ['-dia', 'cidade'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumodiario',
+            constraint=models.UniqueConstraint(fields=('dia', 'cidade'), name='resumo_diario_dia_cidade_unico'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+from rodas.migracoes import AddIndexConcurrentlyPostgreSQL
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não roda dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('rodas', '0012_resumos_diarios'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyPostgreSQL(
+            model_name='corrida',
+            index=models.Index(fields=['data_criacao'], name='corrida_criacao_idx'),
+        ),
+    ]
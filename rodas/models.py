@@ -6,6 +6,16 @@ from django.utils import timezone
 from decimal import Decimal
 from typing import Any
 
+import numpy as np
+
+from .distancias import coordenadas_de, matriz_distancias_km
+from .geo import (
+    PRECISAO_PADRAO,
+    celulas_vizinhas,
+    codificar_geohash,
+    precisao_para_raio,
+)
+
 
 class UserManager(BaseUserManager):
     """
@@ -261,6 +271,11 @@ class Motorista(models.Model):
         verbose_name="Status da Aprovação",
     )
     online = models.BooleanField(default=False, verbose_name="Motorista Online")
+    veiculo_adaptado = models.BooleanField(
+        default=False,
+        verbose_name="Veículo Adaptado",
+        help_text="Veículo comporta passageiro em cadeira de rodas",
+    )
     aceite_termos_voluntariado = models.BooleanField(
         default=False, verbose_name="Aceite dos Termos de Voluntariado"
     )
@@ -273,6 +288,14 @@ class Motorista(models.Model):
         default=Decimal("0.00"),
         verbose_name="Avaliação Média",
     )
+    # Soma e quantidade das notas recebidas; mantidas junto com a média a cada
+    # avaliação (rodas.avaliacoes), sem recalcular AVG sobre todas as linhas
+    soma_avaliacoes = models.PositiveIntegerField(
+        default=0, verbose_name="Soma das Notas"
+    )
+    total_avaliacoes = models.PositiveIntegerField(
+        default=0, verbose_name="Total de Avaliações"
+    )
     total_corridas = models.IntegerField(
         default=0, verbose_name="Total de Corridas Realizadas"
     )
@@ -283,6 +306,25 @@ class Motorista(models.Model):
         blank=True, verbose_name="Observações da Administração"
     )
 
+    # Última posição conhecida
+    latitude_atual = models.DecimalField(
+        max_digits=10,
+        decimal_places=8,
+        null=True,
+        blank=True,
+        verbose_name="Latitude Atual",
+    )
+    longitude_atual = models.DecimalField(
+        max_digits=11,
+        decimal_places=8,
+        null=True,
+        blank=True,
+        verbose_name="Longitude Atual",
+    )
+    data_localizacao = models.DateTimeField(
+        null=True, blank=True, verbose_name="Data da Última Localização"
+    )
+
     class Meta:
         verbose_name = "Motorista"
         verbose_name_plural = "Motoristas"
@@ -298,6 +340,10 @@ class Motorista(models.Model):
     def veiculo_completo(self) -> str:
         return f"{self.marca_veiculo} {self.modelo_veiculo} {self.cor_veiculo}"
 
+    @property
+    def tem_localizacao(self) -> bool:
+        return self.latitude_atual is not None and self.longitude_atual is not None
+
 
 class CorridaStatus(models.TextChoices):
     PENDENTE = "pendente", "Pendente"
@@ -308,6 +354,82 @@ class CorridaStatus(models.TextChoices):
     CANCELADA = "cancelada", "Cancelada"
 
 
+class CorridaQuerySet(models.QuerySet):
+    """
+    Consultas reutilizáveis sobre corridas
+    """
+
+    def pendentes(self) -> "CorridaQuerySet":
+        """
+        Corridas aguardando motorista
+        """
+        return self.filter(status=CorridaStatus.PENDENTE, motorista__isnull=True)
+
+    def proximas(
+        self,
+        latitude: Decimal | float,
+        longitude: Decimal | float,
+        raio_km: float = 10.0,
+        limite: int = 10,
+    ) -> list["Corrida"]:
+        """
+        Retorna as ``limite`` corridas mais próximas do ponto dentro do raio.
+
+        Os candidatos são selecionados pelo prefixo do geohash de origem (célula
+        do ponto e vizinhas), lendo apenas id e coordenadas; as distâncias são
+        calculadas em bloco e só as corridas escolhidas são carregadas por
+        completo. Cada corrida retornada recebe o atributo ``distancia_km``.
+
+        Se sobrarem vagas, a lista é completada com as corridas sem geohash de
+        origem (endereço que a geocodificação não resolveu), por data agendada
+        e com ``distancia_km`` nulo: elas não têm posição para entrar no raio,
+        mas continuam válidas.
+        """
+        precisao = precisao_para_raio(latitude, raio_km)
+        prefixos = models.Q()
+        for celula in celulas_vizinhas(latitude, longitude, precisao):
+            prefixos |= models.Q(geohash_origem__startswith=celula)
+
+        ids, coordenadas = coordenadas_de(
+            self.filter(prefixos).order_by(), "latitude_origem", "longitude_origem"
+        )
+        distancias = matriz_distancias_km(
+            [(latitude, longitude)], coordenadas, usar_cache=False
+        )[0]
+        dentro = np.flatnonzero(distancias <= raio_km)
+        escolhidas = dentro[np.lexsort((ids[dentro], distancias[dentro]))][:limite]
+
+        corridas = self.in_bulk(ids[escolhidas].tolist())
+        resultado = []
+        for indice in escolhidas:
+            corrida = corridas[int(ids[indice])]
+            corrida.distancia_km = round(float(distancias[indice]), 2)
+            resultado.append(corrida)
+
+        if len(resultado) < limite:
+            for corrida in self.filter(geohash_origem="").order_by(
+                "data_hora_agendada", "pk"
+            )[: limite - len(resultado)]:
+                corrida.distancia_km = None
+                resultado.append(corrida)
+        return resultado
+
+    def contagem_por_status(self) -> dict[str, int]:
+        """
+        Conta as corridas do queryset por status numa única agregação.
+
+        Retorna um dicionário com a chave ``total`` e uma chave para cada
+        valor de ``CorridaStatus``.
+        """
+        return self.aggregate(
+            total=models.Count("pk"),
+            **{
+                status: models.Count("pk", filter=models.Q(status=status))
+                for status in CorridaStatus.values
+            },
+        )
+
+
 class Corrida(models.Model):
     """
     Modelo principal para as corridas/viagens
@@ -344,6 +466,12 @@ class Corrida(models.Model):
         blank=True,
         verbose_name="Longitude Origem",
     )
+    geohash_origem = models.CharField(
+        max_length=12,
+        blank=True,
+        editable=False,
+        verbose_name="Geohash da Origem",
+    )
 
     endereco_destino = models.TextField(verbose_name="Endereço de Destino")
     latitude_destino = models.DecimalField(
@@ -420,10 +548,81 @@ class Corrida(models.Model):
         verbose_name="Cancelada Por",
     )
 
+    objects = CorridaQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Corrida"
         verbose_name_plural = "Corridas"
         ordering = ["-data_criacao"]
+        indexes = [
+            models.Index(
+                fields=["status", "data_hora_agendada"],
+                name="corrida_status_agendada_idx",
+            ),
+            models.Index(
+                fields=["paciente", "-data_hora_agendada"],
+                name="corrida_paciente_agendada_idx",
+            ),
+            models.Index(
+                fields=["motorista", "-data_hora_agendada"],
+                name="corrida_motorista_agendada_idx",
+            ),
+            # Fila de despacho: só as corridas ainda sem motorista
+            models.Index(
+                fields=["data_hora_agendada"],
+                condition=models.Q(
+                    status=CorridaStatus.PENDENTE, motorista__isnull=True
+                ),
+                name="corrida_fila_despacho_idx",
+            ),
+            # Busca por proximidade (LIKE 'prefixo%') entre as pendentes
+            models.Index(
+                fields=["geohash_origem"],
+                opclasses=["varchar_pattern_ops"],
+                condition=models.Q(
+                    status=CorridaStatus.PENDENTE, motorista__isnull=True
+                ),
+                name="corrida_pendente_geohash_idx",
+            ),
+            # Recorte por dia de criação (resumos diários, rodas.resumos)
+            models.Index(fields=["data_criacao"], name="corrida_criacao_idx"),
+            # Verificação de versão (ETag) da API de corridas só pelo índice,
+            # sem ler a linha da tabela
+            models.Index(
+                fields=["id"],
+                include=["data_atualizacao", "paciente", "motorista"],
+                name="corrida_versao_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        corrida = super().from_db(db, field_names, values)
+        # Donos e status carregados do banco, para invalidar também o cache do
+        # anterior quando a corrida muda de paciente ou de motorista, e o das
+        # listas de pendentes quando ela deixa de estar pendente (rodas.signals)
+        corrida._donos_originais = (
+            corrida.__dict__.get("paciente_id"),
+            corrida.__dict__.get("motorista_id"),
+        )
+        corrida._status_original = corrida.__dict__.get("status")
+        return corrida
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        self.geohash_origem = self.calcular_geohash_origem()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            "latitude_origem" in update_fields or "longitude_origem" in update_fields
+        ):
+            kwargs["update_fields"] = {*update_fields, "geohash_origem"}
+        super().save(*args, **kwargs)
+
+    def calcular_geohash_origem(self) -> str:
+        if self.latitude_origem is None or self.longitude_origem is None:
+            return ""
+        return codificar_geohash(
+            self.latitude_origem, self.longitude_origem, PRECISAO_PADRAO
+        )
 
     def __str__(self) -> str:
         paciente_nome = (
@@ -555,16 +754,30 @@ class Notificacao(models.Model):
         verbose_name = "Notificação"
         verbose_name_plural = "Notificações"
         ordering = ["-data_criacao"]
+        indexes = [
+            models.Index(
+                fields=["usuario", "lida", "-data_criacao"],
+                name="notificacao_usuario_lida_idx",
+            ),
+            # Caixa de notificações paginada por cursor
+            models.Index(
+                fields=["usuario", "-data_criacao", "-id"],
+                name="notificacao_usuario_data_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         usuario_nome = self.usuario.get_full_name() or self.usuario.username
         return f"Notificação: {self.titulo} - {usuario_nome}"
 
     def marcar_como_lida(self) -> None:
+        from .notificacoes import marcar_como_lidas
+
         if not self.lida:
+            agora = timezone.now()
+            marcar_como_lidas(self.usuario_id, [self.pk], agora=agora)
             self.lida = True
-            self.data_leitura = timezone.now()
-            self.save(update_fields=["lida", "data_leitura"])
+            self.data_leitura = agora
 
 
 class Configuracao(models.Model):
@@ -588,3 +801,182 @@ class Configuracao(models.Model):
         if len(valor_str) > 50:
             return f"{self.chave}: {valor_str[:50]}..."
         return f"{self.chave}: {valor_str}"
+
+
+class EnderecoGeocodificado(models.Model):
+    """
+    Cache persistente de geocodificação, indexado pelo endereço normalizado
+    """
+
+    chave = models.CharField(
+        max_length=40,
+        unique=True,
+        verbose_name="Chave",
+        help_text="SHA-1 do endereço normalizado",
+    )
+    endereco_normalizado = models.TextField(verbose_name="Endereço Normalizado")
+    endereco_formatado = models.TextField(blank=True, verbose_name="Endereço Formatado")
+    latitude = models.DecimalField(
+        max_digits=10, decimal_places=8, verbose_name="Latitude"
+    )
+    longitude = models.DecimalField(
+        max_digits=11, decimal_places=8, verbose_name="Longitude"
+    )
+    provedor = models.CharField(max_length=30, verbose_name="Provedor")
+    data_criacao = models.DateTimeField(
+        auto_now_add=True, verbose_name="Data de Criação"
+    )
+
+    class Meta:
+        verbose_name = "Endereço Geocodificado"
+        verbose_name_plural = "Endereços Geocodificados"
+
+    def __str__(self) -> str:
+        return f"{self.endereco_normalizado} ({self.latitude}, {self.longitude})"
+
+
+class PontoTrajeto(models.Model):
+    """
+    Posição do motorista registrada durante uma corrida em andamento.
+
+    Gravada em lote a partir do buffer do Redis (``rodas.trajetos``); a tabela
+    só recebe inserções.
+    """
+
+    corrida = models.ForeignKey(
+        Corrida,
+        on_delete=models.CASCADE,
+        related_name="trajeto",
+        # Coberto pelo índice (corrida, registrado_em)
+        db_index=False,
+        verbose_name="Corrida",
+    )
+    registrado_em = models.DateTimeField(verbose_name="Registrado em")
+    latitude = models.FloatField(verbose_name="Latitude")
+    longitude = models.FloatField(verbose_name="Longitude")
+
+    class Meta:
+        verbose_name = "Ponto de Trajeto"
+        verbose_name_plural = "Pontos de Trajeto"
+        indexes = [
+            models.Index(
+                fields=["corrida", "registrado_em"],
+                name="ponto_trajeto_corrida_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Corrida #{self.corrida_id} ({self.latitude}, {self.longitude})"
+
+
+class CorridaEvento(models.Model):
+    """
+    Registro de cada mudança de status de uma corrida, incluindo a criação.
+
+    Gravado na mesma transação da mudança (``rodas.transicoes``) e nunca
+    alterado. Análises do ciclo de vida (tempo do pedido ao aceite, por
+    exemplo) leem esta tabela estreita por intervalo de ``registrado_em``, que
+    no PostgreSQL tem um índice BRIN: as linhas chegam em ordem de tempo e o
+    índice ocupa poucas páginas.
+    """
+
+    corrida = models.ForeignKey(
+        Corrida,
+        on_delete=models.CASCADE,
+        related_name="eventos",
+        verbose_name="Corrida",
+    )
+    status = models.CharField(
+        max_length=20, choices=CorridaStatus.choices, verbose_name="Status"
+    )
+    registrado_em = models.DateTimeField(verbose_name="Registrado em")
+    # O histórico não muda quando o motorista ou o usuário é removido
+    motorista = models.ForeignKey(
+        Motorista,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Motorista",
+    )
+    autor = models.ForeignKey(
+        Usuario,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        null=True,
+        blank=True,
+        related_name="+",
+        verbose_name="Autor",
+    )
+
+    class Meta:
+        verbose_name = "Evento de Corrida"
+        verbose_name_plural = "Eventos de Corrida"
+
+    def __str__(self) -> str:
+        return f"Corrida #{self.corrida_id}: {self.get_status_display()}"
+
+
+class ResumoDiario(models.Model):
+    """
+    Totais das corridas criadas num dia, por cidade do paciente.
+
+    Tabela derivada, mantida pelo comando ``atualizar_resumos``
+    (``rodas.resumos``); o painel de análise do admin lê apenas dela.
+    """
+
+    dia = models.DateField(verbose_name="Dia")
+    cidade = models.CharField(max_length=100, blank=True, verbose_name="Cidade")
+    total = models.PositiveIntegerField(default=0, verbose_name="Corridas")
+    pendentes = models.PositiveIntegerField(default=0, verbose_name="Pendentes")
+    em_curso = models.PositiveIntegerField(default=0, verbose_name="Em curso")
+    concluidas = models.PositiveIntegerField(default=0, verbose_name="Concluídas")
+    canceladas = models.PositiveIntegerField(default=0, verbose_name="Canceladas")
+    motoristas_ativos = models.PositiveIntegerField(
+        default=0, verbose_name="Motoristas ativos"
+    )
+    aceite_p50_segundos = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Tempo até o aceite (mediana, s)"
+    )
+    aceite_p90_segundos = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Tempo até o aceite (p90, s)"
+    )
+    data_atualizacao = models.DateTimeField(
+        auto_now=True, verbose_name="Última Atualização"
+    )
+
+    class Meta:
+        verbose_name = "Resumo Diário"
+        verbose_name_plural = "Resumos Diários"
+        ordering = ["-dia", "cidade"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dia", "cidade"], name="resumo_diario_dia_cidade_unico"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.dia:%d/%m/%Y} - {self.cidade or 'Sem cidade'}"
+
+
+class MarcaAtualizacao(models.Model):
+    """
+    Até onde uma tabela derivada já foi atualizada (marca d'água), para que a
+    próxima atualização processe apenas o que mudou depois dela
+    """
+
+    nome = models.CharField(max_length=50, unique=True, verbose_name="Nome")
+    marca = models.DateTimeField(verbose_name="Processado até")
+    data_atualizacao = models.DateTimeField(
+        auto_now=True, verbose_name="Última Atualização"
+    )
+
+    class Meta:
+        verbose_name = "Marca de Atualização"
+        verbose_name_plural = "Marcas de Atualização"
+
+    def __str__(self) -> str:
+        return f"{self.nome}: {self.marca:%d/%m/%Y %H:%M}"
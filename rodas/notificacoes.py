@@ -0,0 +1,110 @@
+"""
+Caixa de notificações: contador de não lidas no Redis e marcação em lote.
+
+O selo de não lidas aparece em todas as páginas, então ``contar_nao_lidas``
+lê o número de uma chave do Redis por usuário em vez de contar no banco. A
+chave é preenchida com um ``COUNT`` na primeira leitura e depois ajustada
+incrementalmente: ``ajustar_contadores`` soma as notificações criadas (na
+tarefa ``criar_notificacoes``) e subtrai as marcadas como lidas
+(``marcar_como_lidas``, um único UPDATE).
+
+Os ajustes só valem para contadores já preenchidos: ``INCRBY`` numa chave
+ausente criaria um contador sem a contagem base, então chaves sem TTL (que
+não vieram de uma contagem) são descartadas logo em seguida. O TTL também
+limita o tempo de vida de uma eventual divergência, e a caixa de entrada
+recalcula o contador a cada visita.
+"""
+
+import logging
+from collections.abc import Iterable
+from datetime import datetime
+
+import redis
+from django.db import transaction
+from django.utils import timezone
+
+from .conexao_redis import obter_redis
+from .models import Notificacao
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = "notificacoes:nao_lidas"
+TTL_CONTADOR = 10 * 60
+
+
+def chave_contador(usuario_id: int) -> str:
+    return f"{PREFIXO}:{usuario_id}"
+
+
+def sincronizar_contador(usuario_id: int) -> int:
+    """
+    Conta as não lidas no banco e grava o resultado no Redis
+    """
+    total = Notificacao.objects.filter(usuario_id=usuario_id, lida=False).count()
+    try:
+        obter_redis().set(chave_contador(usuario_id), total, ex=TTL_CONTADOR)
+    except redis.RedisError:
+        logger.exception("Falha ao gravar o contador de notificações no Redis")
+    return total
+
+
+def contar_nao_lidas(usuario_id: int) -> int:
+    """
+    Número de notificações não lidas do usuário, sem consulta ao banco
+    enquanto o contador estiver no Redis
+    """
+    try:
+        valor = obter_redis().get(chave_contador(usuario_id))
+    except redis.RedisError:
+        logger.exception("Falha ao ler o contador de notificações no Redis")
+        return Notificacao.objects.filter(usuario_id=usuario_id, lida=False).count()
+    if valor is None:
+        return sincronizar_contador(usuario_id)
+    return int(valor)
+
+
+def ajustar_contadores(variacoes: dict[int, int]) -> None:
+    """
+    Soma ``variacoes`` (usuário -> variação) aos contadores já preenchidos
+    """
+    variacoes = {usuario_id: n for usuario_id, n in variacoes.items() if n}
+    if not variacoes:
+        return
+    try:
+        conexao = obter_redis()
+        with conexao.pipeline() as pipe:
+            for usuario_id, n in variacoes.items():
+                pipe.incrby(chave_contador(usuario_id), n)
+                pipe.ttl(chave_contador(usuario_id))
+            respostas = pipe.execute()
+        # Sem TTL, a chave acabou de ser criada pelo INCRBY; abaixo de zero,
+        # o contador divergiu. Nos dois casos, a próxima leitura recalcula.
+        descartar = [
+            chave_contador(usuario_id)
+            for usuario_id, valor, ttl in zip(
+                variacoes, respostas[::2], respostas[1::2]
+            )
+            if ttl == -1 or valor < 0
+        ]
+        if descartar:
+            conexao.delete(*descartar)
+    except redis.RedisError:
+        logger.exception("Falha ao ajustar os contadores de notificações no Redis")
+
+
+def marcar_como_lidas(
+    usuario_id: int,
+    ids: Iterable[int] | None = None,
+    agora: datetime | None = None,
+) -> int:
+    """
+    Marca como lidas, num único UPDATE, as notificações ``ids`` do usuário
+    (ou todas, sem ``ids``); retorna quantas mudaram
+    """
+    notificacoes = Notificacao.objects.filter(usuario_id=usuario_id, lida=False)
+    if ids is not None:
+        notificacoes = notificacoes.filter(pk__in=list(ids))
+    total = notificacoes.update(lida=True, data_leitura=agora or timezone.now())
+    if total:
+        transaction.on_commit(lambda: ajustar_contadores({usuario_id: -total}))
+    return total
@@ -0,0 +1,158 @@
+"""
+Paginação por cursor (keyset) para listagens de corridas e notificações.
+
+Em vez de ``OFFSET``, cada página continua a partir da chave da última
+linha exibida, ``(campo, id)`` (por padrão, ``data_hora_agendada``), o que
+mantém o custo constante em qualquer profundidade e dispensa o ``COUNT(*)``
+a cada requisição. Os cursores são opacos para o cliente: um JSON em base64
+com a chave e a direção da navegação.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+
+CAMPO_ORDENACAO = "data_hora_agendada"
+
+
+@dataclass
+class PaginaCursor:
+    """
+    Uma página de resultados e os cursores para as páginas vizinhas
+    """
+
+    object_list: list = field(default_factory=list)
+    proximo: str | None = None
+    anterior: str | None = None
+    total_aproximado: int | None = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.proximo is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.anterior is not None
+
+    @property
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+
+def codificar_cursor(objeto, direcao: str, campo: str = CAMPO_ORDENACAO) -> str:
+    """
+    Gera o cursor opaco que aponta para ``objeto`` na direção informada
+    """
+    dados = {
+        "d": getattr(objeto, campo).isoformat(),
+        "id": objeto.pk,
+        "s": direcao,
+    }
+    bruto = json.dumps(dados, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[datetime, int, str] | None:
+    """
+    Lê um cursor; retorna ``None`` se ele estiver malformado
+    """
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        dados = json.loads(bruto)
+        direcao = dados["s"]
+        if direcao not in ("p", "a"):
+            return None
+        return datetime.fromisoformat(dados["d"]), int(dados["id"]), direcao
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
+
+def chave_cursor(cursor: str | None) -> str:
+    """
+    Forma canônica do cursor, para chaves de cache; vazia para cursores
+    ausentes ou malformados, que levam à primeira página
+    """
+    chave = decodificar_cursor(cursor) if cursor else None
+    if chave is None:
+        return ""
+    data, pk, direcao = chave
+    return f"{direcao}:{data.isoformat()}:{pk}"
+
+
+def estimar_total(queryset: QuerySet) -> int:
+    """
+    Total aproximado de linhas do queryset.
+
+    No PostgreSQL usa a estimativa do planejador (``EXPLAIN``), que não
+    percorre a tabela; nos demais bancos faz o ``COUNT(*)`` exato.
+    """
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    plano = json.loads(queryset.order_by().explain(format="json"))
+    return int(plano[0]["Plan"]["Plan Rows"])
+
+
+def paginar_por_cursor(
+    queryset: QuerySet,
+    cursor: str | None,
+    por_pagina: int = 10,
+    com_total: bool = False,
+    campo: str = CAMPO_ORDENACAO,
+) -> PaginaCursor:
+    """
+    Retorna a página indicada pelo cursor, da linha mais recente para a mais
+    antiga segundo ``campo`` (uma data).
+
+    Cursores inválidos levam à primeira página, como ``Paginator.get_page``.
+    Com ``com_total``, inclui o total aproximado de linhas do queryset.
+    """
+    chave = decodificar_cursor(cursor) if cursor else None
+    pagina = PaginaCursor()
+    if com_total:
+        pagina.total_aproximado = estimar_total(queryset)
+
+    if chave is None:
+        linhas = list(queryset.order_by(f"-{campo}", "-id")[: por_pagina + 1])
+        ha_mais, ha_outra_ponta = len(linhas) > por_pagina, False
+        linhas = linhas[:por_pagina]
+    else:
+        data, pk, direcao = chave
+        # O filtro redundante "lte"/"gte" sobre a data dá ao banco um limite de
+        # intervalo no índice; o OR só desempata linhas com a mesma data.
+        if direcao == "p":
+            linhas = list(
+                queryset.filter(
+                    Q(**{f"{campo}__lte": data}),
+                    Q(**{f"{campo}__lt": data}) | Q(id__lt=pk),
+                ).order_by(f"-{campo}", "-id")[: por_pagina + 1]
+            )
+            ha_mais = len(linhas) > por_pagina
+            linhas = linhas[:por_pagina]
+        else:
+            linhas = list(
+                queryset.filter(
+                    Q(**{f"{campo}__gte": data}),
+                    Q(**{f"{campo}__gt": data}) | Q(id__gt=pk),
+                ).order_by(campo, "id")[: por_pagina + 1]
+            )
+            ha_mais = len(linhas) > por_pagina
+            linhas = linhas[:por_pagina][::-1]
+        ha_outra_ponta = True
+
+    pagina.object_list = linhas
+    if not linhas:
+        return pagina
+
+    seguindo_em_frente = chave is None or chave[2] == "p"
+    ha_proxima = ha_mais if seguindo_em_frente else ha_outra_ponta
+    ha_anterior = ha_outra_ponta if seguindo_em_frente else ha_mais
+    if ha_proxima:
+        pagina.proximo = codificar_cursor(linhas[-1], "p", campo)
+    if ha_anterior:
+        pagina.anterior = codificar_cursor(linhas[0], "a", campo)
+    return pagina
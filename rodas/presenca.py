@@ -0,0 +1,127 @@
+"""
+Presença dos motoristas online, mantida num conjunto ordenado do Redis.
+
+Cada motorista online é um membro de ``CHAVE_ONLINE`` cuja pontuação é o
+horário (epoch) do último batimento. O painel do motorista envia um batimento
+a cada ``PRESENCA_INTERVALO_BATIMENTO`` segundos; quem fica mais de
+``PRESENCA_TTL`` segundos sem bater (fechou o aplicativo, perdeu a conexão)
+deixa de ser considerado online sem que nada precise ser gravado. Consultar
+um motorista custa O(1) (``ZSCORE``) e listar os online O(log n + k)
+(``ZRANGEBYSCORE``), sem ir ao banco.
+
+O campo ``Motorista.online`` continua existindo para o admin e relatórios, mas
+deixa de ser escrito a cada alternância: o comando ``reconciliar_presenca``
+remove os membros expirados e sincroniza o campo em lotes.
+
+Se o Redis estiver indisponível, as leituras usam o campo do banco e as
+escritas gravam nele diretamente, para que o sistema continue funcionando.
+"""
+
+import logging
+import time
+
+import redis
+from django.conf import settings
+
+from .conexao_redis import obter_redis
+from .models import Motorista
+
+logger = logging.getLogger(__name__)
+
+CHAVE_ONLINE = "presenca:motoristas"
+
+
+def _limite(agora: float | None = None) -> float:
+    """
+    Pontuação mínima de um batimento ainda válido
+    """
+    return (agora or time.time()) - settings.PRESENCA_TTL
+
+
+def marcar_online(motorista: Motorista, agora: float | None = None) -> None:
+    try:
+        obter_redis().zadd(CHAVE_ONLINE, {motorista.pk: agora or time.time()})
+    except redis.RedisError:
+        logger.exception("Falha ao registrar presença no Redis")
+        Motorista.objects.filter(pk=motorista.pk).update(online=True)
+
+
+def marcar_offline(motorista: Motorista) -> None:
+    try:
+        obter_redis().zrem(CHAVE_ONLINE, motorista.pk)
+    except redis.RedisError:
+        logger.exception("Falha ao remover presença no Redis")
+        Motorista.objects.filter(pk=motorista.pk).update(online=False)
+
+
+def batimento(motorista: Motorista, agora: float | None = None) -> bool:
+    """
+    Renova a presença de um motorista que está online.
+
+    Não coloca online quem ficou offline, por escolha ou por ter expirado:
+    os membros expirados são removidos antes da renovação. Retorna se o
+    motorista continua online.
+    """
+    agora = agora or time.time()
+    try:
+        with obter_redis().pipeline() as pipe:
+            pipe.zremrangebyscore(CHAVE_ONLINE, "-inf", f"({_limite(agora)}")
+            pipe.zadd(CHAVE_ONLINE, {motorista.pk: agora}, xx=True, ch=True)
+            _, renovado = pipe.execute()
+    except redis.RedisError:
+        logger.exception("Falha ao renovar presença no Redis")
+        return motorista.online
+    return bool(renovado)
+
+
+def esta_online(motorista: Motorista, agora: float | None = None) -> bool:
+    try:
+        pontuacao = obter_redis().zscore(CHAVE_ONLINE, motorista.pk)
+    except redis.RedisError:
+        logger.exception("Falha ao consultar presença no Redis")
+        return motorista.online
+    return pontuacao is not None and pontuacao >= _limite(agora)
+
+
+def motoristas_online(agora: float | None = None) -> set[int]:
+    """
+    Ids dos motoristas com batimento dentro do TTL
+    """
+    try:
+        membros = obter_redis().zrangebyscore(CHAVE_ONLINE, _limite(agora), "+inf")
+    except redis.RedisError:
+        logger.exception("Falha ao listar presença no Redis")
+        return set(Motorista.objects.filter(online=True).values_list("pk", flat=True))
+    return {int(membro) for membro in membros}
+
+
+def contar_online(agora: float | None = None) -> int:
+    return obter_redis().zcount(CHAVE_ONLINE, _limite(agora), "+inf")
+
+
+def remover_expirados(agora: float | None = None) -> int:
+    """
+    Remove do conjunto os membros sem batimento dentro do TTL
+    """
+    return obter_redis().zremrangebyscore(CHAVE_ONLINE, "-inf", f"({_limite(agora)}")
+
+
+def reconciliar(tamanho_lote: int = 1000) -> tuple[int, int]:
+    """
+    Sincroniza ``Motorista.online`` com a presença no Redis, em lotes de
+    ``UPDATE ... WHERE id IN (...)``.
+
+    Retorna quantos motoristas foram marcados online e offline no banco.
+    """
+    agora = time.time()
+    remover_expirados(agora)
+    no_redis = motoristas_online(agora)
+    no_banco = set(Motorista.objects.filter(online=True).values_list("pk", flat=True))
+
+    ligar = sorted(no_redis - no_banco)
+    desligar = sorted(no_banco - no_redis)
+    for ids, online in ((ligar, True), (desligar, False)):
+        for inicio in range(0, len(ids), tamanho_lote):
+            lote = ids[inicio : inicio + tamanho_lote]
+            Motorista.objects.filter(pk__in=lote).update(online=online)
+    return len(ligar), len(desligar)
@@ -0,0 +1,144 @@
+"""
+Resumos diários das corridas para o painel de análise do admin.
+
+Contar corridas por dia, cidade e status ou calcular percentis do tempo até o
+aceite exigiria agrupar a tabela ``Corrida`` inteira a cada visita ao painel.
+Em vez disso, ``ResumoDiario`` guarda uma linha por dia de criação e cidade do
+paciente, e o painel lê apenas dela.
+
+``atualizar_resumos`` é incremental. Como toda criação e mudança de status
+entra no histórico ``CorridaEvento``, os dias alterados desde a execução
+anterior são os dias de criação das corridas com eventos registrados depois
+da marca d'água (``MarcaAtualizacao``). Só esses dias são recalculados, e por
+inteiro, então repetir uma atualização não muda o resultado. A leitura recua
+``MARGEM_MARCA`` antes da marca para alcançar eventos de transações que ainda
+não tinham terminado na execução anterior.
+
+Corridas apagadas não deixam eventos; elas só saem dos resumos numa
+atualização completa.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import (
+    Corrida,
+    CorridaEvento,
+    CorridaStatus,
+    MarcaAtualizacao,
+    ResumoDiario,
+)
+from .transicoes import STATUS_OCUPADO
+
+NOME_MARCA = "resumos_diarios"
+MARGEM_MARCA = timedelta(minutes=5)
+
+
+@dataclass
+class ResultadoResumos:
+    dias: int = 0
+    linhas: int = 0
+    marca: datetime | None = None
+
+
+def dias_alterados(desde: datetime | None = None) -> list[date]:
+    """
+    Dias de criação das corridas com eventos registrados a partir de
+    ``desde`` (sem ``desde``, todos os dias com corridas)
+    """
+    if desde is None:
+        consulta = Corrida.objects.annotate(dia=TruncDate("data_criacao"))
+    else:
+        consulta = CorridaEvento.objects.filter(registrado_em__gte=desde).annotate(
+            dia=TruncDate("corrida__data_criacao")
+        )
+    return sorted(consulta.order_by().values_list("dia", flat=True).distinct())
+
+
+def _inicio_do_dia(dia: date) -> datetime:
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def calcular_resumos(dias: list[date]) -> list[ResumoDiario]:
+    """
+    Calcula os resumos dos ``dias`` (em ordem) com duas consultas sobre as
+    corridas criadas entre o primeiro e o último deles
+    """
+    corridas = (
+        Corrida.objects.filter(
+            data_criacao__gte=_inicio_do_dia(dias[0]),
+            data_criacao__lt=_inicio_do_dia(dias[-1] + timedelta(days=1)),
+        )
+        .annotate(dia=TruncDate("data_criacao"), cidade=F("paciente__usuario__cidade"))
+        .filter(dia__in=dias)
+        .order_by()
+    )
+
+    resumos = {}
+    for linha in corridas.values("dia", "cidade").annotate(
+        total=Count("pk"),
+        pendentes=Count("pk", filter=Q(status=CorridaStatus.PENDENTE)),
+        em_curso=Count("pk", filter=Q(status__in=STATUS_OCUPADO)),
+        concluidas=Count("pk", filter=Q(status=CorridaStatus.CONCLUIDA)),
+        canceladas=Count("pk", filter=Q(status=CorridaStatus.CANCELADA)),
+        motoristas_ativos=Count("motorista", distinct=True),
+    ):
+        resumos[linha["dia"], linha["cidade"]] = ResumoDiario(**linha)
+
+    # Percentis calculados aqui para valer igualmente em qualquer banco
+    tempos = defaultdict(list)
+    for dia, cidade, criacao, aceite in corridas.filter(
+        data_hora_aceite__isnull=False
+    ).values_list("dia", "cidade", "data_criacao", "data_hora_aceite"):
+        tempos[dia, cidade].append(max((aceite - criacao).total_seconds(), 0))
+    for chave, segundos in tempos.items():
+        p50, p90 = np.percentile(segundos, [50, 90])
+        resumos[chave].aceite_p50_segundos = round(p50)
+        resumos[chave].aceite_p90_segundos = round(p90)
+
+    return list(resumos.values())
+
+
+def atualizar_resumos(
+    completo: bool = False,
+    dias_por_lote: int = 31,
+    agora: datetime | None = None,
+) -> ResultadoResumos:
+    """
+    Recalcula os resumos dos dias alterados desde a última marca (ou de todos
+    os dias, com ``completo`` ou na primeira execução) e avança a marca
+    """
+    agora = agora or timezone.now()
+    marca = (
+        MarcaAtualizacao.objects.filter(nome=NOME_MARCA)
+        .values_list("marca", flat=True)
+        .first()
+    )
+    if completo or marca is None:
+        # Inclui os dias já resumidos que deixaram de ter corridas
+        dias = set(dias_alterados())
+        dias.update(ResumoDiario.objects.values_list("dia", flat=True).distinct())
+        dias = sorted(dias)
+    else:
+        dias = dias_alterados(marca - MARGEM_MARCA)
+
+    resultado = ResultadoResumos(dias=len(dias), marca=agora)
+    for inicio in range(0, len(dias), dias_por_lote):
+        lote = dias[inicio : inicio + dias_por_lote]
+        resumos = calcular_resumos(lote)
+        with transaction.atomic():
+            ResumoDiario.objects.filter(dia__in=lote).delete()
+            ResumoDiario.objects.bulk_create(resumos)
+        resultado.linhas += len(resumos)
+
+    MarcaAtualizacao.objects.update_or_create(
+        nome=NOME_MARCA, defaults={"marca": agora}
+    )
+    return resultado
@@ -0,0 +1,53 @@
+"""
+Receptores de sinais do app ``rodas``, conectados em ``RodasConfig.ready``
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import configuracoes
+from .models import Configuracao, Corrida, CorridaEvento, CorridaStatus
+from .versoes import invalidar_corridas
+
+
+@receiver(post_save, sender=Configuracao)
+@receiver(post_delete, sender=Configuracao)
+def configuracao_alterada(sender, **kwargs):
+    # Só depois do commit: antes disso os outros processos recarregariam a
+    # tabela ainda sem a alteração
+    transaction.on_commit(configuracoes.invalidar)
+
+
+@receiver(post_save, sender=Corrida)
+@receiver(post_delete, sender=Corrida)
+def corrida_alterada(sender, instance, created=False, **kwargs):
+    paciente_original, motorista_original = getattr(
+        instance, "_donos_originais", (None, None)
+    )
+    if created:
+        status_original = instance.status
+    else:
+        # Desconhecido quando a instância não veio do banco
+        status_original = getattr(instance, "_status_original", None)
+    invalidar_corridas(
+        paciente_ids=(instance.paciente_id, paciente_original),
+        motorista_ids=(instance.motorista_id, motorista_original),
+        pendentes=(
+            status_original is None
+            or CorridaStatus.PENDENTE in (status_original, instance.status)
+        ),
+    )
+    instance._status_original = instance.status
+
+
+@receiver(post_save, sender=Corrida)
+def corrida_criada(sender, instance, created, raw=False, **kwargs):
+    # Primeiro evento do histórico; os demais são gravados por rodas.transicoes
+    if created and not raw:
+        CorridaEvento.objects.create(
+            corrida=instance,
+            status=instance.status,
+            registrado_em=instance.data_criacao,
+            motorista_id=instance.motorista_id,
+        )
@@ -0,0 +1,383 @@
+"""
+Fila de tarefas em segundo plano, guardada no Redis.
+
+Efeitos colaterais lentos ou que não precisam acontecer dentro da requisição
+(envio de e-mails, gravação de notificações) são enfileirados com
+``enfileirar`` e executados pelo comando ``processar_tarefas``. O
+enfileiramento só acontece depois do commit da transação atual, então o
+worker nunca vê uma tarefa de uma alteração desfeita.
+
+Estruturas no Redis:
+
+- ``CHAVE_FILA``: lista com as tarefas prontas para execução;
+- ``chave_processando(nome)``: tarefas retiradas por um worker e ainda não
+  concluídas. O worker move cada tarefa atomicamente (``LMOVE``) da fila para
+  esta lista e só a apaga depois de executá-la; ao iniciar, devolve à fila o
+  que um processo anterior de mesmo nome deixou para trás. A entrega é, por
+  isso, "pelo menos uma vez";
+- ``CHAVE_AGENDADAS``: conjunto ordenado com as novas tentativas das tarefas
+  que falharam, pontuadas pelo horário em que voltam à fila (espera
+  exponencial);
+- ``CHAVE_DESCARTADAS``: tarefas que esgotaram as tentativas (e mensagens
+  malformadas, que o worker não consegue ler), para análise;
+- ``chave_metricas(tarefa)``: contadores e tempo acumulado de cada tarefa.
+
+O worker retira as tarefas em lotes. Tarefas registradas com
+``em_lote=True`` recebem todos os argumentos do lote numa única chamada (as
+notificações de várias transições viram um único ``bulk_create``).
+
+Com o Redis fora do ar, ``enfileirar`` executa a tarefa na hora, no próprio
+processo, para que nada se perca. Essa execução acontece depois do commit,
+quando a resposta já não depende dela: uma falha é apenas registrada no log.
+"""
+
+import json
+import logging
+import socket
+import time
+import uuid
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import redis
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+
+from .conexao_redis import criar_redis_bloqueante, obter_redis
+from .models import Notificacao
+from .notificacoes import ajustar_contadores
+
+logger = logging.getLogger(__name__)
+
+PREFIXO = "tarefas"
+CHAVE_FILA = f"{PREFIXO}:fila"
+CHAVE_AGENDADAS = f"{PREFIXO}:agendadas"
+CHAVE_DESCARTADAS = f"{PREFIXO}:descartadas"
+
+MAXIMO_TENTATIVAS = 5
+# Espera antes da primeira nova tentativa, dobrada a cada falha
+ESPERA_BASE_SEGUNDOS = 10
+MAXIMO_DESCARTADAS = 1000
+# Novas tentativas movidas para a fila por chamada do script abaixo
+LOTE_AGENDADAS = 1000
+
+# Retira do conjunto de agendadas e põe na fila, numa única operação atômica,
+# as tentativas cujo horário já chegou. Devolve quantas foram movidas.
+SCRIPT_LIBERAR_AGENDADAS = """
+local prontas = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+if #prontas > 0 then
+    redis.call("ZREM", KEYS[1], unpack(prontas))
+    redis.call("RPUSH", KEYS[2], unpack(prontas))
+end
+return #prontas
+"""
+
+
+def chave_processando(worker: str) -> str:
+    return f"{PREFIXO}:processando:{worker}"
+
+
+def chave_metricas(tarefa: str) -> str:
+    return f"{PREFIXO}:metricas:{tarefa}"
+
+
+@dataclass(frozen=True)
+class Tarefa:
+    funcao: Callable
+    em_lote: bool = False
+
+
+TAREFAS: dict[str, Tarefa] = {}
+
+
+def tarefa(nome: str, em_lote: bool = False):
+    """
+    Registra a função como tarefa. Com ``em_lote``, ela recebe uma lista com
+    os argumentos (dicionários) de todas as tarefas do lote.
+    """
+
+    def registrar(funcao):
+        TAREFAS[nome] = Tarefa(funcao, em_lote)
+        return funcao
+
+    return registrar
+
+
+def _executar(nome: str, argumentos: list[dict]) -> None:
+    registrada = TAREFAS[nome]
+    if registrada.em_lote:
+        registrada.funcao(argumentos)
+    else:
+        for kwargs in argumentos:
+            registrada.funcao(**kwargs)
+
+
+def enfileirar(nome: str, **kwargs) -> None:
+    """
+    Enfileira a tarefa ``nome`` com ``kwargs`` (serializáveis em JSON) depois
+    que a transação atual for confirmada
+    """
+    if nome not in TAREFAS:
+        raise KeyError(f"Tarefa desconhecida: {nome}")
+    mensagem = json.dumps(
+        {
+            "id": uuid.uuid4().hex,
+            "tarefa": nome,
+            "kwargs": kwargs,
+            "tentativas": 0,
+            "enfileirada_em": time.time(),
+        }
+    )
+
+    def enviar():
+        try:
+            obter_redis().rpush(CHAVE_FILA, mensagem)
+        except redis.RedisError:
+            logger.exception("Falha ao enfileirar a tarefa %s; executando agora", nome)
+            try:
+                _executar(nome, [kwargs])
+            except Exception:
+                # Depois do commit, uma exceção aqui derrubaria a resposta de
+                # uma alteração já confirmada
+                logger.exception(
+                    "Falha ao executar a tarefa %s fora da fila: %s", nome, mensagem
+                )
+
+    transaction.on_commit(enviar)
+
+
+@dataclass
+class ResultadoLote:
+    tarefas: int = 0
+    falhas: int = 0
+    descartadas: int = 0
+    por_tarefa: dict[str, int] = field(default_factory=dict)
+
+
+class Worker:
+    """
+    Consumidor da fila. Cada processo deve ter um ``nome`` próprio e estável
+    (por padrão, o nome da máquina): é ele que identifica a lista de tarefas
+    em execução a recuperar depois de uma queda.
+    """
+
+    def __init__(self, nome: str | None = None, espera: float = 5.0):
+        self.nome = nome or socket.gethostname()
+        self.espera = espera
+        self.redis = obter_redis()
+        self.redis_bloqueante = criar_redis_bloqueante(espera)
+        self.processando = chave_processando(self.nome)
+        self._liberar_agendadas = self.redis.register_script(SCRIPT_LIBERAR_AGENDADAS)
+
+    def recuperar(self) -> int:
+        """
+        Devolve ao início da fila as tarefas interrompidas deste worker
+        """
+        recuperadas = 0
+        while self.redis.lmove(self.processando, CHAVE_FILA, "RIGHT", "LEFT"):
+            recuperadas += 1
+        return recuperadas
+
+    def liberar_agendadas(self) -> int:
+        """
+        Move para a fila as novas tentativas cujo horário já chegou
+        """
+        # Remoção e enfileiramento atômicos: uma queda entre os dois não perde
+        # a tentativa e, com vários workers, cada uma volta à fila uma vez só
+        agora = time.time()
+        liberadas = 0
+        while True:
+            movidas = self._liberar_agendadas(
+                keys=[CHAVE_AGENDADAS, CHAVE_FILA], args=[agora, LOTE_AGENDADAS]
+            )
+            liberadas += movidas
+            if movidas < LOTE_AGENDADAS:
+                return liberadas
+
+    def retirar(self, tamanho_lote: int) -> list[str]:
+        """
+        Retira até ``tamanho_lote`` tarefas, esperando até ``espera`` segundos
+        pela primeira
+        """
+        primeira = self.redis_bloqueante.blmove(
+            CHAVE_FILA, self.processando, self.espera, "LEFT", "RIGHT"
+        )
+        if primeira is None:
+            return []
+        with self.redis.pipeline(transaction=False) as pipe:
+            for _ in range(tamanho_lote - 1):
+                pipe.lmove(CHAVE_FILA, self.processando, "LEFT", "RIGHT")
+            demais = pipe.execute()
+        return [primeira] + [mensagem for mensagem in demais if mensagem]
+
+    def _executar_grupo(self, nome: str, mensagens: list[dict]) -> list[dict]:
+        """
+        Executa as tarefas ``nome`` do lote e devolve as que falharam
+        """
+        registrada = TAREFAS.get(nome)
+        if registrada is None:
+            logger.error("Tarefa desconhecida: %s", nome)
+            return mensagens
+        if registrada.em_lote:
+            try:
+                registrada.funcao([mensagem["kwargs"] for mensagem in mensagens])
+                return []
+            except Exception:
+                if len(mensagens) == 1:
+                    logger.exception("Falha ao executar a tarefa %s", nome)
+                    return mensagens
+                # Isola a tarefa com problema em vez de repetir o lote inteiro
+                logger.warning("Lote de %s falhou; executando uma a uma", nome)
+
+        falhas = []
+        for mensagem in mensagens:
+            try:
+                _executar(nome, [mensagem["kwargs"]])
+            except Exception:
+                logger.exception("Falha ao executar a tarefa %s", nome)
+                falhas.append(mensagem)
+        return falhas
+
+    def processar(self, brutas: list[str]) -> ResultadoLote:
+        """
+        Executa um lote já retirado da fila, agrupado por tarefa
+        """
+        resultado = ResultadoLote(tarefas=len(brutas))
+        grupos: dict[str, list[dict]] = {}
+        malformadas = []
+        for bruta in brutas:
+            mensagem = _ler_mensagem(bruta)
+            if mensagem is None:
+                logger.error("Mensagem malformada descartada: %r", bruta)
+                malformadas.append(bruta)
+                continue
+            grupos.setdefault(mensagem["tarefa"], []).append(mensagem)
+
+        with self.redis.pipeline(transaction=False) as pipe:
+            if malformadas:
+                resultado.descartadas += len(malformadas)
+                pipe.lpush(CHAVE_DESCARTADAS, *malformadas)
+                pipe.ltrim(CHAVE_DESCARTADAS, 0, MAXIMO_DESCARTADAS - 1)
+            for nome, mensagens in grupos.items():
+                resultado.por_tarefa[nome] = len(mensagens)
+                inicio = time.perf_counter()
+                falhas = self._executar_grupo(nome, mensagens)
+                duracao_ms = (time.perf_counter() - inicio) * 1000
+                agora = time.time()
+
+                metricas = chave_metricas(nome)
+                pipe.hincrby(metricas, "lotes", 1)
+                pipe.hincrbyfloat(metricas, "duracao_total_ms", duracao_ms)
+                pipe.hincrby(metricas, "executadas", len(mensagens) - len(falhas))
+                pipe.hincrbyfloat(
+                    metricas,
+                    "espera_total_ms",
+                    sum(
+                        agora - mensagem["enfileirada_em"]
+                        for mensagem in mensagens
+                        if mensagem not in falhas
+                    )
+                    * 1000,
+                )
+                if not falhas:
+                    continue
+
+                pipe.hincrby(metricas, "falhas", len(falhas))
+                for mensagem in falhas:
+                    mensagem["tentativas"] += 1
+                    if mensagem["tentativas"] >= MAXIMO_TENTATIVAS:
+                        resultado.descartadas += 1
+                        pipe.hincrby(metricas, "descartadas", 1)
+                        pipe.lpush(CHAVE_DESCARTADAS, json.dumps(mensagem))
+                        pipe.ltrim(CHAVE_DESCARTADAS, 0, MAXIMO_DESCARTADAS - 1)
+                    else:
+                        resultado.falhas += 1
+                        espera = ESPERA_BASE_SEGUNDOS * 2 ** (
+                            mensagem["tentativas"] - 1
+                        )
+                        pipe.zadd(
+                            CHAVE_AGENDADAS, {json.dumps(mensagem): agora + espera}
+                        )
+            # Tudo o que foi retirado está concluído, reagendado ou descartado
+            pipe.delete(self.processando)
+            pipe.execute()
+        return resultado
+
+
+def _ler_mensagem(bruta: str) -> dict | None:
+    """
+    Decodifica uma mensagem da fila, ou ``None`` se ela não tiver o formato
+    gravado por ``enfileirar``
+    """
+    try:
+        mensagem = json.loads(bruta)
+    except ValueError:
+        return None
+    if not (
+        isinstance(mensagem, dict)
+        and isinstance(mensagem.get("tarefa"), str)
+        and isinstance(mensagem.get("kwargs"), dict)
+        and isinstance(mensagem.get("tentativas"), int)
+        and isinstance(mensagem.get("enfileirada_em"), int | float)
+    ):
+        return None
+    return mensagem
+
+
+def metricas() -> dict[str, dict[str, float]]:
+    """
+    Contadores de cada tarefa registrada, mais o tamanho das filas
+    """
+    conexao = obter_redis()
+    with conexao.pipeline(transaction=False) as pipe:
+        for nome in TAREFAS:
+            pipe.hgetall(chave_metricas(nome))
+        pipe.llen(CHAVE_FILA)
+        pipe.zcard(CHAVE_AGENDADAS)
+        pipe.llen(CHAVE_DESCARTADAS)
+        *por_tarefa, na_fila, agendadas, descartadas = pipe.execute()
+    resultado = {
+        nome: {chave: float(valor) for chave, valor in valores.items()}
+        for nome, valores in zip(TAREFAS, por_tarefa)
+    }
+    resultado["filas"] = {
+        "na_fila": na_fila,
+        "agendadas": agendadas,
+        "descartadas": descartadas,
+    }
+    return resultado
+
+
+@tarefa("enviar_email")
+def enviar_email(
+    assunto: str,
+    corpo: str,
+    remetente: str | None,
+    destinatarios: list[str],
+    corpo_html: str | None = None,
+) -> None:
+    email = EmailMultiAlternatives(assunto, corpo, remetente, destinatarios)
+    if corpo_html is not None:
+        email.attach_alternative(corpo_html, "text/html")
+    email.send()
+
+
+@tarefa("criar_notificacoes", em_lote=True)
+def criar_notificacoes(lote: list[dict]) -> None:
+    """
+    Grava as notificações de todas as tarefas do lote com um único INSERT.
+    Cada tarefa traz ``notificacoes``, uma lista de dicionários com os campos
+    de ``Notificacao``. Os contadores de não lidas são ajustados depois do
+    commit.
+
+    Tudo numa transação: se um dos INSERTs falhar, nenhuma notificação fica
+    gravada e a execução uma a uma do worker não as duplica.
+    """
+    notificacoes = [
+        Notificacao(**dados) for kwargs in lote for dados in kwargs["notificacoes"]
+    ]
+    variacoes = Counter(n.usuario_id for n in notificacoes)
+    with transaction.atomic():
+        Notificacao.objects.bulk_create(notificacoes, batch_size=1000)
+        transaction.on_commit(lambda: ajustar_contadores(variacoes))
@@ -0,0 +1,87 @@
+"""
+Auxiliares para testes de orçamento de consultas.
+
+Exemplo::
+
+    class DashboardTests(OrcamentoConsultasMixin, TestCase):
+        def test_dashboard_paciente(self):
+            self.client.force_login(paciente.usuario)
+            self.assertDentroDoOrcamento("rodas:dashboard")
+
+O orçamento vem do decorador ``orcamento_consultas`` da view resolvida pela
+URL; ``orcamentos_declarados`` lista o de todas as rotas de ``rodas.urls``.
+"""
+
+from contextlib import contextmanager
+
+from django.db import connection
+from django.urls import get_resolver, resolve, reverse
+
+from .instrumentacao import (
+    LIMITE_REPETICOES_PADRAO,
+    RegistroConsultas,
+    orcamento_da_view,
+)
+
+
+@contextmanager
+def registrar_consultas():
+    """
+    Registra as consultas executadas dentro do bloco
+    """
+    registro = RegistroConsultas()
+    with connection.execute_wrapper(registro):
+        yield registro
+
+
+def orcamentos_declarados(urlconf: str = "rodas.urls") -> dict[str, int | None]:
+    """
+    Mapeia o nome de cada rota do urlconf (com o namespace, como em
+    ``reverse``) ao orçamento da sua view
+    """
+    resolver = get_resolver(urlconf)
+    namespace = getattr(resolver.urlconf_module, "app_name", None)
+    prefixo = f"{namespace}:" if namespace else ""
+    return {
+        f"{prefixo}{padrao.name}": orcamento_da_view(padrao.callback)
+        for padrao in resolver.url_patterns
+        if padrao.name
+    }
+
+
+class OrcamentoConsultasMixin:
+    """
+    Mixin para ``TestCase`` com asserções sobre o número de consultas
+    """
+
+    limite_repeticoes = LIMITE_REPETICOES_PADRAO
+
+    def assertDentroDoOrcamento(
+        self, nome_url, *args, metodo="get", dados=None, orcamento=None, **kwargs
+    ):
+        """
+        Requisita a URL com ``self.client`` e falha se a view passar do
+        orçamento ou repetir alguma consulta. Retorna a resposta.
+        """
+        url = reverse(nome_url, args=args, kwargs=kwargs)
+        if orcamento is None:
+            orcamento = orcamento_da_view(resolve(url).func)
+        if orcamento is None:
+            self.fail(f"A view de {nome_url} não declara orcamento_consultas.")
+
+        with registrar_consultas() as registro:
+            resposta = getattr(self.client, metodo)(url, dados or {})
+
+        consultas = "\n".join(f"  {sql}" for sql, _ in registro.consultas)
+        self.assertLessEqual(
+            registro.total,
+            orcamento,
+            f"{nome_url} executou {registro.total} consultas "
+            f"(orçamento: {orcamento}):\n{consultas}",
+        )
+        repetidas = registro.repetidas(self.limite_repeticoes)
+        self.assertFalse(
+            repetidas,
+            f"{nome_url} repetiu consultas (possível N+1): {repetidas}",
+        )
+        return resposta
@@ -0,0 +1,108 @@
+"""
+Fábricas de objetos e configurações compartilhadas pelos testes do app.
+"""
+
+import os
+from datetime import timedelta
+from itertools import count
+
+import redis
+from django.test import override_settings
+from django.utils import timezone
+
+from rodas.conexao_redis import obter_redis
+from rodas.models import Corrida, Motorista, Paciente, TipoUsuario, Usuario
+
+# Banco do Redis só dos testes: é esvaziado antes de cada teste que o usa
+REDIS_URL_TESTES = os.environ.get("REDIS_URL_TESTES", "redis://127.0.0.1:6379/15")
+
+# Sem o manifesto gerado pelo collectstatic
+STORAGES_SEM_MANIFESTO = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+_sequencia = count(1)
+
+
+def criar_usuario(tipo_usuario: str, **extra) -> Usuario:
+    n = next(_sequencia)
+    # Sem senha (e sem o custo do hash): os testes entram com force_login
+    return Usuario.objects.create_user(
+        f"{tipo_usuario}{n}@teste.com",
+        None,
+        nome_completo=f"{tipo_usuario.title()} {n}",
+        tipo_usuario=tipo_usuario,
+        telefone=f"(11) 9{n:04d}-0000",
+        cpf=f"{n:03d}.000.000-00",
+        **extra,
+    )
+
+
+def criar_paciente(**extra) -> Paciente:
+    return Paciente.objects.create(
+        usuario=criar_usuario(TipoUsuario.PACIENTE),
+        responsavel_nome="Responsável Teste",
+        responsavel_cpf="000.000.000-02",
+        responsavel_telefone="(11) 99999-0002",
+        **extra,
+    )
+
+
+def criar_motorista(**extra) -> Motorista:
+    extra.setdefault("status_aprovacao", "aprovado")
+    return Motorista.objects.create(
+        usuario=criar_usuario(TipoUsuario.MOTORISTA),
+        marca_veiculo="Fiat",
+        modelo_veiculo="Doblò",
+        cor_veiculo="Branco",
+        **extra,
+    )
+
+
+def criar_corrida(paciente: Paciente, latitude=None, longitude=None, **extra):
+    extra.setdefault("data_hora_agendada", timezone.now() + timedelta(days=1))
+    return Corrida.objects.create(
+        paciente=paciente,
+        endereco_origem="Rua A, 1",
+        latitude_origem=latitude,
+        longitude_origem=longitude,
+        endereco_destino="Hospital das Clínicas",
+        **extra,
+    )
+
+
+class RedisDeTesteMixin:
+    """
+    Aponta o Redis da aplicação (``rodas.conexao_redis``) para
+    ``REDIS_URL_TESTES``, vazio no início de cada teste; sem Redis acessível,
+    o teste é pulado
+    """
+
+    def setUp(self):
+        super().setUp()
+        configuracao = override_settings(REDIS_URL=REDIS_URL_TESTES)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        obter_redis.cache_clear()
+        self.addCleanup(obter_redis.cache_clear)
+        self.redis = obter_redis()
+        try:
+            self.redis.flushdb()
+        except redis.RedisError:
+            self.skipTest(f"Redis indisponível em {REDIS_URL_TESTES}")
+
+
+class RedisForaDoArMixin:
+    """
+    Aponta o Redis da aplicação para uma porta sem servidor, para testar a
+    degradação de cada módulo
+    """
+
+    def setUp(self):
+        super().setUp()
+        configuracao = override_settings(REDIS_URL="redis://127.0.0.1:1/0")
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        obter_redis.cache_clear()
+        self.addCleanup(obter_redis.cache_clear)
@@ -0,0 +1,92 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from rodas.avaliacoes import (
+    AvaliacaoInvalida,
+    recalcular_agregados,
+    registrar_avaliacao,
+)
+from rodas.models import Avaliacao, CorridaStatus, Motorista
+
+from .auxiliares import criar_corrida, criar_motorista, criar_paciente
+
+
+class AvaliacoesTests(TestCase):
+    def setUp(self):
+        self.paciente = criar_paciente()
+        self.motorista = criar_motorista()
+        self.corridas = [
+            criar_corrida(
+                self.paciente, motorista=self.motorista, status=CorridaStatus.CONCLUIDA
+            )
+            for _ in range(3)
+        ]
+        patcher = mock.patch("rodas.avaliacoes.enfileirar")
+        self.enfileirar = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def agregados(self, motorista=None):
+        return Motorista.objects.values_list(
+            "soma_avaliacoes", "total_avaliacoes", "avaliacao_media"
+        ).get(pk=(motorista or self.motorista).pk)
+
+    def avaliar(self, notas):
+        for corrida, nota in zip(self.corridas, notas):
+            registrar_avaliacao(corrida, self.paciente.usuario, nota)
+
+    def test_media_incremental(self):
+        self.avaliar([5, 4, 4])
+        self.assertEqual(self.agregados(), (13, 3, Decimal("4.33")))
+        self.assertEqual(self.enfileirar.call_count, 3)
+
+    def test_avaliacao_do_motorista_nao_altera_a_media_dele(self):
+        registrar_avaliacao(self.corridas[0], self.motorista.usuario, 2)
+        self.assertEqual(self.agregados(), (0, 0, Decimal("0.00")))
+        self.assertTrue(
+            Avaliacao.objects.filter(avaliado=self.paciente.usuario).exists()
+        )
+
+    def test_recusa_avaliacoes_invalidas(self):
+        self.avaliar([5])
+        pendente = criar_corrida(self.paciente, motorista=self.motorista)
+        casos = [
+            (self.corridas[0], 4),  # repetida
+            (pendente, 4),  # corrida não concluída
+            (self.corridas[1], 0),
+            (self.corridas[1], 6),
+        ]
+        for corrida, nota in casos:
+            with self.subTest(corrida=corrida.pk, nota=nota):
+                with self.assertRaises(AvaliacaoInvalida):
+                    registrar_avaliacao(corrida, self.paciente.usuario, nota)
+        self.assertEqual(self.agregados(), (5, 1, Decimal("5.00")))
+
+    def test_recalculo_corrige_divergencias(self):
+        self.avaliar([5, 4, 3])
+        Avaliacao.objects.filter(nota=3).delete()
+        sem_avaliacoes = criar_motorista(
+            soma_avaliacoes=9, total_avaliacoes=2, avaliacao_media=Decimal("4.50")
+        )
+        em_dia = criar_motorista()
+
+        contagem = recalcular_agregados(tamanho_lote=1, corrigir=False)
+        self.assertEqual((contagem.motoristas, contagem.divergentes), (3, 2))
+        self.assertEqual(self.agregados(), (12, 3, Decimal("4.00")))
+
+        correcao = recalcular_agregados(tamanho_lote=1)
+        self.assertEqual(correcao.divergentes, 2)
+        self.assertEqual(self.agregados(), (9, 2, Decimal("4.50")))
+        self.assertEqual(self.agregados(sem_avaliacoes), (0, 0, Decimal("0.00")))
+        self.assertEqual(self.agregados(em_dia), (0, 0, Decimal("0.00")))
+
+        self.assertEqual(recalcular_agregados().divergentes, 0)
+
+    def test_recalculo_restrito_ao_queryset(self):
+        self.avaliar([5])
+        Avaliacao.objects.all().delete()
+        outro = criar_motorista(soma_avaliacoes=3, total_avaliacoes=1)
+        resultado = recalcular_agregados(Motorista.objects.filter(pk=outro.pk))
+        self.assertEqual((resultado.motoristas, resultado.divergentes), (1, 1))
+        self.assertEqual(self.agregados(), (5, 1, Decimal("5.00")))
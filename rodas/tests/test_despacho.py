@@ -0,0 +1,138 @@
+from datetime import timedelta
+from decimal import Decimal
+from itertools import permutations
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from rodas.despacho import (
+    CUSTO_INVIAVEL,
+    ParametrosDespacho,
+    despachar,
+    montar_custos,
+    resolver_atribuicao,
+)
+from rodas.models import CorridaStatus
+
+from .auxiliares import criar_corrida, criar_motorista, criar_paciente
+
+
+def custo_forca_bruta(custos: np.ndarray) -> float:
+    n, m = custos.shape
+    if n > m:
+        return custo_forca_bruta(custos.T)
+    return min(
+        custos[np.arange(n), list(colunas)].sum()
+        for colunas in permutations(range(m), n)
+    )
+
+
+class ResolverAtribuicaoTests(SimpleTestCase):
+    def test_igual_a_forca_bruta_em_matrizes_pequenas(self):
+        gerador = np.random.default_rng(7)
+        for n, m in [(1, 1), (2, 2), (3, 3), (4, 4), (5, 5), (2, 5), (5, 2), (3, 6)]:
+            for _ in range(20):
+                custos = gerador.integers(0, 20, size=(n, m)).astype(float)
+                with self.subTest(formato=(n, m), custos=custos.tolist()):
+                    linhas, colunas = resolver_atribuicao(custos)
+                    self.assertEqual(len(linhas), min(n, m))
+                    self.assertEqual(len(set(linhas)), len(linhas))
+                    self.assertEqual(len(set(colunas)), len(colunas))
+                    self.assertEqual(list(linhas), sorted(linhas))
+                    self.assertAlmostEqual(
+                        custos[linhas, colunas].sum(), custo_forca_bruta(custos)
+                    )
+
+    def test_matriz_vazia(self):
+        linhas, colunas = resolver_atribuicao(np.empty((0, 3)))
+        self.assertEqual(len(linhas), 0)
+        self.assertEqual(len(colunas), 0)
+
+    def test_evita_pares_inviaveis_quando_possivel(self):
+        custos = np.array([[1.0, CUSTO_INVIAVEL], [2.0, 3.0]])
+        linhas, colunas = resolver_atribuicao(custos)
+        self.assertEqual(list(zip(linhas, colunas)), [(0, 0), (1, 1)])
+
+
+class MontarCustosTests(SimpleTestCase):
+    def test_marca_pares_inviaveis(self):
+        origens = np.array([[-23.55, -46.63], [-23.55, -46.63]])
+        posicoes = np.array([[-23.56, -46.64], [-22.90, -43.20]])
+        custos, distancias = montar_custos(
+            origens,
+            np.array([1.0, -2.0]),
+            np.array([False, True]),
+            posicoes,
+            np.array([False, True]),
+            ParametrosDespacho(raio_maximo_km=30),
+        )
+        self.assertEqual(custos.shape, (2, 2))
+        # Motorista 1 fora do raio; corrida 1 exige veículo adaptado
+        self.assertEqual(custos[0, 1], CUSTO_INVIAVEL)
+        self.assertEqual(custos[1, 0], CUSTO_INVIAVEL)
+        self.assertEqual(custos[1, 1], CUSTO_INVIAVEL)
+        # Urgência em horas (peso 2) somada à distância; atraso não desconta
+        self.assertAlmostEqual(custos[0, 0], distancias[0, 0] + 2.0)
+
+
+class DespacharTests(TestCase):
+    def setUp(self):
+        paciente = criar_paciente()
+        agora = timezone.now()
+        self.corrida_a = criar_corrida(
+            paciente,
+            Decimal("-23.55"),
+            Decimal("-46.63"),
+            data_hora_agendada=agora + timedelta(minutes=30),
+        )
+        self.corrida_b = criar_corrida(
+            paciente,
+            Decimal("-23.60"),
+            Decimal("-46.70"),
+            data_hora_agendada=agora + timedelta(minutes=40),
+        )
+        self.perto_de_a = criar_motorista(
+            latitude_atual=Decimal("-23.551"), longitude_atual=Decimal("-46.631")
+        )
+        self.perto_de_b = criar_motorista(
+            latitude_atual=Decimal("-23.601"), longitude_atual=Decimal("-46.701")
+        )
+        online = mock.patch(
+            "rodas.despacho.presenca.motoristas_online",
+            return_value=[self.perto_de_a.pk, self.perto_de_b.pk],
+        )
+        online.start()
+        self.addCleanup(online.stop)
+        enfileirar = mock.patch("rodas.despacho.enfileirar")
+        self.enfileirar = enfileirar.start()
+        self.addCleanup(enfileirar.stop)
+
+    def test_dry_run_nao_grava(self):
+        resultado = despachar(dry_run=True)
+        self.assertEqual(
+            {(a.corrida_id, a.motorista_id) for a in resultado.atribuicoes},
+            {
+                (self.corrida_a.pk, self.perto_de_a.pk),
+                (self.corrida_b.pk, self.perto_de_b.pk),
+            },
+        )
+        self.assertEqual(resultado.gravadas, 0)
+        self.corrida_a.refresh_from_db()
+        self.assertEqual(self.corrida_a.status, CorridaStatus.PENDENTE)
+        self.enfileirar.assert_not_called()
+
+    def test_grava_e_nao_repete_atribuicoes(self):
+        resultado = despachar()
+        self.assertEqual(resultado.gravadas, 2)
+        self.corrida_a.refresh_from_db()
+        self.assertEqual(self.corrida_a.status, CorridaStatus.ACEITA)
+        self.assertEqual(self.corrida_a.motorista_id, self.perto_de_a.pk)
+        notificacoes = self.enfileirar.call_args.kwargs["notificacoes"]
+        self.assertEqual(len(notificacoes), 2)
+
+        # Corridas aceitas e motoristas ocupados saem da rodada seguinte
+        segunda = despachar()
+        self.assertEqual(segunda.corridas_consideradas, 0)
+        self.assertEqual(segunda.gravadas, 0)
@@ -0,0 +1,97 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from rodas import difusao
+from rodas.models import CorridaStatus
+
+from .auxiliares import criar_corrida, criar_motorista, criar_paciente
+
+# Origem no centro de São Paulo; cada 0,01° de latitude são ~1,1 km
+LATITUDE, LONGITUDE = Decimal("-23.55"), Decimal("-46.63")
+
+
+class DifusaoTests(TestCase):
+    def setUp(self):
+        self.paciente = criar_paciente()
+        self.corrida = criar_corrida(self.paciente, LATITUDE, LONGITUDE)
+        self.perto = self.motorista(Decimal("0.01"))
+        self.adaptado = self.motorista(Decimal("0.02"), veiculo_adaptado=True)
+        self.longe = self.motorista(Decimal("0.5"))
+        self.ocupado = self.motorista(Decimal("0.01"))
+        criar_corrida(
+            self.paciente, motorista=self.ocupado, status=CorridaStatus.EM_ANDAMENTO
+        )
+        self.offline = self.motorista(Decimal("0.01"))
+        self.sem_posicao = self.motorista(None)
+
+        self.online = {
+            m.pk
+            for m in (
+                self.perto,
+                self.adaptado,
+                self.longe,
+                self.ocupado,
+                self.sem_posicao,
+            )
+        }
+        self.posicoes = {}
+        alvos = {
+            "presenca.motoristas_online": lambda *a: self.online,
+            "trajetos.posicoes_atuais": lambda ids: self.posicoes,
+        }
+        for alvo, funcao in alvos.items():
+            patcher = mock.patch(f"rodas.difusao.{alvo}", side_effect=funcao)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for alvo in ("enfileirar", "publicar"):
+            patcher = mock.patch(f"rodas.difusao.{alvo}")
+            setattr(self, alvo, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def motorista(self, deslocamento, **extra):
+        if deslocamento is not None:
+            extra.update(
+                latitude_atual=LATITUDE + deslocamento, longitude_atual=LONGITUDE
+            )
+        return criar_motorista(**extra)
+
+    def elegiveis(self, raio_km=5):
+        return [pk for pk, _, _ in difusao.motoristas_elegiveis(self.corrida, raio_km)]
+
+    def test_do_mais_proximo_ao_mais_distante(self):
+        self.assertEqual(self.elegiveis(), [self.perto.pk, self.adaptado.pk])
+        self.assertEqual(
+            self.elegiveis(raio_km=100),
+            [self.perto.pk, self.adaptado.pk, self.longe.pk],
+        )
+
+    def test_cadeira_de_rodas_exige_veiculo_adaptado(self):
+        self.corrida.necessita_cadeira_rodas = True
+        self.assertEqual(self.elegiveis(), [self.adaptado.pk])
+
+    def test_posicao_do_redis_prevalece(self):
+        self.posicoes = {
+            self.longe.pk: (float(LATITUDE), float(LONGITUDE), 0.0),
+            self.sem_posicao.pk: (float(LATITUDE) + 0.005, float(LONGITUDE), 0.0),
+        }
+        self.assertEqual(
+            self.elegiveis(),
+            [self.longe.pk, self.sem_posicao.pk, self.perto.pk, self.adaptado.pk],
+        )
+
+    def test_corrida_sem_coordenadas(self):
+        corrida = criar_corrida(self.paciente)
+        self.assertEqual(difusao.anunciar_corrida(corrida, 5), 0)
+        self.enfileirar.assert_not_called()
+
+    def test_anuncia_numa_unica_tarefa(self):
+        self.assertEqual(difusao.anunciar_corrida(self.corrida, 5), 2)
+        self.enfileirar.assert_called_once()
+        notificacoes = self.enfileirar.call_args.kwargs["notificacoes"]
+        self.assertEqual(
+            [n["usuario_id"] for n in notificacoes],
+            [self.perto.usuario_id, self.adaptado.usuario_id],
+        )
+        self.assertEqual(len(list(self.publicar.call_args.args[0])), 2)
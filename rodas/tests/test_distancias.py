@@ -0,0 +1,72 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from rodas.distancias import (
+    CacheMatrizes,
+    cache_matrizes,
+    coordenadas_array,
+    distancias_pareadas_km,
+    matriz_distancias_km,
+    matriz_eta_minutos,
+)
+from rodas.geo import distancia_km
+
+ORIGENS = np.array([[-23.55, -46.63], [-23.5572, -46.6691], [-22.9, -43.2]])
+DESTINOS = np.array([[-23.5986, -46.6452], [-23.5431, -46.6503]])
+
+
+class MatrizesTests(SimpleTestCase):
+    def setUp(self):
+        cache_matrizes.limpar()
+        self.addCleanup(cache_matrizes.limpar)
+
+    def test_igual_a_distancia_escalar(self):
+        matriz = matriz_distancias_km(ORIGENS, DESTINOS)
+        self.assertEqual(matriz.shape, (3, 2))
+        for i, origem in enumerate(ORIGENS):
+            for j, destino in enumerate(DESTINOS):
+                self.assertAlmostEqual(matriz[i, j], distancia_km(*origem, *destino))
+
+    def test_fator_viario_e_eta(self):
+        base = matriz_distancias_km(ORIGENS, DESTINOS, usar_cache=False)
+        eta = matriz_eta_minutos(
+            ORIGENS, DESTINOS, fator_viario=1.5, velocidade_kmh=30, usar_cache=False
+        )
+        np.testing.assert_allclose(eta, base * 1.5 * 2)
+
+    def test_pareadas_sao_a_diagonal(self):
+        np.testing.assert_allclose(
+            distancias_pareadas_km(ORIGENS[:2], DESTINOS, fator_viario=1.3),
+            np.diag(matriz_distancias_km(ORIGENS[:2], DESTINOS, fator_viario=1.3)),
+        )
+
+    def test_cache_devolve_a_mesma_matriz_somente_leitura(self):
+        primeira = matriz_distancias_km(ORIGENS, DESTINOS)
+        segunda = matriz_distancias_km(ORIGENS.copy(), DESTINOS.copy())
+        self.assertIs(primeira, segunda)
+        self.assertEqual((cache_matrizes.falhas, cache_matrizes.acertos), (1, 1))
+        self.assertFalse(primeira.flags.writeable)
+        # Outro fator é outra entrada
+        self.assertIsNot(matriz_distancias_km(ORIGENS, DESTINOS, 1.3), primeira)
+
+    def test_sem_cache_nao_consulta_nem_guarda(self):
+        matriz = matriz_distancias_km(ORIGENS, DESTINOS, usar_cache=False)
+        self.assertTrue(matriz.flags.writeable)
+        self.assertEqual((cache_matrizes.falhas, cache_matrizes.acertos), (0, 0))
+
+    def test_coordenadas_ausentes_viram_nan(self):
+        coordenadas = coordenadas_array([(None, None), ("-23.55", "-46.63")])
+        self.assertTrue(np.isnan(coordenadas[0]).all())
+        self.assertTrue(np.isnan(matriz_distancias_km(coordenadas, DESTINOS)[0]).all())
+
+
+class CacheMatrizesTests(SimpleTestCase):
+    def test_limite_em_bytes_descarta_as_mais_antigas(self):
+        cache = CacheMatrizes(maximo_bytes=3 * 80)
+        for n in range(4):
+            cache.guardar(str(n), np.zeros(10))
+        self.assertIsNone(cache.obter("0"))
+        self.assertIsNotNone(cache.obter("3"))
+        # Matriz maior que o limite não entra
+        cache.guardar("grande", np.zeros(100))
+        self.assertIsNone(cache.obter("grande"))
@@ -0,0 +1,55 @@
+import math
+import random
+
+from django.test import SimpleTestCase
+
+from rodas.geo import (
+    KM_POR_GRAU,
+    celulas_vizinhas,
+    codificar_geohash,
+    dimensoes_celula,
+    distancia_km,
+    precisao_para_raio,
+)
+
+
+class GeohashTests(SimpleTestCase):
+    def test_valor_conhecido(self):
+        self.assertEqual(codificar_geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+        self.assertEqual(codificar_geohash(-23.55, -46.63, 5), "6gyf4")
+
+    def test_prefixo_de_precisoes_menores(self):
+        geohash = codificar_geohash(-23.5572, -46.6691, 9)
+        for precisao in range(1, 9):
+            self.assertEqual(
+                codificar_geohash(-23.5572, -46.6691, precisao), geohash[:precisao]
+            )
+
+    def test_vizinhas_cobrem_o_raio(self):
+        aleatorio = random.Random(3)
+        for latitude, longitude in [(-23.55, -46.63), (0.0, 179.99), (64.1, -21.9)]:
+            for raio_km in (0.5, 2, 10, 50):
+                precisao = precisao_para_raio(latitude, raio_km)
+                altura, largura = dimensoes_celula(precisao)
+                self.assertGreaterEqual(altura * KM_POR_GRAU, raio_km)
+                vizinhas = celulas_vizinhas(latitude, longitude, precisao)
+                self.assertEqual(len(vizinhas), len(set(vizinhas)))
+                for _ in range(50):
+                    # Ponto aleatório dentro do raio
+                    angulo = aleatorio.uniform(0, 2 * math.pi)
+                    km = raio_km * math.sqrt(aleatorio.random())
+                    lat = latitude + km * math.cos(angulo) / KM_POR_GRAU
+                    lng = longitude + km * math.sin(angulo) / (
+                        KM_POR_GRAU * math.cos(math.radians(latitude))
+                    )
+                    lng = (lng + 180.0) % 360.0 - 180.0
+                    with self.subTest(centro=(latitude, longitude), raio=raio_km):
+                        self.assertIn(codificar_geohash(lat, lng, precisao), vizinhas)
+
+    def test_distancia(self):
+        self.assertAlmostEqual(distancia_km(0, 0, 0, 1), 111.195, places=2)
+        self.assertAlmostEqual(distancia_km(-23.55, -46.63, -23.55, -46.63), 0.0)
+        self.assertAlmostEqual(
+            distancia_km(-23.55, -46.63, -22.9, -43.2),
+            distancia_km(-22.9, -43.2, -23.55, -46.63),
+        )
@@ -0,0 +1,133 @@
+import json
+import tempfile
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from rodas.geocodificacao import (
+    Coordenadas,
+    Geocodificador,
+    ProvedorArquivo,
+    ProvedorGeocodificacao,
+    normalizar_endereco,
+)
+from rodas.models import EnderecoGeocodificado
+
+HOSPITAL = Coordenadas.de_numeros(-23.5572, -46.6691, "Hospital das Clínicas")
+
+
+class ProvedorContador(ProvedorGeocodificacao):
+    """
+    Provedor em memória que conta as chamadas recebidas
+    """
+
+    nome = "teste"
+
+    def __init__(self, enderecos):
+        self.enderecos = {normalizar_endereco(e): c for e, c in enderecos.items()}
+        self.chamadas = 0
+
+    def geocodificar(self, endereco, normalizado):
+        self.chamadas += 1
+        return self.enderecos.get(normalizado)
+
+
+class NormalizarEnderecoTests(SimpleTestCase):
+    def test_formas_equivalentes(self):
+        self.assertEqual(
+            normalizar_endereco("Av. Dr. Enéas Carvalho de Aguiar, nº 255"),
+            "avenida doutor eneas carvalho de aguiar 255",
+        )
+        self.assertEqual(
+            normalizar_endereco("HOSP. São Paulo"),
+            normalizar_endereco("hospital sao paulo"),
+        )
+        self.assertEqual(normalizar_endereco(" , . "), "")
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class GeocodificadorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provedor = ProvedorContador({"Hospital das Clínicas": HOSPITAL})
+        self.geocodificador = Geocodificador(self.provedor, tamanho_lru=2)
+
+    def test_camadas_evitam_o_provedor(self):
+        self.assertEqual(
+            self.geocodificador.geocodificar("Hospital das Clínicas"), HOSPITAL
+        )
+        self.assertEqual(self.provedor.chamadas, 1)
+        self.assertTrue(EnderecoGeocodificado.objects.filter(provedor="teste").exists())
+
+        # LRU: nenhuma consulta, mesmo escrito de outro jeito
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.geocodificador.geocodificar("HOSPITAL DAS CLINICAS"), HOSPITAL
+            )
+
+        # Cache do Django
+        self.geocodificador.limpar_lru()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.geocodificador.geocodificar("Hospital das Clínicas"), HOSPITAL
+            )
+
+        # Banco, após perder o cache
+        self.geocodificador.limpar_lru()
+        cache.clear()
+        with self.assertNumQueries(1):
+            coordenadas = self.geocodificador.geocodificar("Hospital das Clínicas")
+        self.assertEqual(
+            (coordenadas.latitude, coordenadas.longitude),
+            (HOSPITAL.latitude, HOSPITAL.longitude),
+        )
+        self.assertEqual(self.provedor.chamadas, 1)
+
+    def test_nao_encontrado_fica_so_no_cache(self):
+        self.assertIsNone(self.geocodificador.geocodificar("Rua Inexistente, 1"))
+        self.assertIsNone(self.geocodificador.geocodificar("rua inexistente 1"))
+        self.assertEqual(self.provedor.chamadas, 1)
+        self.assertFalse(EnderecoGeocodificado.objects.exists())
+
+    def test_endereco_vazio_nao_consulta(self):
+        self.assertIsNone(self.geocodificador.geocodificar("  "))
+        self.assertEqual(self.provedor.chamadas, 0)
+
+    def test_lru_descarta_o_mais_antigo(self):
+        outros = {
+            "Rua A, 1": Coordenadas.de_numeros(-23.5, -46.6),
+            "Rua B, 2": Coordenadas.de_numeros(-23.6, -46.7),
+        }
+        self.provedor.enderecos.update(
+            {normalizar_endereco(e): c for e, c in outros.items()}
+        )
+        for endereco in ("Hospital das Clínicas", "Rua A, 1", "Rua B, 2"):
+            self.geocodificador.geocodificar(endereco)
+        self.assertEqual(len(self.geocodificador._lru), 2)
+        # O primeiro saiu da LRU; sem o cache do Django, volta a vir do banco
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.geocodificador.geocodificar("Hospital das Clínicas")
+        self.assertEqual(self.provedor.chamadas, 3)
+
+
+class ProvedorArquivoTests(SimpleTestCase):
+    def test_chaves_normalizadas(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = Path(pasta) / "enderecos.json"
+            caminho.write_text(
+                json.dumps({"Av. Paulista, 1000": [-23.5614, -46.6559]}),
+                encoding="utf-8",
+            )
+            provedor = ProvedorArquivo(caminho)
+        normalizado = normalizar_endereco("avenida paulista 1000")
+        coordenadas = provedor.geocodificar("avenida paulista 1000", normalizado)
+        self.assertEqual(coordenadas.latitude, Decimal("-23.56140000"))
+        self.assertIsNone(provedor.geocodificar("x", "x"))
+
+    def test_arquivo_ausente(self):
+        self.assertEqual(ProvedorArquivo("/nao/existe.json").enderecos, {})
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from rodas.testing import OrcamentoConsultasMixin, orcamentos_declarados
+
+from .auxiliares import (
+    STORAGES_SEM_MANIFESTO,
+    criar_corrida,
+    criar_motorista,
+    criar_paciente,
+)
+
+# Rotas principais de cada perfil, com os parâmetros GET de cada uma; as que
+# recebem ``corrida_id`` usam a corrida criada em ``setUpTestData``
+ROTAS_PACIENTE = {
+    "rodas:dashboard": {},
+    "rodas:profile": {},
+    "rodas:corridas_paciente": {},
+    "rodas:notificacoes": {},
+    "rodas:corrida_detalhes": {},
+    "rodas:corrida_api": {},
+}
+ROTAS_MOTORISTA = {
+    "rodas:dashboard": {},
+    "rodas:profile": {},
+    "rodas:corridas_motorista": {},
+    "rodas:notificacoes": {},
+    "rodas:corridas_proximas": {"lat": "-23.55", "lng": "-46.63"},
+    "rodas:corrida_detalhes": {},
+    "rodas:corrida_api": {},
+}
+ROTAS_COM_CORRIDA = {"rodas:corrida_detalhes", "rodas:corrida_api"}
+
+
+@override_settings(STORAGES=STORAGES_SEM_MANIFESTO)
+class OrcamentoRotasTests(OrcamentoConsultasMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.paciente = criar_paciente()
+        cls.motorista = criar_motorista(online=True)
+        cls.corrida = criar_corrida(
+            cls.paciente,
+            Decimal("-23.55"),
+            Decimal("-46.63"),
+            motorista=cls.motorista,
+        )
+
+    def test_todas_as_rotas_declaram_orcamento(self):
+        for nome, orcamento in orcamentos_declarados().items():
+            with self.subTest(rota=nome):
+                self.assertIsNotNone(
+                    orcamento, f"A view de {nome} não declara orcamento_consultas."
+                )
+
+    def verificar_rotas(self, usuario, rotas):
+        orcamentos = orcamentos_declarados()
+        self.assertFalse(set(rotas) - orcamentos.keys(), "Rotas inexistentes.")
+        self.client.force_login(usuario)
+        for nome, orcamento in orcamentos.items():
+            if nome not in rotas:
+                continue
+            kwargs = (
+                {"corrida_id": self.corrida.pk} if nome in ROTAS_COM_CORRIDA else {}
+            )
+            with self.subTest(rota=nome):
+                resposta = self.assertDentroDoOrcamento(
+                    nome, dados=rotas[nome], orcamento=orcamento, **kwargs
+                )
+                self.assertEqual(resposta.status_code, 200)
+
+    def test_rotas_do_paciente(self):
+        self.verificar_rotas(self.paciente.usuario, ROTAS_PACIENTE)
+
+    def test_rotas_do_motorista(self):
+        self.verificar_rotas(self.motorista.usuario, ROTAS_MOTORISTA)
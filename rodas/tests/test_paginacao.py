@@ -0,0 +1,98 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from rodas.models import Corrida
+from rodas.paginacao import (
+    chave_cursor,
+    codificar_cursor,
+    decodificar_cursor,
+    paginar_por_cursor,
+)
+
+from .auxiliares import criar_corrida, criar_paciente
+
+
+class PaginacaoCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        paciente = criar_paciente()
+        base = timezone.now().replace(microsecond=0)
+        # Grupos de datas repetidas atravessam as fronteiras das páginas
+        for horas in (0, 0, 0, 1, 1, 2, 2, 2, 2, 3, 4, 4):
+            criar_corrida(paciente, data_hora_agendada=base + timedelta(hours=horas))
+        cls.queryset = Corrida.objects.all()
+        cls.ordem = list(
+            cls.queryset.order_by("-data_hora_agendada", "-id").values_list(
+                "pk", flat=True
+            )
+        )
+
+    def paginas_para_frente(self, por_pagina):
+        paginas, cursor = [], None
+        while True:
+            pagina = paginar_por_cursor(self.queryset, cursor, por_pagina)
+            paginas.append(pagina)
+            if not pagina.has_next:
+                return paginas
+            cursor = pagina.proximo
+
+    def test_percorre_para_frente_sem_repetir_nem_pular(self):
+        for por_pagina in (1, 2, 3, 5, 12, 20):
+            with self.subTest(por_pagina=por_pagina):
+                paginas = self.paginas_para_frente(por_pagina)
+                vistos = [c.pk for p in paginas for c in p.object_list]
+                self.assertEqual(vistos, self.ordem)
+                self.assertFalse(paginas[0].has_previous)
+                self.assertTrue(all(p.has_previous for p in paginas[1:]))
+
+    def test_volta_pelas_mesmas_paginas(self):
+        for por_pagina in (2, 3, 5):
+            with self.subTest(por_pagina=por_pagina):
+                paginas = self.paginas_para_frente(por_pagina)
+                pagina = paginas[-1]
+                for esperada in reversed(paginas[:-1]):
+                    pagina = paginar_por_cursor(
+                        self.queryset, pagina.anterior, por_pagina
+                    )
+                    self.assertEqual(pagina.object_list, esperada.object_list)
+                    self.assertTrue(pagina.has_next)
+                self.assertFalse(pagina.has_previous)
+
+    def test_cursor_malformado_leva_a_primeira_pagina(self):
+        primeira = paginar_por_cursor(self.queryset, None, 5)
+        for cursor in ("", "lixo", "e30"):
+            with self.subTest(cursor=cursor):
+                pagina = paginar_por_cursor(self.queryset, cursor, 5)
+                self.assertEqual(pagina.object_list, primeira.object_list)
+                self.assertFalse(pagina.has_previous)
+
+    def test_total_aproximado(self):
+        pagina = paginar_por_cursor(self.queryset, None, 5, com_total=True)
+        self.assertEqual(pagina.total_aproximado, len(self.ordem))
+
+    def test_queryset_vazio(self):
+        pagina = paginar_por_cursor(Corrida.objects.none(), None, 5)
+        self.assertEqual(pagina.object_list, [])
+        self.assertFalse(pagina.has_other_pages)
+
+
+class CursorTests(TestCase):
+    def test_ida_e_volta(self):
+        corrida = criar_corrida(criar_paciente())
+        cursor = codificar_cursor(corrida, "a")
+        self.assertEqual(
+            decodificar_cursor(cursor), (corrida.data_hora_agendada, corrida.pk, "a")
+        )
+        self.assertEqual(
+            chave_cursor(cursor),
+            f"a:{corrida.data_hora_agendada.isoformat()}:{corrida.pk}",
+        )
+
+    def test_malformados(self):
+        for cursor in ("lixo", "e30", "eyJzIjoieCJ9", "!!!"):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decodificar_cursor(cursor))
+                self.assertEqual(chave_cursor(cursor), "")
+        self.assertEqual(chave_cursor(None), "")
@@ -0,0 +1,67 @@
+import time
+
+from django.test import TestCase, override_settings
+
+from rodas import presenca
+from rodas.models import Motorista
+
+from .auxiliares import RedisDeTesteMixin, RedisForaDoArMixin, criar_motorista
+
+
+@override_settings(PRESENCA_TTL=90)
+class PresencaTests(RedisDeTesteMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.motorista = criar_motorista()
+        self.outro = criar_motorista()
+
+    def test_online_e_offline(self):
+        presenca.marcar_online(self.motorista)
+        self.assertTrue(presenca.esta_online(self.motorista))
+        self.assertFalse(presenca.esta_online(self.outro))
+        self.assertEqual(presenca.motoristas_online(), {self.motorista.pk})
+
+        presenca.marcar_offline(self.motorista)
+        self.assertFalse(presenca.esta_online(self.motorista))
+        self.assertEqual(presenca.motoristas_online(), set())
+
+    def test_expira_sem_batimento(self):
+        agora = time.time()
+        presenca.marcar_online(self.motorista, agora=agora - 100)
+        presenca.marcar_online(self.outro, agora=agora - 10)
+        self.assertFalse(presenca.esta_online(self.motorista, agora=agora))
+        self.assertEqual(presenca.motoristas_online(agora), {self.outro.pk})
+        self.assertEqual(presenca.contar_online(agora), 1)
+
+        # O batimento não ressuscita quem expirou, mas renova quem está online
+        self.assertFalse(presenca.batimento(self.motorista, agora=agora))
+        self.assertTrue(presenca.batimento(self.outro, agora=agora))
+        self.assertIsNone(self.redis.zscore(presenca.CHAVE_ONLINE, self.motorista.pk))
+
+    def test_batimento_nao_coloca_online(self):
+        self.assertFalse(presenca.batimento(self.motorista))
+        self.assertFalse(presenca.esta_online(self.motorista))
+
+    def test_reconciliar_sincroniza_o_banco(self):
+        Motorista.objects.filter(pk=self.outro.pk).update(online=True)
+        presenca.marcar_online(self.motorista)
+        self.assertEqual(presenca.reconciliar(tamanho_lote=1), (1, 1))
+        self.assertEqual(
+            set(Motorista.objects.filter(online=True).values_list("pk", flat=True)),
+            {self.motorista.pk},
+        )
+        self.assertEqual(presenca.reconciliar(), (0, 0))
+
+
+class PresencaSemRedisTests(RedisForaDoArMixin, TestCase):
+    def test_usa_o_campo_do_banco(self):
+        motorista = criar_motorista()
+        with self.assertLogs("rodas.presenca", "ERROR"):
+            presenca.marcar_online(motorista)
+            motorista.refresh_from_db()
+            self.assertTrue(motorista.online)
+            self.assertTrue(presenca.esta_online(motorista))
+            self.assertEqual(presenca.motoristas_online(), {motorista.pk})
+            presenca.marcar_offline(motorista)
+        motorista.refresh_from_db()
+        self.assertFalse(motorista.online)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from rodas.models import Corrida, CorridaStatus
+from rodas.testing import OrcamentoConsultasMixin
+
+from .auxiliares import (
+    STORAGES_SEM_MANIFESTO,
+    criar_corrida,
+    criar_motorista,
+    criar_paciente,
+)
+
+
+@override_settings(STORAGES=STORAGES_SEM_MANIFESTO)
+class CorridasProximasTests(OrcamentoConsultasMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        paciente = criar_paciente()
+        agora = timezone.now()
+        cls.perto = criar_corrida(
+            paciente, Decimal("-23.551"), Decimal("-46.631"), data_hora_agendada=agora
+        )
+        cls.longe = criar_corrida(paciente, Decimal("-22.9"), Decimal("-43.2"))
+        cls.sem_localizacao = criar_corrida(
+            paciente, data_hora_agendada=agora + timedelta(hours=2)
+        )
+        cls.sem_localizacao_antes = criar_corrida(
+            paciente, data_hora_agendada=agora + timedelta(hours=1)
+        )
+        criar_corrida(paciente, status=CorridaStatus.CANCELADA)
+
+    def test_completa_com_corridas_sem_localizacao(self):
+        corridas = Corrida.objects.pendentes().proximas(-23.55, -46.63, raio_km=5)
+        self.assertEqual(
+            corridas, [self.perto, self.sem_localizacao_antes, self.sem_localizacao]
+        )
+        self.assertIsNotNone(corridas[0].distancia_km)
+        self.assertIsNone(corridas[1].distancia_km)
+
+    def test_proximas_tem_prioridade_no_limite(self):
+        corridas = Corrida.objects.pendentes().proximas(
+            -23.55, -46.63, raio_km=5, limite=2
+        )
+        self.assertEqual(corridas, [self.perto, self.sem_localizacao_antes])
+
+    def test_dashboard_do_motorista_com_localizacao(self):
+        motorista = criar_motorista(
+            latitude_atual=Decimal("-23.55"), longitude_atual=Decimal("-46.63")
+        )
+        self.client.force_login(motorista.usuario)
+        resposta = self.assertDentroDoOrcamento("rodas:dashboard")
+        self.assertEqual(
+            list(resposta.context["corridas_pendentes"]),
+            [self.perto, self.sem_localizacao_antes, self.sem_localizacao],
+        )
+
+    def test_api_inclui_corridas_sem_localizacao(self):
+        motorista = criar_motorista()
+        self.client.force_login(motorista.usuario)
+        resposta = self.assertDentroDoOrcamento(
+            "rodas:corridas_proximas", dados={"lat": "-23.55", "lng": "-46.63"}
+        )
+        corridas = resposta.json()["corridas"]
+        self.assertEqual(
+            [corrida["id"] for corrida in corridas],
+            [self.perto.pk, self.sem_localizacao_antes.pk, self.sem_localizacao.pk],
+        )
+        self.assertIsNone(corridas[1]["latitude_origem"])
+        self.assertIsNone(corridas[1]["distancia_km"])
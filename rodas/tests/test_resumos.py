@@ -0,0 +1,112 @@
+from datetime import date, datetime, time, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from rodas.models import (
+    Corrida,
+    CorridaEvento,
+    CorridaStatus,
+    MarcaAtualizacao,
+    ResumoDiario,
+    Usuario,
+)
+from rodas.resumos import NOME_MARCA, atualizar_resumos, dias_alterados
+
+from .auxiliares import criar_corrida, criar_motorista, criar_paciente
+
+DIA_1 = date(2026, 3, 2)
+DIA_2 = date(2026, 3, 3)
+
+
+def as_dez(dia: date, segundos: int = 0) -> datetime:
+    return timezone.make_aware(datetime.combine(dia, time(10))) + timedelta(
+        seconds=segundos
+    )
+
+
+class ResumosTests(TestCase):
+    def setUp(self):
+        paciente = criar_paciente()
+        Usuario.objects.filter(pk=paciente.usuario_id).update(cidade="São Paulo")
+        motorista = criar_motorista()
+        self.aceitas = [
+            self.criar(paciente, DIA_1, motorista, aceite_em=segundos)
+            for segundos in (60, 120, 600)
+        ]
+        self.pendente = self.criar(paciente, DIA_1)
+        self.cancelada = self.criar(paciente, DIA_2, status=CorridaStatus.CANCELADA)
+        # Os eventos de criação ficam antes da marca das execuções abaixo
+        self.agora = timezone.now() + timedelta(hours=1)
+
+    def criar(self, paciente, dia, motorista=None, aceite_em=None, **extra):
+        corrida = criar_corrida(paciente, motorista=motorista, **extra)
+        valores = {"data_criacao": as_dez(dia)}
+        if aceite_em is not None:
+            valores.update(
+                status=CorridaStatus.ACEITA, data_hora_aceite=as_dez(dia, aceite_em)
+            )
+        Corrida.objects.filter(pk=corrida.pk).update(**valores)
+        return corrida
+
+    def resumo(self, dia):
+        return ResumoDiario.objects.get(dia=dia, cidade="São Paulo")
+
+    def test_primeira_execucao_resume_todos_os_dias(self):
+        resultado = atualizar_resumos(agora=self.agora)
+        self.assertEqual((resultado.dias, resultado.linhas), (2, 2))
+
+        dia_1 = self.resumo(DIA_1)
+        self.assertEqual(
+            (dia_1.total, dia_1.pendentes, dia_1.em_curso, dia_1.canceladas),
+            (4, 1, 3, 0),
+        )
+        self.assertEqual(dia_1.motoristas_ativos, 1)
+        self.assertEqual(dia_1.aceite_p50_segundos, 120)
+        self.assertEqual(dia_1.aceite_p90_segundos, 504)
+        self.assertEqual(self.resumo(DIA_2).canceladas, 1)
+        self.assertEqual(
+            MarcaAtualizacao.objects.get(nome=NOME_MARCA).marca, self.agora
+        )
+
+    def test_incremental_recalcula_so_os_dias_com_eventos(self):
+        atualizar_resumos(agora=self.agora)
+
+        # Alteração sem evento não é vista pela atualização incremental
+        Corrida.objects.filter(pk=self.cancelada.pk).update(
+            status=CorridaStatus.CONCLUIDA
+        )
+        self.assertEqual(atualizar_resumos(agora=self.agora).dias, 0)
+
+        Corrida.objects.filter(pk=self.pendente.pk).update(
+            status=CorridaStatus.CANCELADA
+        )
+        CorridaEvento.objects.create(
+            corrida=self.pendente,
+            status=CorridaStatus.CANCELADA,
+            registrado_em=self.agora + timedelta(minutes=1),
+        )
+        depois = self.agora + timedelta(minutes=2)
+        self.assertEqual(dias_alterados(self.agora), [DIA_1])
+        self.assertEqual(atualizar_resumos(agora=depois).dias, 1)
+        self.assertEqual(self.resumo(DIA_1).canceladas, 1)
+        self.assertEqual(self.resumo(DIA_2).concluidas, 0)
+
+        # Repetir a atualização não muda o resultado
+        atualizar_resumos(agora=depois)
+        self.assertEqual(self.resumo(DIA_1).canceladas, 1)
+        self.assertEqual(ResumoDiario.objects.count(), 2)
+
+    def test_completa_remove_dias_sem_corridas(self):
+        atualizar_resumos(agora=self.agora)
+        self.cancelada.delete()
+        atualizar_resumos(agora=self.agora + timedelta(minutes=1))
+        self.assertTrue(ResumoDiario.objects.filter(dia=DIA_2).exists())
+
+        atualizar_resumos(completo=True, agora=self.agora + timedelta(minutes=2))
+        self.assertFalse(ResumoDiario.objects.filter(dia=DIA_2).exists())
+        self.assertEqual(self.resumo(DIA_1).total, 4)
+
+    def test_lotes_de_um_dia(self):
+        resultado = atualizar_resumos(dias_por_lote=1, agora=self.agora)
+        self.assertEqual((resultado.dias, resultado.linhas), (2, 2))
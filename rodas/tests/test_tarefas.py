@@ -0,0 +1,160 @@
+import json
+import time
+from unittest import mock
+
+from django.test import TestCase
+
+from rodas import tarefas
+
+from .auxiliares import RedisDeTesteMixin, RedisForaDoArMixin
+
+
+class TarefasDeTesteMixin:
+    """
+    Registra ``anotar`` e ``anotar_lote``, que guardam os argumentos recebidos
+    e falham quando recebem ``falhar=True``
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.executadas = []
+        registro = mock.patch.dict(tarefas.TAREFAS)
+        registro.start()
+        self.addCleanup(registro.stop)
+
+        def anotar(valor, falhar=False):
+            if falhar:
+                raise RuntimeError(valor)
+            self.executadas.append(valor)
+
+        def anotar_lote(lote):
+            if any(kwargs.get("falhar") for kwargs in lote):
+                raise RuntimeError("lote")
+            self.executadas.extend(kwargs["valor"] for kwargs in lote)
+
+        tarefas.tarefa("anotar")(anotar)
+        tarefas.tarefa("anotar_lote", em_lote=True)(anotar_lote)
+
+
+class WorkerTests(TarefasDeTesteMixin, RedisDeTesteMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.worker = tarefas.Worker(nome="teste", espera=0.1)
+
+    def enfileirar(self, nome, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            tarefas.enfileirar(nome, **kwargs)
+
+    def rodar(self):
+        return self.worker.processar(self.worker.retirar(100))
+
+    def test_enfileira_depois_do_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            tarefas.enfileirar("anotar", valor=1)
+            self.assertEqual(self.redis.llen(tarefas.CHAVE_FILA), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.redis.llen(tarefas.CHAVE_FILA), 1)
+
+        resultado = self.rodar()
+        self.assertEqual((resultado.tarefas, resultado.falhas), (1, 0))
+        self.assertEqual(self.executadas, [1])
+        self.assertFalse(self.redis.exists(self.worker.processando))
+        self.assertEqual(
+            self.redis.hget(tarefas.chave_metricas("anotar"), "executadas"), "1"
+        )
+
+    def test_tarefa_desconhecida(self):
+        with self.assertRaises(KeyError):
+            tarefas.enfileirar("nao_existe")
+
+    def test_falha_reagenda_com_espera_exponencial(self):
+        self.enfileirar("anotar", valor=1, falhar=True)
+        for tentativa in range(1, tarefas.MAXIMO_TENTATIVAS):
+            with self.subTest(tentativa=tentativa):
+                antes = time.time()
+                with self.assertLogs("rodas.tarefas", "ERROR"):
+                    resultado = self.rodar()
+                self.assertEqual((resultado.falhas, resultado.descartadas), (1, 0))
+                [(bruta, horario)] = self.redis.zrange(
+                    tarefas.CHAVE_AGENDADAS, 0, -1, withscores=True
+                )
+                self.assertEqual(json.loads(bruta)["tentativas"], tentativa)
+                espera = tarefas.ESPERA_BASE_SEGUNDOS * 2 ** (tentativa - 1)
+                self.assertGreaterEqual(horario, antes + espera)
+
+                # Ainda não chegou a hora; depois dela, volta à fila
+                self.assertEqual(self.worker.liberar_agendadas(), 0)
+                with mock.patch("time.time", return_value=horario):
+                    self.assertEqual(self.worker.liberar_agendadas(), 1)
+                self.assertEqual(self.redis.zcard(tarefas.CHAVE_AGENDADAS), 0)
+
+        # A última tentativa esgota o limite e a tarefa é descartada
+        with self.assertLogs("rodas.tarefas", "ERROR"):
+            resultado = self.rodar()
+        self.assertEqual((resultado.falhas, resultado.descartadas), (0, 1))
+        self.assertEqual(self.redis.zcard(tarefas.CHAVE_AGENDADAS), 0)
+        descartada = json.loads(self.redis.lindex(tarefas.CHAVE_DESCARTADAS, 0))
+        self.assertEqual(descartada["tentativas"], tarefas.MAXIMO_TENTATIVAS)
+        self.assertEqual(self.executadas, [])
+
+    def test_liberar_agendadas_em_varias_rodadas(self):
+        agora = time.time()
+        self.redis.zadd(
+            tarefas.CHAVE_AGENDADAS,
+            {f"tarefa-{n}": agora - 1 for n in range(5)} | {"futura": agora + 60},
+        )
+        with mock.patch.object(tarefas, "LOTE_AGENDADAS", 2):
+            self.assertEqual(self.worker.liberar_agendadas(), 5)
+        self.assertEqual(self.redis.llen(tarefas.CHAVE_FILA), 5)
+        self.assertEqual(self.redis.zrange(tarefas.CHAVE_AGENDADAS, 0, -1), ["futura"])
+
+    def test_lote_com_falha_executa_uma_a_uma(self):
+        for valor in (1, 2, 3):
+            self.enfileirar("anotar_lote", valor=valor, falhar=valor == 2)
+        with self.assertLogs("rodas.tarefas", "WARNING"):
+            resultado = self.rodar()
+        self.assertEqual(resultado.falhas, 1)
+        self.assertEqual(self.executadas, [1, 3])
+
+    def test_mensagens_malformadas_sao_descartadas(self):
+        self.enfileirar("anotar", valor=1)
+        malformadas = ["nao e json", "[]", json.dumps({"tarefa": "anotar"})]
+        self.redis.rpush(tarefas.CHAVE_FILA, *malformadas)
+        self.enfileirar("anotar", valor=2)
+
+        with self.assertLogs("rodas.tarefas", "ERROR") as logs:
+            resultado = self.rodar()
+        self.assertEqual(len(logs.records), 3)
+        self.assertEqual((resultado.tarefas, resultado.descartadas), (5, 3))
+        self.assertEqual(self.executadas, [1, 2])
+        self.assertEqual(
+            sorted(self.redis.lrange(tarefas.CHAVE_DESCARTADAS, 0, -1)),
+            sorted(malformadas),
+        )
+        self.assertFalse(self.redis.exists(self.worker.processando))
+
+    def test_recupera_tarefas_interrompidas(self):
+        self.enfileirar("anotar", valor=1)
+        self.worker.retirar(100)
+        # O processo caiu antes de concluir: um novo worker de mesmo nome
+        # devolve a tarefa à fila
+        novo = tarefas.Worker(nome="teste", espera=0.1)
+        self.assertEqual(novo.recuperar(), 1)
+        novo.processar(novo.retirar(100))
+        self.assertEqual(self.executadas, [1])
+
+
+class TarefasSemRedisTests(TarefasDeTesteMixin, RedisForaDoArMixin, TestCase):
+    def test_executa_na_hora(self):
+        with self.assertLogs("rodas.tarefas", "ERROR"):
+            with self.captureOnCommitCallbacks(execute=True):
+                tarefas.enfileirar("anotar", valor=1)
+        self.assertEqual(self.executadas, [1])
+
+    def test_falha_na_execucao_direta_nao_propaga(self):
+        with self.assertLogs("rodas.tarefas", "ERROR") as logs:
+            with self.captureOnCommitCallbacks(execute=True):
+                tarefas.enfileirar("anotar", valor=1, falhar=True)
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(self.executadas, [])
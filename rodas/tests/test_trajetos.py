@@ -0,0 +1,125 @@
+import gzip
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from rodas import trajetos
+from rodas.models import CorridaStatus, PontoTrajeto
+
+from .auxiliares import (
+    RedisDeTesteMixin,
+    criar_corrida,
+    criar_motorista,
+    criar_paciente,
+)
+
+
+def corpo(pontos, corrida=None) -> bytes:
+    return json.dumps({"corrida": corrida, "pontos": pontos}).encode()
+
+
+class DecodificarLoteTests(SimpleTestCase):
+    def test_ordena_e_ignora_pontos_no_futuro(self):
+        agora = timezone.now().timestamp()
+        corrida_id, pontos = trajetos.decodificar_lote(
+            corpo(
+                [
+                    [agora, -23.5, -46.6],
+                    [agora - 10, -23.4, -46.5],
+                    [agora + 3600, 0, 0],
+                ],
+                corrida="7",
+            )
+        )
+        self.assertEqual(corrida_id, 7)
+        self.assertEqual(pontos[:, 0].tolist(), [agora - 10, agora])
+
+    def test_gzip(self):
+        agora = timezone.now().timestamp()
+        _, pontos = trajetos.decodificar_lote(
+            gzip.compress(corpo([[agora, -23.5, -46.6]])), "gzip"
+        )
+        self.assertEqual(len(pontos), 1)
+
+    def test_lotes_invalidos(self):
+        agora = timezone.now().timestamp()
+        casos = [
+            (b"lixo", ""),
+            (corpo([]), ""),
+            (corpo([[agora, -23.5]]), ""),
+            (corpo([[agora, 91, 0]]), ""),
+            (corpo([[agora + 3600, 0, 0]]), ""),
+            (corpo([[agora, 0, 0]] * (trajetos.MAXIMO_PONTOS_LOTE + 1)), ""),
+            (corpo([[agora, 0, 0]]), "br"),
+            (b"nao e gzip", "gzip"),
+            (gzip.compress(b" " * (trajetos.MAXIMO_BYTES_LOTE + 1)), "gzip"),
+        ]
+        for conteudo, codificacao in casos:
+            with self.subTest(conteudo=conteudo[:30], codificacao=codificacao):
+                with self.assertRaises(trajetos.LoteInvalido):
+                    trajetos.decodificar_lote(conteudo, codificacao)
+
+
+class GravarPendentesTests(RedisDeTesteMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.motorista = criar_motorista()
+        self.inicio = timezone.now() - timedelta(minutes=10)
+        self.corrida = criar_corrida(
+            criar_paciente(),
+            motorista=self.motorista,
+            status=CorridaStatus.EM_ANDAMENTO,
+            data_hora_inicio=self.inicio,
+        )
+
+    def registrar(self, corrida_id, *deslocamentos, motorista=None):
+        base = self.inicio.timestamp()
+        _, pontos = trajetos.decodificar_lote(
+            corpo([[base + d, -23.5 + d / 1e4, -46.6] for d in deslocamentos])
+        )
+        trajetos.registrar_pontos((motorista or self.motorista).pk, corrida_id, pontos)
+
+    def test_grava_os_pontos_e_a_posicao_atual(self):
+        self.registrar(self.corrida.pk, 60, 120)
+        self.registrar(None, 180)
+        latitude, longitude, epoch = trajetos.posicao_atual(self.motorista.pk)
+        self.assertAlmostEqual(latitude, -23.482)
+        self.assertEqual(
+            trajetos.posicoes_atuais([self.motorista.pk, 0]).keys(), {self.motorista.pk}
+        )
+
+        resultado = trajetos.gravar_pendentes()
+        self.assertEqual(
+            (resultado.lotes, resultado.pontos, resultado.motoristas), (2, 2, 1)
+        )
+        self.assertEqual(PontoTrajeto.objects.filter(corrida=self.corrida).count(), 2)
+        self.motorista.refresh_from_db()
+        self.assertAlmostEqual(float(self.motorista.latitude_atual), -23.482)
+        self.assertEqual(self.redis.llen(trajetos.CHAVE_BUFFER), 0)
+
+    def test_descarta_pontos_fora_da_corrida(self):
+        outro = criar_motorista()
+        self.registrar(self.corrida.pk, -3600, 60)  # antes do início
+        self.registrar(self.corrida.pk, 60, motorista=outro)  # corrida alheia
+        resultado = trajetos.gravar_pendentes()
+        self.assertEqual((resultado.pontos, resultado.descartados), (1, 2))
+
+    def test_lote_rejeitado_vai_para_os_descartados(self):
+        self.registrar(self.corrida.pk, 60)
+        self.registrar(self.corrida.pk, 120)
+        # Gravação conjunta e o primeiro lote rejeitados; o segundo passa
+        falhas = [IntegrityError(), IntegrityError(), None, None]
+        with (
+            mock.patch("rodas.trajetos._gravar", side_effect=falhas) as gravar,
+            self.assertLogs("rodas.trajetos", "WARNING"),
+        ):
+            resultado = trajetos.gravar_pendentes()
+        self.assertEqual(gravar.call_count, 4)
+        self.assertEqual((resultado.pontos, resultado.lotes_descartados), (1, 1))
+        self.assertEqual(self.redis.llen(trajetos.CHAVE_BUFFER), 0)
+        descartado = json.loads(self.redis.lindex(trajetos.CHAVE_DESCARTADOS, 0))
+        self.assertEqual(descartado["p"][0][0], round(self.inicio.timestamp() + 60, 3))
@@ -0,0 +1,121 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from rodas.models import Corrida, CorridaEvento, CorridaStatus
+from rodas.transicoes import (
+    TRANSICOES,
+    aceitar_corrida,
+    aplicar_transicao,
+    aplicar_transicao_em_lote,
+)
+
+from .auxiliares import criar_corrida, criar_motorista, criar_paciente
+
+
+class TransicoesTests(TestCase):
+    def setUp(self):
+        self.paciente = criar_paciente()
+        self.motorista = criar_motorista()
+        self.outro_motorista = criar_motorista()
+        self.corrida = criar_corrida(self.paciente)
+        for alvo in ("enfileirar", "publicar"):
+            patcher = mock.patch(f"rodas.transicoes.{alvo}")
+            setattr(self, alvo, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def status_da_corrida(self) -> str:
+        return Corrida.objects.values_list("status", flat=True).get(pk=self.corrida.pk)
+
+    def test_segundo_aceite_perde(self):
+        self.assertTrue(aceitar_corrida(self.corrida.pk, self.motorista.pk))
+        self.assertFalse(aceitar_corrida(self.corrida.pk, self.outro_motorista.pk))
+        self.corrida.refresh_from_db()
+        self.assertEqual(self.corrida.motorista_id, self.motorista.pk)
+        self.assertIsNotNone(self.corrida.data_hora_aceite)
+
+    def test_aceite_de_corrida_inexistente(self):
+        self.assertFalse(aceitar_corrida(0, self.motorista.pk))
+
+    def test_caminho_completo(self):
+        aceitar_corrida(self.corrida.pk, self.motorista.pk)
+        for destino in (
+            CorridaStatus.EM_ANDAMENTO,
+            CorridaStatus.MOTORISTA_CHEGOU,
+            CorridaStatus.CONCLUIDA,
+        ):
+            with self.subTest(destino=destino):
+                self.assertTrue(
+                    aplicar_transicao(
+                        self.corrida.pk, destino, motorista_id=self.motorista.pk
+                    )
+                )
+        self.corrida.refresh_from_db()
+        for destino in TRANSICOES:
+            if destino != CorridaStatus.CANCELADA:
+                campo = TRANSICOES[destino].campo_data
+                self.assertIsNotNone(getattr(self.corrida, campo), campo)
+        self.motorista.refresh_from_db()
+        self.assertEqual(self.motorista.total_corridas, 1)
+        self.assertEqual(
+            list(
+                CorridaEvento.objects.filter(corrida=self.corrida)
+                .order_by("registrado_em", "pk")
+                .values_list("status", flat=True)
+            ),
+            [
+                CorridaStatus.PENDENTE,
+                CorridaStatus.ACEITA,
+                CorridaStatus.EM_ANDAMENTO,
+                CorridaStatus.MOTORISTA_CHEGOU,
+                CorridaStatus.CONCLUIDA,
+            ],
+        )
+
+    def test_recusa_origem_invalida(self):
+        self.assertFalse(aplicar_transicao(self.corrida.pk, CorridaStatus.CONCLUIDA))
+        self.assertEqual(self.status_da_corrida(), CorridaStatus.PENDENTE)
+        self.enfileirar.assert_not_called()
+        self.publicar.assert_not_called()
+
+    def test_outro_motorista_nao_avanca_a_corrida(self):
+        aceitar_corrida(self.corrida.pk, self.motorista.pk)
+        self.assertFalse(
+            aplicar_transicao(
+                self.corrida.pk,
+                CorridaStatus.EM_ANDAMENTO,
+                motorista_id=self.outro_motorista.pk,
+            )
+        )
+        self.assertEqual(self.status_da_corrida(), CorridaStatus.ACEITA)
+
+    def test_lote_retorna_so_as_alteradas(self):
+        concluida = criar_corrida(self.paciente, status=CorridaStatus.CONCLUIDA)
+        pendente = criar_corrida(self.paciente)
+        alteradas = aplicar_transicao_em_lote(
+            [self.corrida.pk, concluida.pk, pendente.pk],
+            CorridaStatus.CANCELADA,
+            motivo="Consulta remarcada",
+        )
+        self.assertEqual(sorted(alteradas), sorted([self.corrida.pk, pendente.pk]))
+        concluida.refresh_from_db()
+        self.assertEqual(concluida.status, CorridaStatus.CONCLUIDA)
+        self.publicar.assert_called_once()
+
+    def test_cancelamento_notifica_motorista_e_nao_o_autor(self):
+        aceitar_corrida(self.corrida.pk, self.motorista.pk)
+        self.enfileirar.reset_mock()
+        aplicar_transicao(
+            self.corrida.pk,
+            CorridaStatus.CANCELADA,
+            autor_id=self.paciente.usuario_id,
+            motivo="Paciente internado",
+        )
+        self.corrida.refresh_from_db()
+        self.assertEqual(self.corrida.cancelada_por_id, self.paciente.usuario_id)
+        self.assertEqual(self.corrida.motivo_cancelamento, "Paciente internado")
+        notificacoes = self.enfileirar.call_args.kwargs["notificacoes"]
+        self.assertEqual(
+            [n["usuario_id"] for n in notificacoes], [self.motorista.usuario_id]
+        )
+        self.assertIn("Motivo: Paciente internado", notificacoes[0]["mensagem"])
@@ -0,0 +1,89 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from rodas.models import Corrida, CorridaStatus
+from rodas.transicoes import aceitar_corrida, aplicar_transicao
+from rodas.versoes import versoes_motorista, versoes_paciente
+
+from .auxiliares import criar_corrida, criar_motorista, criar_paciente
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class VersoesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.paciente = criar_paciente()
+        self.motorista = criar_motorista()
+        for alvo in ("enfileirar", "publicar"):
+            patcher = mock.patch(f"rodas.transicoes.{alvo}")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def versoes(self):
+        global_, motorista = versoes_motorista(self.motorista.pk)
+        return global_, versoes_paciente(self.paciente.pk), motorista
+
+    def escrever(self, funcao, *args, **kwargs):
+        """
+        Executa a escrita e diz quais versões mudaram: global, do paciente e
+        do motorista
+        """
+        antes = self.versoes()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.resultado = funcao(*args, **kwargs)
+        return tuple(a != d for a, d in zip(antes, self.versoes()))
+
+    def test_corrida_pendente_muda_a_lista(self):
+        self.assertEqual(
+            self.escrever(criar_corrida, self.paciente), (True, True, False)
+        )
+        corrida = Corrida.objects.get(pk=self.resultado.pk)
+        corrida.endereco_destino = "Hospital São Paulo"
+        self.assertEqual(self.escrever(corrida.save), (True, True, False))
+        self.assertEqual(
+            self.escrever(aceitar_corrida, corrida.pk, self.motorista.pk),
+            (True, True, True),
+        )
+
+    def test_andamento_nao_muda_a_lista(self):
+        corrida = criar_corrida(self.paciente)
+        aceitar_corrida(corrida.pk, self.motorista.pk)
+        self.assertEqual(
+            self.escrever(
+                aplicar_transicao,
+                corrida.pk,
+                CorridaStatus.EM_ANDAMENTO,
+                motorista_id=self.motorista.pk,
+            ),
+            (False, True, True),
+        )
+        corrida = Corrida.objects.get(pk=corrida.pk)
+        corrida.endereco_destino = "Hospital São Paulo"
+        self.assertEqual(self.escrever(corrida.save), (False, True, True))
+
+    def test_corrida_criada_ja_aceita_nao_muda_a_lista(self):
+        self.assertEqual(
+            self.escrever(
+                criar_corrida,
+                self.paciente,
+                motorista=self.motorista,
+                status=CorridaStatus.ACEITA,
+            ),
+            (False, True, True),
+        )
+
+    def test_instancia_sem_status_original_muda_a_lista(self):
+        corrida = criar_corrida(
+            self.paciente, motorista=self.motorista, status=CorridaStatus.ACEITA
+        )
+        copia = Corrida(
+            **{
+                campo.attname: getattr(corrida, campo.attname)
+                for campo in Corrida._meta.concrete_fields
+            }
+        )
+        self.assertTrue(self.escrever(copia.save)[0])
@@ -0,0 +1,85 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rodas.models import Corrida, TipoUsuario
+
+from .auxiliares import (
+    STORAGES_SEM_MANIFESTO,
+    criar_corrida,
+    criar_motorista,
+    criar_paciente,
+    criar_usuario,
+)
+
+
+@override_settings(STORAGES=STORAGES_SEM_MANIFESTO)
+class CorridaDetalhesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.paciente = criar_paciente()
+        cls.corrida = criar_corrida(cls.paciente)
+        cls.url = reverse("rodas:corrida_detalhes", args=[cls.corrida.pk])
+
+    def test_paciente_da_corrida_acompanha_o_status(self):
+        self.client.force_login(self.paciente.usuario)
+        resposta = self.client.get(self.url)
+        self.assertTemplateUsed(resposta, "rodas/paciente/corrida_detalhes.html")
+        self.assertContains(
+            resposta, reverse("rodas:eventos_corrida", args=[self.corrida.pk])
+        )
+
+    def test_outro_paciente_e_redirecionado(self):
+        self.client.force_login(criar_paciente().usuario)
+        self.assertRedirects(
+            self.client.get(self.url),
+            reverse("rodas:dashboard"),
+            fetch_redirect_response=False,
+        )
+
+    def test_motorista_ve_corrida_pendente(self):
+        self.client.force_login(criar_motorista().usuario)
+        resposta = self.client.get(self.url)
+        self.assertTemplateUsed(resposta, "rodas/motorista/corrida_detalhes.html")
+
+
+class SolicitarCorridaTests(TestCase):
+    def test_corrida_do_paciente_logado(self):
+        paciente = criar_paciente()
+        self.client.force_login(paciente.usuario)
+        amanha = timezone.localdate() + timedelta(days=1)
+        with (
+            mock.patch("rodas.views.geocodificar", return_value=None),
+            mock.patch("rodas.views.difusao") as difusao,
+        ):
+            resposta = self.client.post(
+                reverse("rodas:solicita_corrida"),
+                {
+                    "endereco_origem": "Rua A, 1",
+                    "endereco_destino": "Hospital das Clínicas",
+                    "data_agendamento": amanha.isoformat(),
+                    "hora_agendamento": "08:30",
+                },
+                headers={"x-requested-with": "XMLHttpRequest"},
+            )
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        corrida = Corrida.objects.get(pk=resposta.json()["corrida_id"])
+        self.assertEqual(corrida.paciente_id, paciente.pk)
+        difusao.anunciar_corrida.assert_called_once()
+
+
+class MotoristaSemPerfilTests(TestCase):
+    def test_batimento(self):
+        self.client.force_login(criar_usuario(TipoUsuario.MOTORISTA))
+        resposta = self.client.post(reverse("rodas:heartbeat_motorista"))
+        self.assertEqual(resposta.status_code, 404)
+
+    def test_localizacao(self):
+        self.client.force_login(criar_usuario(TipoUsuario.MOTORISTA))
+        resposta = self.client.post(
+            reverse("rodas:localizacao_motorista"), b"{}", "application/json"
+        )
+        self.assertEqual(resposta.status_code, 404)
@@ -0,0 +1,278 @@
+"""
+Recebimento das posições enviadas pelo aplicativo do motorista e gravação do
+trajeto das corridas em lote.
+
+O cliente acumula posições e as envia em lotes (JSON, opcionalmente com
+``Content-Encoding: gzip``)::
+
+    {"corrida": 123, "pontos": [[epoch, latitude, longitude], ...]}
+
+Cada lote custa duas operações no Redis, numa única ida:
+
+- a posição mais recente do motorista é gravada no hash ``CHAVE_POSICOES``,
+  de onde é lida por ``posicao_atual``/``posicoes_atuais`` sem ir ao banco;
+- o lote inteiro, compactado num texto JSON, entra no fim da lista
+  ``CHAVE_BUFFER``.
+
+O comando ``gravar_trajetos`` esvazia o buffer periodicamente com
+``gravar_pendentes``: milhares de posições viram um ``bulk_create`` em
+``PontoTrajeto`` e um ``bulk_update`` da última posição de cada motorista,
+em vez de milhares de INSERTs. Só são gravados os pontos de corridas do
+próprio motorista, registrados entre o início e o fim da corrida.
+
+O buffer é lido com ``LRANGE`` e só é cortado (``LTRIM``) depois do commit:
+uma falha do banco ou do Redis repete os lotes na rodada seguinte em vez de
+perdê-los. Por isso deve haver um único processo gravando. Já um lote que o
+banco rejeita (por exemplo, de uma corrida apagada depois da leitura das
+janelas) travaria o buffer para sempre: quando a gravação conjunta é
+rejeitada, os lotes são gravados um a um e os que continuam rejeitados vão
+para ``CHAVE_DESCARTADOS``, para análise.
+"""
+
+import json
+import logging
+import zlib
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+
+from .conexao_redis import obter_redis
+from .models import Corrida, Motorista, PontoTrajeto
+
+logger = logging.getLogger(__name__)
+
+CHAVE_BUFFER = "trajetos:buffer"
+CHAVE_DESCARTADOS = "trajetos:descartados"
+CHAVE_POSICOES = "localizacao:motoristas"
+MAXIMO_DESCARTADOS = 1000
+
+MAXIMO_PONTOS_LOTE = 500
+MAXIMO_BYTES_LOTE = 256 * 1024
+# Diferença aceita entre o relógio do aparelho e o do servidor
+TOLERANCIA_RELOGIO = timedelta(minutes=1)
+
+
+class LoteInvalido(ValueError):
+    pass
+
+
+@dataclass
+class ResultadoGravacao:
+    lotes: int = 0
+    pontos: int = 0
+    descartados: int = 0
+    motoristas: int = 0
+    lotes_descartados: int = 0
+
+
+def decodificar_lote(
+    corpo: bytes, codificacao: str = ""
+) -> tuple[int | None, np.ndarray]:
+    """
+    Valida um lote recebido e devolve o id da corrida (ou ``None``) e um array
+    ``(n, 3)`` de epoch, latitude e longitude, ordenado pelo horário e sem os
+    pontos no futuro
+    """
+    if codificacao.strip().lower() == "gzip":
+        descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            corpo = descompressor.decompress(corpo, MAXIMO_BYTES_LOTE + 1)
+        except zlib.error:
+            raise LoteInvalido("Conteúdo gzip inválido.")
+        if not descompressor.eof:
+            raise LoteInvalido("Lote grande demais.")
+    elif codificacao:
+        raise LoteInvalido("Codificação não suportada.")
+    if len(corpo) > MAXIMO_BYTES_LOTE:
+        raise LoteInvalido("Lote grande demais.")
+
+    try:
+        dados = json.loads(corpo)
+        corrida_id = dados.get("corrida")
+        if corrida_id is not None:
+            corrida_id = int(corrida_id)
+        pontos = np.asarray(dados["pontos"], dtype=np.float64)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise LoteInvalido("Formato do lote inválido.")
+
+    if pontos.ndim != 2 or pontos.shape[1] != 3 or len(pontos) == 0:
+        raise LoteInvalido("Formato do lote inválido.")
+    if len(pontos) > MAXIMO_PONTOS_LOTE:
+        raise LoteInvalido(f"No máximo {MAXIMO_PONTOS_LOTE} pontos por lote.")
+    if not np.isfinite(pontos).all() or (
+        (np.abs(pontos[:, 1]) > 90).any() or (np.abs(pontos[:, 2]) > 180).any()
+    ):
+        raise LoteInvalido("Coordenadas inválidas.")
+
+    # Pontos com horário no futuro vêm de relógios errados e são ignorados
+    limite_futuro = (timezone.now() + TOLERANCIA_RELOGIO).timestamp()
+    pontos = pontos[pontos[:, 0] <= limite_futuro]
+    if len(pontos) == 0:
+        raise LoteInvalido("Horário dos pontos inválido.")
+    return corrida_id, pontos[np.argsort(pontos[:, 0], kind="stable")]
+
+
+def registrar_pontos(
+    motorista_id: int, corrida_id: int | None, pontos: np.ndarray
+) -> None:
+    """
+    Atualiza a posição atual do motorista e enfileira o lote para gravação.
+    Erros do Redis são propagados para que o cliente reenvie o lote.
+    """
+    epoch, latitude, longitude = pontos[-1]
+    lote = {
+        "m": motorista_id,
+        "c": corrida_id,
+        "p": np.column_stack(
+            (np.round(pontos[:, 0], 3), np.round(pontos[:, 1:], 6))
+        ).tolist(),
+    }
+    with obter_redis().pipeline(transaction=False) as pipe:
+        pipe.hset(
+            CHAVE_POSICOES, motorista_id, f"{latitude:.6f},{longitude:.6f},{epoch:.3f}"
+        )
+        pipe.rpush(CHAVE_BUFFER, json.dumps(lote, separators=(",", ":")))
+        pipe.execute()
+
+
+def _ler_posicao(valor: str | None) -> tuple[float, float, float] | None:
+    if valor is None:
+        return None
+    latitude, longitude, epoch = map(float, valor.split(","))
+    return latitude, longitude, epoch
+
+
+def posicao_atual(motorista_id: int) -> tuple[float, float, float] | None:
+    """
+    Última posição recebida do motorista: latitude, longitude e epoch
+    """
+    return _ler_posicao(obter_redis().hget(CHAVE_POSICOES, motorista_id))
+
+
+def posicoes_atuais(
+    motorista_ids: list[int],
+) -> dict[int, tuple[float, float, float]]:
+    if not motorista_ids:
+        return {}
+    valores = obter_redis().hmget(CHAVE_POSICOES, motorista_ids)
+    return {
+        motorista_id: posicao
+        for motorista_id, valor in zip(motorista_ids, valores)
+        if (posicao := _ler_posicao(valor)) is not None
+    }
+
+
+def _epoch(data: datetime | None) -> float:
+    return data.timestamp() if data is not None else np.nan
+
+
+def gravar_pendentes(maximo_lotes: int = 1000) -> ResultadoGravacao:
+    """
+    Grava até ``maximo_lotes`` lotes do buffer: os pontos válidos em
+    ``PontoTrajeto`` e a última posição de cada motorista em ``Motorista``
+    """
+    conexao = obter_redis()
+    brutos = conexao.lrange(CHAVE_BUFFER, 0, maximo_lotes - 1)
+    resultado = ResultadoGravacao(lotes=len(brutos))
+    if not brutos:
+        return resultado
+    lotes = [json.loads(bruto) for bruto in brutos]
+
+    agora = timezone.now()
+    limite_futuro = (agora + TOLERANCIA_RELOGIO).timestamp()
+    janelas = {}
+    corridas = Corrida.objects.filter(
+        pk__in={lote["c"] for lote in lotes if lote["c"] is not None}
+    ).values_list(
+        "pk",
+        "motorista_id",
+        "data_hora_inicio",
+        "data_hora_finalizacao",
+        "data_cancelamento",
+    )
+    tolerancia = TOLERANCIA_RELOGIO.total_seconds()
+    for pk, motorista_id, inicio, finalizacao, cancelamento in corridas:
+        fim = finalizacao or cancelamento
+        janelas[pk] = (
+            motorista_id,
+            _epoch(inicio) - tolerancia,
+            _epoch(fim) + tolerancia if fim is not None else limite_futuro,
+        )
+
+    pontos_por_lote: list[list[PontoTrajeto]] = []
+    ultimas: dict[int, list[float]] = {}
+    for lote in lotes:
+        pontos = np.asarray(lote["p"], dtype=np.float64).reshape(-1, 3)
+        ultima = ultimas.get(lote["m"])
+        if ultima is None or pontos[-1, 0] > ultima[0]:
+            ultimas[lote["m"]] = pontos[-1].tolist()
+        pontos_por_lote.append([])
+        if lote["c"] is None:
+            # Motorista fora de corrida: só a posição atual interessa
+            continue
+
+        janela = janelas.get(lote["c"])
+        if janela is None or janela[0] != lote["m"]:
+            resultado.descartados += len(pontos)
+            continue
+        # Comparações com nan (corrida não iniciada) descartam todos os pontos
+        validos = (pontos[:, 0] >= janela[1]) & (pontos[:, 0] <= janela[2])
+        resultado.descartados += int((~validos).sum())
+        pontos_por_lote[-1] = [
+            PontoTrajeto(
+                corrida_id=lote["c"],
+                registrado_em=datetime.fromtimestamp(epoch, tz=UTC),
+                latitude=latitude,
+                longitude=longitude,
+            )
+            for epoch, latitude, longitude in pontos[validos].tolist()
+        ]
+
+    motoristas = [
+        Motorista(
+            pk=motorista_id,
+            latitude_atual=Decimal(f"{latitude:.8f}"),
+            longitude_atual=Decimal(f"{longitude:.8f}"),
+            data_localizacao=min(datetime.fromtimestamp(epoch, tz=UTC), agora),
+        )
+        for motorista_id, (epoch, latitude, longitude) in ultimas.items()
+    ]
+    rejeitados = []
+    try:
+        _gravar([ponto for novos in pontos_por_lote for ponto in novos], motoristas)
+        resultado.pontos = sum(map(len, pontos_por_lote))
+    except (IntegrityError, DataError):
+        logger.warning("Gravação conjunta dos trajetos rejeitada; gravando lote a lote")
+        for bruto, novos in zip(brutos, pontos_por_lote):
+            try:
+                _gravar(novos, [])
+                resultado.pontos += len(novos)
+            except (IntegrityError, DataError):
+                logger.exception("Lote de trajeto rejeitado pelo banco")
+                rejeitados.append(bruto)
+        _gravar([], motoristas)
+
+    with conexao.pipeline() as pipe:
+        for bruto in rejeitados:
+            pipe.lpush(CHAVE_DESCARTADOS, bruto)
+        pipe.ltrim(CHAVE_DESCARTADOS, 0, MAXIMO_DESCARTADOS - 1)
+        pipe.ltrim(CHAVE_BUFFER, len(brutos), -1)
+        pipe.execute()
+
+    resultado.motoristas = len(motoristas)
+    resultado.lotes_descartados = len(rejeitados)
+    return resultado
+
+
+def _gravar(novos: list[PontoTrajeto], motoristas: list[Motorista]) -> None:
+    with transaction.atomic():
+        PontoTrajeto.objects.bulk_create(novos, batch_size=5000)
+        Motorista.objects.bulk_update(
+            motoristas,
+            ["latitude_atual", "longitude_atual", "data_localizacao"],
+            batch_size=1000,
+        )
@@ -0,0 +1,259 @@
+"""
+Máquina de estados das corridas.
+
+As transições válidas ficam na tabela ``TRANSICOES``. Cada transição é
+aplicada com um único UPDATE condicionado ao status de origem (e, quando
+informado, ao motorista), que também registra a data correspondente. O
+contador de corridas do motorista e os eventos do histórico
+(``CorridaEvento``, um ``bulk_create`` para todo o lote) são gravados na mesma
+transação. Após o commit, as versões do cache de fragmentos
+(``rodas.versoes``) são trocadas, a mudança é publicada para os fluxos em tempo
+real (``rodas.eventos``) e as notificações entram na fila de tarefas
+(``rodas.tarefas``), de modo que views, ações do admin e rotinas em segundo
+plano compartilham exatamente as mesmas regras.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from .eventos import canal_corrida, canal_usuario, publicar
+from .models import Corrida, CorridaEvento, CorridaStatus, Motorista
+from .tarefas import enfileirar
+from .versoes import invalidar_corridas
+
+
+@dataclass(frozen=True)
+class Transicao:
+    """
+    Descrição declarativa de uma mudança de status
+    """
+
+    origens: tuple[str, ...]
+    campo_data: str
+    tipo_notificacao: str
+    titulo: str
+    mensagem: str = "Status da corrida atualizado para: {status}"
+    atribui_motorista: bool = False
+    conta_corrida: bool = False
+    notifica_motorista: bool = False
+
+
+TRANSICOES: dict[str, Transicao] = {
+    CorridaStatus.ACEITA: Transicao(
+        origens=(CorridaStatus.PENDENTE,),
+        campo_data="data_hora_aceite",
+        tipo_notificacao="corrida_aceita",
+        titulo="Corrida aceita!",
+        mensagem="O motorista {motorista} aceitou sua corrida.",
+        atribui_motorista=True,
+    ),
+    CorridaStatus.EM_ANDAMENTO: Transicao(
+        origens=(CorridaStatus.ACEITA,),
+        campo_data="data_hora_inicio",
+        tipo_notificacao="corrida_iniciada",
+        titulo="Sua corrida foi iniciada!",
+    ),
+    CorridaStatus.MOTORISTA_CHEGOU: Transicao(
+        origens=(CorridaStatus.EM_ANDAMENTO,),
+        campo_data="data_hora_chegada",
+        tipo_notificacao="motorista_chegou",
+        titulo="O motorista chegou ao local!",
+    ),
+    CorridaStatus.CONCLUIDA: Transicao(
+        origens=(CorridaStatus.MOTORISTA_CHEGOU,),
+        campo_data="data_hora_finalizacao",
+        tipo_notificacao="corrida_finalizada",
+        titulo="Sua corrida foi concluída!",
+        conta_corrida=True,
+    ),
+    CorridaStatus.CANCELADA: Transicao(
+        origens=(
+            CorridaStatus.PENDENTE,
+            CorridaStatus.ACEITA,
+            CorridaStatus.EM_ANDAMENTO,
+            CorridaStatus.MOTORISTA_CHEGOU,
+        ),
+        campo_data="data_cancelamento",
+        tipo_notificacao="corrida_cancelada",
+        titulo="Corrida cancelada",
+        notifica_motorista=True,
+    ),
+}
+
+# Corridas nesses status ocupam o motorista
+STATUS_OCUPADO = (
+    CorridaStatus.ACEITA,
+    CorridaStatus.EM_ANDAMENTO,
+    CorridaStatus.MOTORISTA_CHEGOU,
+)
+
+# Transições que o próprio motorista dispara pelo painel
+TRANSICOES_DO_MOTORISTA = (
+    CorridaStatus.EM_ANDAMENTO,
+    CorridaStatus.MOTORISTA_CHEGOU,
+    CorridaStatus.CONCLUIDA,
+)
+
+
+def aplicar_transicao_em_lote(
+    corrida_ids: list[int],
+    destino: str,
+    motorista_id: int | None = None,
+    autor_id: int | None = None,
+    motivo: str = "",
+    agora: datetime | None = None,
+) -> list[int]:
+    """
+    Aplica a transição para ``destino`` a todas as corridas elegíveis.
+
+    Com ``motorista_id``, a transição só vale para corridas desse motorista
+    (ou, no aceite, atribui a corrida a ele). Retorna os ids das corridas que
+    de fato mudaram de status; as demais são ignoradas silenciosamente.
+    """
+    transicao = TRANSICOES[destino]
+    agora = agora or timezone.now()
+
+    corridas = Corrida.objects.filter(pk__in=corrida_ids, status__in=transicao.origens)
+    valores = {
+        "status": destino,
+        transicao.campo_data: agora,
+        "data_atualizacao": agora,
+    }
+    if transicao.atribui_motorista:
+        corridas = corridas.filter(motorista__isnull=True)
+        valores["motorista_id"] = motorista_id
+    elif motorista_id is not None:
+        corridas = corridas.filter(motorista_id=motorista_id)
+    if destino == CorridaStatus.CANCELADA:
+        valores["motivo_cancelamento"] = motivo
+        valores["cancelada_por_id"] = autor_id
+
+    with transaction.atomic():
+        if not corridas.update(**valores):
+            return []
+
+        # As linhas alteradas acima continuam bloqueadas por esta transação, e o
+        # carimbo exato de data_atualizacao as distingue de corridas que já
+        # estavam no status de destino.
+        alteradas = list(
+            Corrida.objects.filter(
+                pk__in=corrida_ids, status=destino, data_atualizacao=agora
+            ).values_list(
+                "pk",
+                "paciente_id",
+                "paciente__usuario_id",
+                "motorista_id",
+                "motorista__usuario_id",
+                "motorista__usuario__nome_completo",
+            )
+        )
+        CorridaEvento.objects.bulk_create(
+            CorridaEvento(
+                corrida_id=corrida_id,
+                status=destino,
+                registrado_em=agora,
+                motorista_id=m_id,
+                autor_id=autor_id,
+            )
+            for corrida_id, _, _, m_id, _, _ in alteradas
+        )
+        invalidar_corridas(
+            paciente_ids=(linha[1] for linha in alteradas),
+            motorista_ids=(linha[3] for linha in alteradas),
+            # Só o aceite e o cancelamento tiram corridas da lista de pendentes
+            pendentes=CorridaStatus.PENDENTE in transicao.origens,
+        )
+
+        if transicao.conta_corrida:
+            por_motorista = Counter(m_id for _, _, _, m_id, _, _ in alteradas if m_id)
+            Motorista.objects.filter(pk__in=por_motorista).update(
+                total_corridas=F("total_corridas")
+                + Case(
+                    *[When(pk=pk, then=Value(n)) for pk, n in por_motorista.items()],
+                    default=Value(0),
+                )
+            )
+
+        notificacoes = []
+        for corrida_id, _, paciente_uid, _, motorista_uid, motorista_nome in alteradas:
+            mensagem = transicao.mensagem.format(
+                status=CorridaStatus(destino).label,
+                motorista=(motorista_nome or "").split(" ")[0],
+            )
+            if motivo:
+                mensagem = f"{mensagem}\nMotivo: {motivo}"
+            destinatarios = [paciente_uid]
+            if transicao.notifica_motorista and motorista_uid:
+                destinatarios.append(motorista_uid)
+            notificacoes.extend(
+                {
+                    "usuario_id": usuario_id,
+                    "tipo": transicao.tipo_notificacao,
+                    "titulo": transicao.titulo,
+                    "mensagem": mensagem,
+                    "corrida_id": corrida_id,
+                }
+                for usuario_id in destinatarios
+                if usuario_id != autor_id
+            )
+        if notificacoes:
+            enfileirar("criar_notificacoes", notificacoes=notificacoes)
+
+        mensagens = []
+        for corrida_id, _, paciente_uid, _, motorista_uid, _ in alteradas:
+            dados = {
+                "tipo": "status",
+                "corrida": corrida_id,
+                "status": destino,
+                "status_display": CorridaStatus(destino).label,
+            }
+            mensagens.append((canal_corrida(corrida_id), dados))
+            for usuario_id in (paciente_uid, motorista_uid):
+                if usuario_id:
+                    mensagens.append((canal_usuario(usuario_id), dados))
+        publicar(mensagens)
+
+    return [corrida_id for corrida_id, *_ in alteradas]
+
+
+def aplicar_transicao(
+    corrida_id: int,
+    destino: str,
+    motorista_id: int | None = None,
+    autor_id: int | None = None,
+    motivo: str = "",
+    agora: datetime | None = None,
+) -> bool:
+    """
+    Aplica a transição a uma única corrida; retorna se ela mudou de status
+    """
+    return bool(
+        aplicar_transicao_em_lote(
+            [corrida_id],
+            destino,
+            motorista_id=motorista_id,
+            autor_id=autor_id,
+            motivo=motivo,
+            agora=agora,
+        )
+    )
+
+
+def aceitar_corrida(
+    corrida_id: int, motorista_id: int, agora: datetime | None = None
+) -> bool:
+    """
+    Reivindica a corrida para o motorista.
+
+    Executa ``UPDATE ... WHERE status = 'pendente' AND motorista_id IS NULL``;
+    retorna ``True`` se este chamador venceu e ``False`` se a corrida já havia
+    sido aceita (ou não existe).
+    """
+    return aplicar_transicao(
+        corrida_id, CorridaStatus.ACEITA, motorista_id=motorista_id, agora=agora
+    )
@@ -1,6 +1,7 @@
 from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
+from .instrumentacao import orcamento_consultas
 
 app_name = "rodas"
 
@@ -18,23 +19,29 @@ urlpatterns = [
     path("password-reset/", views.password_reset_view, name="password_reset"),
     path(
         "password-reset/done/",
-        auth_views.PasswordResetDoneView.as_view(
-            template_name="rodas/auth/password_reset_done.html"
+        orcamento_consultas(2)(
+            auth_views.PasswordResetDoneView.as_view(
+                template_name="rodas/auth/password_reset_done.html"
+            )
         ),
         name="password_reset_done",
     ),
     path(
         "reset/<uidb64>/<token>/",
-        auth_views.PasswordResetConfirmView.as_view(
-            template_name="rodas/auth/password_reset_confirm.html",
-            success_url="/reset/done/",
+        orcamento_consultas(4)(
+            auth_views.PasswordResetConfirmView.as_view(
+                template_name="rodas/auth/password_reset_confirm.html",
+                success_url="/reset/done/",
+            )
         ),
         name="password_reset_confirm",
     ),
     path(
         "reset/done/",
-        auth_views.PasswordResetCompleteView.as_view(
-            template_name="rodas/auth/password_reset_complete.html"
+        orcamento_consultas(2)(
+            auth_views.PasswordResetCompleteView.as_view(
+                template_name="rodas/auth/password_reset_complete.html"
+            )
         ),
         name="password_reset_complete",
     ),
@@ -49,6 +56,7 @@ urlpatterns = [
         views.corridas_motorista_list_view,
         name="corridas_motorista",
     ),
+    path("notificacoes/", views.notificacoes_view, name="notificacoes"),
     # Corridas
     path(
         "corrida/<int:corrida_id>/",
@@ -56,6 +64,16 @@ urlpatterns = [
         name="corrida_detalhes",
     ),
     # API endpoints
+    path(
+        "api/corridas/proximas/",
+        views.corridas_proximas_view,
+        name="corridas_proximas",
+    ),
+    path(
+        "api/corridas/<int:corrida_id>/",
+        views.corrida_api_view,
+        name="corrida_api",
+    ),
     path(
         "api/corridas/<int:corrida_id>/aceitar/",
         views.aceitar_corrida_view,
@@ -66,9 +84,36 @@ urlpatterns = [
         views.toggle_motorista_status_view,
         name="toggle_motorista_status",
     ),
+    path(
+        "api/motorista/heartbeat/",
+        views.heartbeat_motorista_view,
+        name="heartbeat_motorista",
+    ),
+    path(
+        "api/motorista/localizacao/",
+        views.localizacao_motorista_view,
+        name="localizacao_motorista",
+    ),
     path(
         "api/corridas/<int:corrida_id>/status/",
         views.atualizar_status_corrida_view,
         name="atualizar_status_corrida",
     ),
+    path(
+        "api/corridas/<int:corrida_id>/avaliar/",
+        views.avaliar_corrida_view,
+        name="avaliar_corrida",
+    ),
+    path(
+        "api/notificacoes/marcar-lidas/",
+        views.marcar_notificacoes_lidas_view,
+        name="marcar_notificacoes_lidas",
+    ),
+    # Eventos em tempo real (SSE, servidos pelo ASGI)
+    path("api/eventos/", views.eventos_usuario_view, name="eventos_usuario"),
+    path(
+        "api/eventos/corridas/<int:corrida_id>/",
+        views.eventos_corrida_view,
+        name="eventos_corrida",
+    ),
 ]
@@ -0,0 +1,88 @@
+"""
+Versões das corridas, usadas como chave do cache de fragmentos de template.
+
+Há uma versão global, da qual dependem as listas de corridas pendentes, e
+uma versão por paciente e por motorista, que muda quando uma corrida deles é
+escrita. A global só muda quando o conjunto de pendentes muda: quando uma
+corrida pendente é criada, alterada ou apagada, ou quando deixa de estar
+pendente. O andamento das corridas já aceitas, a maior parte das escritas,
+não descarta as listas de todos os motoristas. Os fragmentos dos
+dashboards e das listagens incluem essas versões na chave do
+``{% cache %}``: enquanto nada muda, o fragmento vem pronto do cache, sem
+consultas nem renderização; qualquer escrita troca a versão e o fragmento
+seguinte é montado de novo. A invalidação é exata; o timeout dos fragmentos
+só descarta os que ninguém mais vai pedir.
+
+As views entregam ao template querysets preguiçosos (``SimpleLazyObject``),
+avaliados apenas quando o fragmento precisa ser montado.
+
+As versões são trocadas depois do commit por ``invalidar_corridas``, chamada
+pelos sinais de ``Corrida`` (``rodas.signals``) e pelas rotinas que escrevem
+com ``QuerySet.update`` (``rodas.transicoes``).
+"""
+
+import uuid
+from collections.abc import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+
+PREFIXO = "corridas:versao"
+CHAVE_GLOBAL = f"{PREFIXO}:global"
+
+
+def chave_paciente(paciente_id: int) -> str:
+    return f"{PREFIXO}:paciente:{paciente_id}"
+
+
+def chave_motorista(motorista_id: int) -> str:
+    return f"{PREFIXO}:motorista:{motorista_id}"
+
+
+def obter_versoes(chaves: list[str]) -> list[str]:
+    """
+    Versões atuais das chaves, criando as que ainda não existem, numa única
+    ida ao cache quando todas já existem
+    """
+    atuais = cache.get_many(chaves)
+    faltando = [chave for chave in chaves if chave not in atuais]
+    if faltando:
+        for chave in faltando:
+            # add não sobrescreve uma versão gravada por outro processo
+            cache.add(chave, uuid.uuid4().hex, timeout=None)
+        atuais.update(cache.get_many(faltando))
+    return [atuais.get(chave, "") for chave in chaves]
+
+
+def versoes_paciente(paciente_id: int) -> str:
+    return obter_versoes([chave_paciente(paciente_id)])[0]
+
+
+def versoes_motorista(motorista_id: int) -> tuple[str, str]:
+    """
+    Versão global e versão do motorista
+    """
+    global_, motorista = obter_versoes([CHAVE_GLOBAL, chave_motorista(motorista_id)])
+    return global_, motorista
+
+
+def invalidar_corridas(
+    paciente_ids: Iterable[int | None] = (),
+    motorista_ids: Iterable[int | None] = (),
+    pendentes: bool = True,
+) -> None:
+    """
+    Troca as versões dos pacientes e motoristas informados e, com
+    ``pendentes``, a versão global, assim que a transação atual for confirmada
+    """
+    chaves = [CHAVE_GLOBAL] if pendentes else []
+    chaves += [chave_paciente(pk) for pk in set(paciente_ids) if pk is not None]
+    chaves += [chave_motorista(pk) for pk in set(motorista_ids) if pk is not None]
+
+    if not chaves:
+        return
+
+    def trocar():
+        cache.set_many({chave: uuid.uuid4().hex for chave in chaves}, timeout=None)
+
+    transaction.on_commit(trocar)
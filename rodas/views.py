@@ -1,16 +1,27 @@
+from asgiref.sync import sync_to_async
 from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.forms import PasswordResetForm
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
-from django.http import JsonResponse
+from django.utils.functional import SimpleLazyObject
+from django.db import connection, transaction
+from django.db.models import Q
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.cache import parse_etags
 from django.views.decorators.http import require_http_methods
+import asyncio
 import json
-from django.core.paginator import Paginator
+import redis
 from django.conf import settings
+from decimal import Decimal, InvalidOperation
 
-from .forms import PacienteRegisterForm, MotoristaRegisterForm, SolicitaCorridaform
+from .forms import (
+    MotoristaRegisterForm,
+    PacienteRegisterForm,
+    RedefinicaoSenhaForm,
+    SolicitaCorridaform,
+)
 from .models import (
     Usuario,
     Paciente,
@@ -20,8 +31,36 @@ from .models import (
     Motorista,
     Notificacao,
 )
+from .configuracoes import configuracoes
+from .geo import codificar_geohash
+from .geocodificacao import geocodificar
+from .instrumentacao import orcamento_consultas
+from .middleware import obter_perfil
+from .paginacao import chave_cursor, paginar_por_cursor
+from . import avaliacoes, difusao, eventos, notificacoes, presenca, trajetos
+from .transicoes import TRANSICOES_DO_MOTORISTA, aceitar_corrida, aplicar_transicao
+from .versoes import versoes_motorista, versoes_paciente
+
+# Padrão do raio de busca; pode ser alterado pela configuração "raio_busca_km"
+RAIO_BUSCA_KM = 10.0
+RAIO_BUSCA_MAXIMO_KM = 50.0
+# Destaque + cinco no histórico + um para saber se há mais
+CORRIDAS_RECENTES_DASHBOARD = 7
+# Espera máxima, em segundos, do long-poll da API de corridas
+ESPERA_MAXIMA_LONG_POLL = 30
+# Célula de geohash (cerca de 150 m) que identifica a posição do motorista no
+# cache das corridas próximas; a posição exata muda a cada envio do trajeto
+PRECISAO_CELULA_DASHBOARD = 7
+
+
+def raio_busca_km() -> float:
+    return min(
+        configuracoes.obter("raio_busca_km", RAIO_BUSCA_KM, float),
+        RAIO_BUSCA_MAXIMO_KM,
+    )
 
 
+@orcamento_consultas(3)
 def index(request):
     """
     View para a página inicial do app rodas.
@@ -32,6 +71,7 @@ def index(request):
     return render(request, "rodas/index.html", context)
 
 
+@orcamento_consultas(3)
 def sobre(request):
     """
     View para a página sobre o projeto.
@@ -42,6 +82,7 @@ def sobre(request):
     return render(request, "rodas/sobre.html", context)
 
 
+@orcamento_consultas(8)
 def login_view(request):
     """
     View para login de usuários.
@@ -70,6 +111,7 @@ def login_view(request):
     return render(request, "rodas/auth/login.html", context)
 
 
+@orcamento_consultas(5)
 def logout_view(request):
     """
     View para logout de usuários.
@@ -79,6 +121,7 @@ def logout_view(request):
     return redirect("rodas:index")
 
 
+@orcamento_consultas(8)
 def register_view(request):
     """
     View para registro de novos usuários.
@@ -123,6 +166,7 @@ def register_view(request):
     return render(request, "rodas/paciente/register.html", context)
 
 
+@orcamento_consultas(8)
 def register_motorista_view(request):
     """
     View para registro de motoristas voluntários.
@@ -149,6 +193,7 @@ def register_motorista_view(request):
                 cor_veiculo=form.cleaned_data["cor_veiculo"],
                 ano_veiculo=form.cleaned_data.get("ano_veiculo"),
                 placa_veiculo=form.cleaned_data.get("placa_veiculo", ""),
+                veiculo_adaptado=form.cleaned_data.get("veiculo_adaptado", False),
                 cnh_numero=form.cleaned_data.get("cnh_numero", ""),
                 cnh_validade=form.cleaned_data.get("cnh_validade"),
                 aceite_termos_voluntariado=form.cleaned_data[
@@ -172,17 +217,18 @@ def register_motorista_view(request):
     return render(request, "rodas/motorista/register.html", context)
 
 
+@orcamento_consultas(5)
 def password_reset_view(request):
     """
     View para solicitar reset de senha.
     """
     if request.method == "POST":
-        form = PasswordResetForm(request.POST)
+        form = RedefinicaoSenhaForm(request.POST)
         if form.is_valid():
             form.save(
                 request=request,
                 use_https=request.is_secure(),
-                email_template_name="rodas/auth/password_reset_email.html",
+                email_template_name="rodas/auth/password_reset_email.txt",
                 html_email_template_name="rodas/auth/password_reset_email.html",
                 subject_template_name="rodas/auth/password_reset_subject.txt",
                 from_email="noreply@esperancasobrerodas.org",
@@ -193,7 +239,7 @@ def password_reset_view(request):
             )
             return redirect("rodas:login")
     else:
-        form = PasswordResetForm()
+        form = RedefinicaoSenhaForm()
 
     context = {
         "title": "Esqueceu a Senha - Esperança Sobre Rodas",
@@ -202,6 +248,7 @@ def password_reset_view(request):
     return render(request, "rodas/auth/password_reset.html", context)
 
 
+@orcamento_consultas(8)
 @login_required
 def dashboard_view(request):
     """
@@ -210,26 +257,28 @@ def dashboard_view(request):
     usuario: Usuario = request.user
 
     if usuario.tipo_usuario == TipoUsuario.PACIENTE:
-        paciente = Paciente.objects.get(usuario=usuario)
-
-        corridas = Corrida.objects.filter(paciente=paciente).order_by(
-            "-data_hora_agendada"
+        paciente_id = getattr(request.perfil, "pk", None)
+        corridas = Corrida.objects.filter(paciente_id=paciente_id)
+        # Só consultados se os fragmentos não estiverem no cache
+        contagem = SimpleLazyObject(corridas.contagem_por_status)
+        recentes = SimpleLazyObject(
+            lambda: list(
+                corridas.select_related("motorista__usuario").order_by(
+                    "-data_hora_agendada"
+                )[:CORRIDAS_RECENTES_DASHBOARD]
+            )
         )
 
-        total_corridas = corridas.count()
-        corridas_concluidas = corridas.filter(status=CorridaStatus.CONCLUIDA).count()
-        corridas_pendentes = corridas.filter(status=CorridaStatus.PENDENTE).count()
-
         return render(
             request,
             "rodas/paciente/dashboard.html",
             {
                 "title": "Dashboard - Esperança Sobre Rodas",
                 "user": usuario,
-                "corridas": corridas,
-                "total_corridas": total_corridas,
-                "corridas_concluidas": corridas_concluidas,
-                "corridas_pendentes": corridas_pendentes,
+                "corridas": recentes,
+                "contagem": contagem,
+                "paciente_id": paciente_id,
+                "versao_corridas": versoes_paciente(paciente_id),
                 "google_maps_api_key": settings.GOOGLE_MAPS_API_KEY,
             },
         )
@@ -237,15 +286,33 @@ def dashboard_view(request):
     # Para motoristas
     if usuario.tipo_usuario == TipoUsuario.MOTORISTA:
         try:
-            motorista = Motorista.objects.get(usuario=usuario)
-
-            corridas_pendentes = Corrida.objects.filter(
-                status=CorridaStatus.PENDENTE, motorista__isnull=True
-            ).order_by("data_hora_agendada")[:10]
+            motorista = usuario.perfil_motorista
+            raio_km = raio_busca_km()
+            pendentes = Corrida.objects.pendentes().select_related("paciente__usuario")
+
+            # As listas só são consultadas se os fragmentos não estiverem no cache
+            if motorista.tem_localizacao:
+                corridas_pendentes = SimpleLazyObject(
+                    lambda: pendentes.proximas(
+                        motorista.latitude_atual,
+                        motorista.longitude_atual,
+                        raio_km=raio_km,
+                        limite=10,
+                    )
+                )
+            else:
+                corridas_pendentes = SimpleLazyObject(
+                    lambda: list(pendentes.order_by("data_hora_agendada")[:10])
+                )
 
-            corridas_motorista = Corrida.objects.filter(motorista=motorista).order_by(
-                "-data_hora_agendada"
+            corridas_motorista = SimpleLazyObject(
+                lambda: list(
+                    Corrida.objects.filter(motorista=motorista)
+                    .select_related("paciente__usuario")
+                    .order_by("-data_hora_agendada")[:CORRIDAS_RECENTES_DASHBOARD]
+                )
             )
+            versao_global, versao_motorista = versoes_motorista(motorista.pk)
 
             return render(
                 request,
@@ -255,6 +322,22 @@ def dashboard_view(request):
                     "user": usuario,
                     "corridas_pendentes": corridas_pendentes,
                     "corridas_motorista": corridas_motorista,
+                    "tem_localizacao": motorista.tem_localizacao,
+                    "celula_motorista": (
+                        codificar_geohash(
+                            motorista.latitude_atual,
+                            motorista.longitude_atual,
+                            PRECISAO_CELULA_DASHBOARD,
+                        )
+                        if motorista.tem_localizacao
+                        else ""
+                    ),
+                    "online": presenca.esta_online(motorista),
+                    "intervalo_batimento": settings.PRESENCA_INTERVALO_BATIMENTO,
+                    "motorista_id": motorista.pk,
+                    "raio_busca_km": raio_km,
+                    "versao_global": versao_global,
+                    "versao_motorista": versao_motorista,
                 },
             )
         except Motorista.DoesNotExist:
@@ -271,6 +354,8 @@ def dashboard_view(request):
     )
 
 
+# Na primeira vez que cada endereço aparece: busca e gravação do cache no banco
+@orcamento_consultas(10)
 @login_required
 @require_http_methods(["POST"])
 def solicitar_corrida_view(request):
@@ -294,7 +379,7 @@ def solicitar_corrida_view(request):
     if form.is_valid():
         try:
             corrida = Corrida()
-            corrida.paciente = Paciente.objects.get(usuario=user)
+            corrida.paciente_id = request.perfil.pk
             corrida.endereco_origem = form.cleaned_data["endereco_origem"]
             corrida.endereco_destino = form.cleaned_data["endereco_destino"]
             corrida.status = CorridaStatus.PENDENTE
@@ -311,7 +396,20 @@ def solicitar_corrida_view(request):
             )
             corrida.data_hora_agendada = data_hora_agendada
 
-            corrida.save()
+            # Coordenadas para o despacho; sem elas a corrida continua válida
+            origem = geocodificar(corrida.endereco_origem)
+            if origem is not None:
+                corrida.latitude_origem = origem.latitude
+                corrida.longitude_origem = origem.longitude
+            destino = geocodificar(corrida.endereco_destino)
+            if destino is not None:
+                corrida.latitude_destino = destino.latitude
+                corrida.longitude_destino = destino.longitude
+
+            # A corrida e o seu primeiro evento (gravado pelo sinal) juntos
+            with transaction.atomic():
+                corrida.save()
+            difusao.anunciar_corrida(corrida, raio_busca_km())
 
             if is_ajax:
                 return JsonResponse(
@@ -356,6 +454,7 @@ def solicitar_corrida_view(request):
     return redirect("rodas:dashboard")
 
 
+@orcamento_consultas(3)
 @login_required
 def profile_view(request):
     """
@@ -368,24 +467,29 @@ def profile_view(request):
     return render(request, "rodas/profile.html", context)
 
 
+@orcamento_consultas(4)
 @login_required
 def corrida_detalhes_view(request, corrida_id):
     """
     View para visualizar detalhes de uma corrida específica.
     """
-    corrida = get_object_or_404(Corrida, id=corrida_id)
+    corrida = get_object_or_404(
+        Corrida.objects.select_related("paciente__usuario", "motorista__usuario"),
+        id=corrida_id,
+    )
     user = request.user
 
     if user.tipo_usuario == TipoUsuario.MOTORISTA:
         if (
             corrida.status != CorridaStatus.PENDENTE
-            and corrida.motorista != user.perfil_motorista
+            and corrida.motorista_id != request.perfil.pk
         ):
             messages.error(request, "Você não tem permissão para ver esta corrida.")
             return redirect("rodas:dashboard")
     elif user.tipo_usuario == TipoUsuario.PACIENTE:
-        messages.error(request, "Você não tem permissão para ver esta corrida.")
-        return redirect("rodas:dashboard")
+        if corrida.paciente_id != request.perfil.pk:
+            messages.error(request, "Você não tem permissão para ver esta corrida.")
+            return redirect("rodas:dashboard")
     else:
         messages.error(request, "Acesso negado.")
         return redirect("rodas:dashboard")
@@ -402,6 +506,7 @@ def corrida_detalhes_view(request, corrida_id):
         return render(request, "rodas/paciente/corrida_detalhes.html", context)
 
 
+@orcamento_consultas(8)
 @login_required
 @require_http_methods(["POST"])
 def aceitar_corrida_view(request, corrida_id):
@@ -421,7 +526,7 @@ def aceitar_corrida_view(request, corrida_id):
                 {"success": False, "message": "Seu cadastro ainda não foi aprovado."}
             )
 
-        if not motorista.online:
+        if not presenca.esta_online(motorista):
             return JsonResponse(
                 {
                     "success": False,
@@ -429,31 +534,102 @@ def aceitar_corrida_view(request, corrida_id):
                 }
             )
 
-        corrida = get_object_or_404(Corrida, id=corrida_id)
-
-        if not corrida.pode_ser_aceita:
+        if not aceitar_corrida(corrida_id, motorista.pk):
             return JsonResponse(
                 {"success": False, "message": "Esta corrida não pode mais ser aceita."}
             )
 
-        corrida.motorista = motorista
-        corrida.status = CorridaStatus.ACEITA
-        corrida.data_hora_aceite = timezone.now()
-        corrida.save()
-
-        Notificacao.objects.create(
-            usuario=corrida.paciente.usuario,
-            tipo="corrida_aceita",
-            titulo="Corrida aceita!",
-            mensagem=f"O motorista {motorista.usuario.get_short_name()} aceitou sua corrida.",
-            corrida=corrida,
+        return JsonResponse(
+            {
+                "success": True,
+                "message": "Corrida aceita com sucesso!",
+                "redirect_url": f"/corrida/{corrida_id}/",
+            }
+        )
+
+    except Exception:
+        return JsonResponse(
+            {"success": False, "message": "Erro interno. Tente novamente."}
+        )
+
+
+def _coordenada(valor) -> float | None:
+    return float(valor) if valor is not None else None
+
+
+@orcamento_consultas(7)
+@login_required
+@require_http_methods(["GET"])
+def corridas_proximas_view(request):
+    """
+    API endpoint que lista as corridas pendentes mais próximas do motorista.
+
+    Aceita ``lat``/``lng`` (que passam a ser a posição atual do motorista),
+    ``raio`` em km e ``limite``. Sem coordenadas, usa a última posição salva.
+    """
+    if request.user.tipo_usuario != TipoUsuario.MOTORISTA:
+        return JsonResponse(
+            {"success": False, "message": "Apenas motoristas podem buscar corridas."},
+            status=403,
+        )
+
+    try:
+        motorista = request.user.perfil_motorista
+
+        try:
+            raio_km = min(
+                float(request.GET.get("raio", raio_busca_km())), RAIO_BUSCA_MAXIMO_KM
+            )
+            limite = min(max(int(request.GET.get("limite", 10)), 1), 50)
+            latitude = request.GET.get("lat")
+            longitude = request.GET.get("lng")
+            if latitude is not None and longitude is not None:
+                latitude = Decimal(latitude).quantize(Decimal("0.00000001"))
+                longitude = Decimal(longitude).quantize(Decimal("0.00000001"))
+                if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                    raise ValueError
+        except (ValueError, InvalidOperation):
+            return JsonResponse(
+                {"success": False, "message": "Parâmetros de busca inválidos."},
+                status=400,
+            )
+
+        if latitude is not None and longitude is not None:
+            motorista.latitude_atual = latitude
+            motorista.longitude_atual = longitude
+            motorista.data_localizacao = timezone.now()
+            motorista.save(
+                update_fields=["latitude_atual", "longitude_atual", "data_localizacao"]
+            )
+        elif not motorista.tem_localizacao:
+            return JsonResponse(
+                {"success": False, "message": "Localização do motorista desconhecida."},
+                status=400,
+            )
+
+        corridas = Corrida.objects.pendentes().proximas(
+            motorista.latitude_atual,
+            motorista.longitude_atual,
+            raio_km=raio_km,
+            limite=limite,
         )
 
         return JsonResponse(
             {
                 "success": True,
-                "message": "Corrida aceita com sucesso!",
-                "redirect_url": f"/corrida/{corrida.pk}/",
+                "corridas": [
+                    {
+                        "id": corrida.pk,
+                        "endereco_origem": corrida.endereco_origem,
+                        "endereco_destino": corrida.endereco_destino,
+                        "latitude_origem": _coordenada(corrida.latitude_origem),
+                        "longitude_origem": _coordenada(corrida.longitude_origem),
+                        "data_hora_agendada": corrida.data_hora_agendada.isoformat(),
+                        "necessita_cadeira_rodas": corrida.necessita_cadeira_rodas,
+                        "distancia_km": corrida.distancia_km,
+                    }
+                    for corrida in corridas
+                ],
             }
         )
 
@@ -463,6 +639,7 @@ def aceitar_corrida_view(request, corrida_id):
         )
 
 
+@orcamento_consultas(3)
 @login_required
 @require_http_methods(["POST"])
 def toggle_motorista_status_view(request):
@@ -482,15 +659,20 @@ def toggle_motorista_status_view(request):
                 {"success": False, "message": "Seu cadastro ainda não foi aprovado."}
             )
 
-        motorista.online = not motorista.online
-        motorista.save()
+        # A presença fica no Redis; Motorista.online é sincronizado em lote
+        # pelo comando reconciliar_presenca
+        online = not presenca.esta_online(motorista)
+        if online:
+            presenca.marcar_online(motorista)
+        else:
+            presenca.marcar_offline(motorista)
 
-        status_text = "online" if motorista.online else "offline"
+        status_text = "online" if online else "offline"
         return JsonResponse(
             {
                 "success": True,
                 "message": f"Status alterado para {status_text}.",
-                "online": motorista.online,
+                "online": online,
             }
         )
 
@@ -500,6 +682,86 @@ def toggle_motorista_status_view(request):
         )
 
 
+@orcamento_consultas(2)
+@login_required
+@require_http_methods(["POST"])
+def heartbeat_motorista_view(request):
+    """
+    API endpoint chamado periodicamente pelo painel para manter o motorista
+    online. Só renova a presença de quem já está online.
+    """
+    if request.user.tipo_usuario != TipoUsuario.MOTORISTA:
+        return JsonResponse(
+            {"success": False, "message": "Apenas motoristas enviam batimentos."},
+            status=403,
+        )
+
+    motorista = request.perfil
+    # request.perfil é um SimpleLazyObject: nunca é o próprio None
+    if not motorista:
+        return JsonResponse(
+            {"success": False, "message": "Perfil de motorista não encontrado."},
+            status=404,
+        )
+
+    return JsonResponse(
+        {
+            "success": True,
+            "online": presenca.batimento(motorista),
+            "ttl": settings.PRESENCA_TTL,
+        }
+    )
+
+
+@orcamento_consultas(2)
+@login_required
+@require_http_methods(["POST"])
+def localizacao_motorista_view(request):
+    """
+    API endpoint que recebe lotes de posições do motorista, em JSON
+    opcionalmente comprimido com gzip (veja ``rodas.trajetos``). Não consulta
+    o banco: os pontos são gravados em lote pelo comando gravar_trajetos.
+    """
+    if request.user.tipo_usuario != TipoUsuario.MOTORISTA:
+        return JsonResponse(
+            {"success": False, "message": "Apenas motoristas enviam localização."},
+            status=403,
+        )
+
+    motorista = request.perfil
+    # request.perfil é um SimpleLazyObject: nunca é o próprio None
+    if not motorista:
+        return JsonResponse(
+            {"success": False, "message": "Perfil de motorista não encontrado."},
+            status=404,
+        )
+
+    try:
+        corrida_id, pontos = trajetos.decodificar_lote(
+            request.body, request.headers.get("Content-Encoding", "")
+        )
+    except trajetos.LoteInvalido as erro:
+        return JsonResponse({"success": False, "message": str(erro)}, status=400)
+
+    try:
+        trajetos.registrar_pontos(motorista.pk, corrida_id, pontos)
+    except redis.RedisError:
+        return JsonResponse(
+            {"success": False, "message": "Localização indisponível no momento."},
+            status=503,
+        )
+
+    return JsonResponse(
+        {
+            "success": True,
+            "recebidos": len(pontos),
+            # Cada lote também conta como batimento de presença
+            "online": presenca.batimento(motorista),
+        }
+    )
+
+
+@orcamento_consultas(9)
 @login_required
 @require_http_methods(["POST"])
 def atualizar_status_corrida_view(request, corrida_id):
@@ -518,63 +780,28 @@ def atualizar_status_corrida_view(request, corrida_id):
         data = json.loads(request.body)
         novo_status = data.get("status")
 
-        corrida = get_object_or_404(Corrida, id=corrida_id)
         motorista = request.user.perfil_motorista
 
-        if corrida.motorista != motorista:
-            return JsonResponse(
-                {"success": False, "message": "Você não é o motorista desta corrida."}
-            )
-
-        if novo_status == CorridaStatus.EM_ANDAMENTO and corrida.pode_ser_iniciada:
-            corrida.status = CorridaStatus.EM_ANDAMENTO
-            corrida.data_hora_inicio = timezone.now()
-            mensagem_notificacao = "Sua corrida foi iniciada!"
-
-        elif (
-            novo_status == CorridaStatus.MOTORISTA_CHEGOU
-            and corrida.pode_marcar_chegada
+        if novo_status not in TRANSICOES_DO_MOTORISTA or not aplicar_transicao(
+            corrida_id, novo_status, motorista_id=motorista.pk
         ):
-            corrida.status = CorridaStatus.MOTORISTA_CHEGOU
-            corrida.data_hora_chegada = timezone.now()
-            mensagem_notificacao = "O motorista chegou ao local!"
-
-        elif novo_status == CorridaStatus.CONCLUIDA and corrida.pode_ser_finalizada:
-            corrida.status = CorridaStatus.CONCLUIDA
-            corrida.data_hora_finalizacao = timezone.now()
-            motorista.total_corridas += 1
-            motorista.save()
-            mensagem_notificacao = "Sua corrida foi concluída!"
-
-        else:
+            if not Corrida.objects.filter(pk=corrida_id, motorista=motorista).exists():
+                return JsonResponse(
+                    {
+                        "success": False,
+                        "message": "Você não é o motorista desta corrida.",
+                    }
+                )
             return JsonResponse(
                 {"success": False, "message": "Transição de status inválida."}
             )
 
-        corrida.save()
-
-        Notificacao.objects.create(
-            usuario=corrida.paciente.usuario,
-            tipo=(
-                "corrida_iniciada"
-                if novo_status == CorridaStatus.EM_ANDAMENTO
-                else (
-                    "motorista_chegou"
-                    if novo_status == CorridaStatus.MOTORISTA_CHEGOU
-                    else "corrida_finalizada"
-                )
-            ),
-            titulo=mensagem_notificacao,
-            mensagem=f"Status da corrida atualizado para: {corrida.get_status_display()}",
-            corrida=corrida,
-        )
-
         return JsonResponse(
             {
                 "success": True,
                 "message": "Status atualizado com sucesso!",
-                "new_status": corrida.status,
-                "new_status_display": corrida.get_status_display(),
+                "new_status": novo_status,
+                "new_status_display": CorridaStatus(novo_status).label,
             }
         )
 
@@ -584,10 +811,241 @@ def atualizar_status_corrida_view(request, corrida_id):
         )
 
 
+@orcamento_consultas(7)
+@login_required
+@require_http_methods(["POST"])
+def avaliar_corrida_view(request, corrida_id):
+    """
+    API endpoint para o paciente avaliar o motorista (ou o motorista avaliar
+    o paciente) de uma corrida concluída. Recebe ``nota`` (1 a 5) e
+    ``comentario`` em JSON.
+    """
+    usuario: Usuario = request.user
+    try:
+        corrida = Corrida.objects.select_related("paciente", "motorista").get(
+            Q(paciente__usuario=usuario) | Q(motorista__usuario=usuario),
+            pk=corrida_id,
+        )
+    except Corrida.DoesNotExist:
+        return JsonResponse(
+            {"success": False, "message": "Corrida não encontrada."}, status=404
+        )
+
+    try:
+        data = json.loads(request.body)
+        nota = int(data.get("nota"))
+        comentario = str(data.get("comentario", ""))[:1000]
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse(
+            {"success": False, "message": "Informe uma nota de 1 a 5."}, status=400
+        )
+
+    try:
+        avaliacoes.registrar_avaliacao(corrida, usuario, nota, comentario)
+    except avaliacoes.AvaliacaoInvalida as erro:
+        return JsonResponse({"success": False, "message": str(erro)}, status=400)
+
+    return JsonResponse({"success": True, "message": "Obrigado pela sua avaliação!"})
+
+
+def _fechar_conexao():
+    connection.close()
+
+
+async def _resposta_sse(canais: list[str], inicial: dict | None = None):
+    # O fluxo pode durar horas: a conexão com o banco é devolvida antes dele
+    await sync_to_async(_fechar_conexao)()
+    response = StreamingHttpResponse(
+        eventos.fluxo_sse(canais, inicial), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Impede que o nginx segure os eventos em buffer
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@orcamento_consultas(3)
+@login_required
+@require_http_methods(["GET"])
+async def eventos_corrida_view(request, corrida_id):
+    """
+    Fluxo SSE com as mudanças de status de uma corrida do paciente ou do
+    motorista logado. A primeira mensagem traz o status atual.
+    """
+    usuario = await request.auser()
+    status = await (
+        Corrida.objects.filter(pk=corrida_id)
+        .filter(Q(paciente__usuario=usuario) | Q(motorista__usuario=usuario))
+        .values_list("status", flat=True)
+        .afirst()
+    )
+    if status is None:
+        return JsonResponse(
+            {"success": False, "message": "Corrida não encontrada."}, status=404
+        )
+
+    inicial = {
+        "tipo": "status",
+        "corrida": corrida_id,
+        "status": status,
+        "status_display": CorridaStatus(status).label,
+    }
+    return await _resposta_sse([eventos.canal_corrida(corrida_id)], inicial)
+
+
+@orcamento_consultas(2)
+@login_required
+@require_http_methods(["GET"])
+async def eventos_usuario_view(request):
+    """
+    Fluxo SSE com os eventos do usuário logado (mudanças nas suas corridas)
+    """
+    usuario = await request.auser()
+    return await _resposta_sse([eventos.canal_usuario(usuario.pk)])
+
+
+def _etag_corrida(data_atualizacao) -> str:
+    return f'W/"{int(data_atualizacao.timestamp() * 1_000_000):x}"'
+
+
+def _etag_confere(request, etag: str) -> bool:
+    """
+    Comparação fraca com o ``If-None-Match`` da requisição
+    """
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    return "*" in etags or any(
+        valor.removeprefix("W/") == etag.removeprefix("W/") for valor in etags
+    )
+
+
+async def _versao_corrida(corrida_id: int, filtro: Q):
+    # Lida só do índice corrida_versao_idx, sem acessar a linha da corrida
+    return await (
+        Corrida.objects.filter(filtro, pk=corrida_id)
+        .order_by("pk")
+        .values_list("data_atualizacao", flat=True)
+        .afirst()
+    )
+
+
+def _dados_corrida(corrida: Corrida) -> dict:
+    def data(valor):
+        return valor.isoformat() if valor is not None else None
+
+    def coordenada(valor):
+        return float(valor) if valor is not None else None
+
+    motorista = corrida.motorista
+    return {
+        "id": corrida.pk,
+        "status": corrida.status,
+        "status_display": corrida.get_status_display(),
+        "endereco_origem": corrida.endereco_origem,
+        "endereco_destino": corrida.endereco_destino,
+        "latitude_origem": coordenada(corrida.latitude_origem),
+        "longitude_origem": coordenada(corrida.longitude_origem),
+        "latitude_destino": coordenada(corrida.latitude_destino),
+        "longitude_destino": coordenada(corrida.longitude_destino),
+        "data_hora_agendada": data(corrida.data_hora_agendada),
+        "data_hora_aceite": data(corrida.data_hora_aceite),
+        "data_hora_inicio": data(corrida.data_hora_inicio),
+        "data_hora_chegada": data(corrida.data_hora_chegada),
+        "data_hora_finalizacao": data(corrida.data_hora_finalizacao),
+        "data_cancelamento": data(corrida.data_cancelamento),
+        "motivo_cancelamento": corrida.motivo_cancelamento,
+        "necessita_cadeira_rodas": corrida.necessita_cadeira_rodas,
+        "motorista": (
+            {
+                "nome": motorista.usuario.get_full_name(),
+                "veiculo": motorista.veiculo_completo,
+                "placa": motorista.placa_veiculo,
+                "cor": motorista.cor_veiculo,
+            }
+            if motorista is not None
+            else None
+        ),
+        "data_atualizacao": data(corrida.data_atualizacao),
+    }
+
+
+@orcamento_consultas(6)
+@login_required
+@require_http_methods(["GET"])
+async def corrida_api_view(request, corrida_id):
+    """
+    API JSON de uma corrida do paciente ou do motorista logado, para clientes
+    que consultam periodicamente em vez de manter um fluxo SSE.
+
+    Responde com um ETag fraco derivado de ``data_atualizacao``. Se o
+    ``If-None-Match`` confere, devolve 304 sem carregar a corrida. Com
+    ``aguardar=N`` (até ``ESPERA_MAXIMA_LONG_POLL`` segundos), o 304 só sai
+    depois de N segundos sem mudanças; se a corrida mudar antes, a resposta
+    com os novos dados sai na hora (long-poll).
+    """
+    usuario = await request.auser()
+    perfil = await sync_to_async(obter_perfil)(usuario)
+    if perfil is None:
+        return JsonResponse(
+            {"success": False, "message": "Corrida não encontrada."}, status=404
+        )
+    if usuario.tipo_usuario == TipoUsuario.PACIENTE:
+        filtro = Q(paciente_id=perfil.pk)
+    else:
+        filtro = Q(motorista_id=perfil.pk)
+
+    try:
+        espera = min(
+            max(float(request.GET.get("aguardar", 0)), 0), ESPERA_MAXIMA_LONG_POLL
+        )
+    except ValueError:
+        return JsonResponse(
+            {"success": False, "message": "Tempo de espera inválido."}, status=400
+        )
+
+    # A assinatura vem antes da leitura da versão para não perder uma mudança
+    # feita entre as duas
+    condicional = espera > 0 and "If-None-Match" in request.headers
+    canais = [eventos.canal_corrida(corrida_id)] if condicional else []
+    async with eventos.assinatura(canais) as fila:
+        versao = await _versao_corrida(corrida_id, filtro)
+        if (
+            versao is not None
+            and condicional
+            and (_etag_confere(request, _etag_corrida(versao)))
+        ):
+            # A conexão com o banco não fica presa durante a espera
+            await sync_to_async(_fechar_conexao)()
+            try:
+                await asyncio.wait_for(fila.get(), espera)
+            except TimeoutError:
+                pass
+            else:
+                versao = await _versao_corrida(corrida_id, filtro)
+    if versao is None:
+        return JsonResponse(
+            {"success": False, "message": "Corrida não encontrada."}, status=404
+        )
+
+    etag = _etag_corrida(versao)
+    if _etag_confere(request, etag):
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    corrida = await Corrida.objects.select_related("motorista__usuario").aget(
+        pk=corrida_id
+    )
+    response = JsonResponse(_dados_corrida(corrida))
+    response["ETag"] = _etag_corrida(corrida.data_atualizacao)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@orcamento_consultas(5)
 @login_required
 def corridas_paciente_list_view(request):
     """
-    Lista de corridas do paciente com filtro por status e paginação.
+    Lista de corridas do paciente com filtro por status e paginação por cursor.
     """
     usuario: Usuario = request.user
     if usuario.tipo_usuario != TipoUsuario.PACIENTE:
@@ -595,29 +1053,40 @@ def corridas_paciente_list_view(request):
         return redirect("rodas:dashboard")
 
     paciente = usuario.perfil_paciente
-    qs = Corrida.objects.filter(paciente=paciente).order_by("-data_hora_agendada")
+    qs = Corrida.objects.filter(paciente=paciente).select_related(
+        "paciente__usuario", "motorista__usuario"
+    )
 
     status = request.GET.get("status")
     if status in dict(CorridaStatus.choices):
         qs = qs.filter(status=status)
+    else:
+        status = ""
 
-    paginator = Paginator(qs, 10)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    cursor = request.GET.get("cursor", "")
+    # A página só é consultada se o fragmento não estiver no cache
+    page_obj = SimpleLazyObject(
+        lambda: paginar_por_cursor(qs, cursor, 10, com_total=True)
+    )
 
     context = {
         "title": "Minhas Corridas - Esperança Sobre Rodas",
         "page_obj": page_obj,
-        "current_status": status or "",
+        "current_status": status,
         "status_choices": CorridaStatus.choices,
+        # Só valores validados entram na chave do cache de fragmentos
+        "chave_cursor": chave_cursor(cursor),
+        "perfil_id": paciente.pk,
+        "versao_corridas": versoes_paciente(paciente.pk),
     }
     return render(request, "rodas/paciente/corridas_list.html", context)
 
 
+@orcamento_consultas(5)
 @login_required
 def corridas_motorista_list_view(request):
     """
-    Lista de corridas do motorista com filtro por status e paginação.
+    Lista de corridas do motorista com filtro por status e paginação por cursor.
     """
     usuario: Usuario = request.user
     if usuario.tipo_usuario != TipoUsuario.MOTORISTA:
@@ -625,20 +1094,87 @@ def corridas_motorista_list_view(request):
         return redirect("rodas:dashboard")
 
     motorista = usuario.perfil_motorista
-    qs = Corrida.objects.filter(motorista=motorista).order_by("-data_hora_agendada")
+    qs = Corrida.objects.filter(motorista=motorista).select_related(
+        "paciente__usuario", "motorista__usuario"
+    )
 
     status = request.GET.get("status")
     if status in dict(CorridaStatus.choices):
         qs = qs.filter(status=status)
+    else:
+        status = ""
 
-    paginator = Paginator(qs, 10)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
+    cursor = request.GET.get("cursor", "")
+    # A página só é consultada se o fragmento não estiver no cache
+    page_obj = SimpleLazyObject(
+        lambda: paginar_por_cursor(qs, cursor, 10, com_total=True)
+    )
 
     context = {
         "title": "Minhas Corridas - Motorista",
         "page_obj": page_obj,
-        "current_status": status or "",
+        "current_status": status,
         "status_choices": CorridaStatus.choices,
+        # Só valores validados entram na chave do cache de fragmentos
+        "chave_cursor": chave_cursor(cursor),
+        "perfil_id": motorista.pk,
+        "versao_corridas": versoes_motorista(motorista.pk)[1],
     }
     return render(request, "rodas/motorista/corridas_list.html", context)
+
+
+@orcamento_consultas(5)
+@login_required
+def notificacoes_view(request):
+    """
+    Caixa de notificações do usuário, da mais recente para a mais antiga,
+    com paginação por cursor
+    """
+    usuario: Usuario = request.user
+    page_obj = paginar_por_cursor(
+        Notificacao.objects.filter(usuario=usuario).select_related("corrida"),
+        request.GET.get("cursor", ""),
+        20,
+        campo="data_criacao",
+    )
+    context = {
+        "title": "Notificações - Esperança Sobre Rodas",
+        "page_obj": page_obj,
+        # A visita à caixa corrige qualquer divergência do contador
+        "notificacoes_nao_lidas": notificacoes.sincronizar_contador(usuario.pk),
+    }
+    return render(request, "rodas/notificacoes.html", context)
+
+
+@orcamento_consultas(3)
+@login_required
+@require_http_methods(["POST"])
+def marcar_notificacoes_lidas_view(request):
+    """
+    API endpoint que marca como lidas, num único UPDATE, as notificações
+    informadas em ``ids`` (JSON) ou, sem ``ids``, todas as do usuário
+    """
+    try:
+        dados = json.loads(request.body or b"{}")
+        ids = dados.get("ids")
+        if ids is not None:
+            # Uma string seria percorrida caractere a caractere, e int()
+            # aceitaria também booleanos e números fracionários
+            if not isinstance(ids, list) or not all(
+                type(notificacao_id) in (int, str) for notificacao_id in ids
+            ):
+                raise TypeError("ids deve ser uma lista de inteiros")
+            ids = [int(notificacao_id) for notificacao_id in ids]
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse(
+            {"success": False, "message": "Dados inválidos."}, status=400
+        )
+
+    marcadas = notificacoes.marcar_como_lidas(request.user.pk, ids)
+    return JsonResponse(
+        {
+            "success": True,
+            "message": f"{marcadas} notificação(ões) marcada(s) como lida(s).",
+            "marcadas": marcadas,
+        }
+    )